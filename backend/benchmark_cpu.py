@@ -0,0 +1,134 @@
+"""CPU inference benchmark for the synthetic data generator.
+
+Generates the same prompts and seeds with the plain float32 CPU path and with
+each optimized CPU configuration (bfloat16, int8 dynamic quantization,
+torch.compile), then reports seconds per image, speedup and how far the
+images drift from the float32 reference.
+
+Run with: python benchmark_cpu.py --model runwayml/stable-diffusion-v1-5 --threads 8
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Add backend to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.generator import SyntheticDataGenerator
+
+PROMPTS = [
+    "a high quality photograph of a cat",
+    "a high quality photograph of a car",
+]
+
+# name -> SyntheticDataGenerator CPU options; the first entry is the reference
+CONFIGS: Dict[str, Dict[str, Any]] = {
+    "fp32": {},
+    "bf16": {"cpu_dtype": "bfloat16"},
+    "int8": {"quantize_int8": True},
+    "fp32+compile": {"compile_unet": True},
+    "bf16+compile": {"cpu_dtype": "bfloat16", "compile_unet": True},
+}
+
+
+def psnr(reference: np.ndarray, image: np.ndarray) -> float:
+    """Peak signal-to-noise ratio in dB between two uint8 images."""
+    mse = np.mean((reference.astype(np.float64) - image.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def run_config(name: str, options: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """Load a generator with one configuration and time a batch of images."""
+    print(f"\n🔍 {name}")
+    load_start = time.time()
+    generator = SyntheticDataGenerator(
+        model_id=args.model,
+        device="cpu",
+        cpu_threads=args.threads,
+        cpu_interop_threads=args.interop_threads,
+        **options
+    )
+    load_time = time.time() - load_start
+
+    generate_kwargs = dict(
+        prompts=PROMPTS,
+        seeds=[args.seed + i for i in range(len(PROMPTS))],
+        num_inference_steps=args.steps,
+        guidance_scale=args.guidance,
+        width=args.size,
+        height=args.size,
+        batch_size=1,
+    )
+
+    # Warm-up run absorbs one-off costs (oneDNN primitive caching, compilation)
+    generator.generate_batch(**{**generate_kwargs, "prompts": PROMPTS[:1], "seeds": [args.seed]})
+
+    start = time.time()
+    images, _ = generator.generate_batch(**generate_kwargs)
+    per_image = (time.time() - start) / len(images)
+    print(f"   Load: {load_time:.1f}s, generation: {per_image:.2f}s/image")
+
+    result = {
+        "name": name,
+        "per_image": per_image,
+        "images": [np.asarray(image.convert("RGB")) for image in images],
+    }
+    generator.release()
+    del generator
+    gc.collect()
+    return result
+
+
+def main() -> None:
+    """Benchmark every configuration and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="runwayml/stable-diffusion-v1-5")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = torch default)")
+    parser.add_argument("--interop-threads", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--guidance", type=float, default=7.5)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    configs = ["fp32"] + [name for name in args.configs if name != "fp32"]
+    print("⏱️  CPU inference benchmark")
+    print("=" * 50)
+    print(f"Model: {args.model}, {args.steps} steps, {args.size}x{args.size}, {len(PROMPTS)} images")
+
+    results: List[Dict[str, Any]] = []
+    for name in configs:
+        try:
+            results.append(run_config(name, CONFIGS[name], args))
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+
+    if not results or results[0]["name"] != "fp32":
+        print("\n❌ No float32 reference; cannot compare")
+        sys.exit(1)
+
+    reference = results[0]
+    print("\n" + "=" * 50)
+    print(f"{'config':<14}{'s/image':>10}{'speedup':>10}{'mean |Δ|':>10}{'PSNR dB':>10}")
+    for result in results:
+        diffs = [
+            np.mean(np.abs(ref.astype(np.int16) - img.astype(np.int16)))
+            for ref, img in zip(reference["images"], result["images"])
+        ]
+        scores = [psnr(ref, img) for ref, img in zip(reference["images"], result["images"])]
+        print(
+            f"{result['name']:<14}{result['per_image']:>10.2f}"
+            f"{reference['per_image'] / result['per_image']:>9.2f}x"
+            f"{np.mean(diffs):>10.2f}{min(scores):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,26 @@
-"""SQLAlchemy engine, session and Base declaration.
+"""SQLAlchemy engines, sessions and Base declaration.
 
-Any module that needs DB access should import `SessionLocal` for creating
-sessions and `Base` for model definitions.
+The API uses the async engine: import `AsyncSessionLocal` (or depend on
+`get_db`) for sessions that do not block the event loop. Scripts and
+one-off maintenance code can keep using the synchronous `SessionLocal`.
+Both engines read the same `DATABASE_URL`; the driver is swapped as needed
+(asyncpg/psycopg2 for PostgreSQL, aiosqlite/pysqlite for SQLite).
 """
+from typing import Any, AsyncIterator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from .settings import get_settings
 
+# Backend -> (async driver, sync driver)
+DRIVERS = {
+    "postgresql": ("asyncpg", "psycopg2"),
+    "sqlite": ("aiosqlite", "pysqlite"),
+}
+
 
 class Base(DeclarativeBase):
     """Base class for ORM models."""
@@ -15,18 +28,46 @@ class Base(DeclarativeBase):
     pass
 
 
-# Create engine using settings
+def _with_driver(database_url: str, use_async: bool) -> URL:
+    """Return the database URL with the async or sync driver of its backend."""
+    url = make_url(database_url)
+    drivers = DRIVERS.get(url.get_backend_name())
+    if drivers is None:
+        return url
+    return url.set(drivername=f"{url.get_backend_name()}+{drivers[0 if use_async else 1]}")
+
+
+def _engine_options(url: URL) -> Dict[str, Any]:
+    """Connection pool options from settings."""
+    options: Dict[str, Any] = {
+        "echo": False,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+# Create engines using settings
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=False, pool_pre_ping=True)
+_sync_url = _with_driver(settings.database_url, use_async=False)
+_async_url = _with_driver(settings.database_url, use_async=True)
+engine = create_engine(_sync_url, **_engine_options(_sync_url))
+async_engine = create_async_engine(_async_url, **_engine_options(_async_url))
 
-# Session factory
+# Session factories. Async sessions keep loaded attributes after commit, since
+# lazily refreshing them would need I/O outside an await.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
-def get_db():  # pragma: no cover
-    """FastAPI dependency that yields a database session."""
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:  # pragma: no cover
+    """FastAPI dependency that yields an async database session."""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -19,6 +19,11 @@ class Settings(BaseSettings):
         env="DATABASE_URL",
         description="SQLAlchemy-compatible database URL",
     )
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE", description="Connections kept open per engine")
+    db_max_overflow: int = Field(20, env="DB_MAX_OVERFLOW", description="Extra connections allowed under load")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT", description="Seconds to wait for a free connection")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE", description="Seconds before a connection is replaced")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
 
     # Application settings
     app_env: str = Field("development", env="APP_ENV")
@@ -31,8 +36,50 @@ class Settings(BaseSettings):
 
     # ML configuration
     model_name: str = Field("stabilityai/sdxl-turbo", env="MODEL_NAME")
+    available_models: str = Field(
+        "runwayml/stable-diffusion-v1-5",
+        env="AVAILABLE_MODELS",
+        description="Comma-separated models requests may select besides MODEL_NAME",
+    )
+    model_memory_budget_mb: int = Field(16384, env="MODEL_MEMORY_BUDGET_MB")
+    shared_components: str = Field("vae", env="SHARED_COMPONENTS")
+    default_speed_profile: str = Field(
+        "balanced",
+        env="DEFAULT_SPEED_PROFILE",
+        description="quality, balanced or turbo; used when a request does not pick one",
+    )
+    cpu_threads: int = Field(0, env="CPU_THREADS", description="Intra-op threads on CPU; 0 = torch default")
+    cpu_interop_threads: int = Field(0, env="CPU_INTEROP_THREADS")
+    cpu_dtype: str = Field("float32", env="CPU_DTYPE", description="float32 or bfloat16")
+    cpu_quantize_int8: bool = Field(False, env="CPU_QUANTIZE_INT8")
+    torch_compile: bool = Field(False, env="TORCH_COMPILE")
     generation_output_dir: str = Field("./data/output", env="GENERATION_OUTPUT_DIR")
     hf_token: str = Field("", env="HF_TOKEN")
+    worker_processes: int = Field(
+        0,
+        env="WORKER_PROCESSES",
+        description="Generator processes pinned to core slices; 0 runs inference in-process",
+    )
+    preload_model: bool = Field(True, env="PRELOAD_MODEL")
+    max_batch_size: int = Field(8, env="MAX_BATCH_SIZE")
+    prompt_cache_size: int = Field(256, env="PROMPT_CACHE_SIZE")
+    image_format: str = Field("png", env="IMAGE_FORMAT", description="png, webp or jpeg")
+    png_compress_level: int = Field(1, env="PNG_COMPRESS_LEVEL", description="0 (fastest) to 9 (smallest)")
+    image_quality: int = Field(90, env="IMAGE_QUALITY", description="WebP/JPEG quality")
+    image_writer_threads: int = Field(2, env="IMAGE_WRITER_THREADS")
+    image_writer_queue: int = Field(16, env="IMAGE_WRITER_QUEUE", description="Pending writes before generation waits")
+    thumbnail_size: int = Field(128, env="THUMBNAIL_SIZE")
+    thumbnail_cache_entries: int = Field(512, env="THUMBNAIL_CACHE_ENTRIES")
+    manifest_cache_entries: int = Field(256, env="MANIFEST_CACHE_ENTRIES", description="Dataset manifests kept in memory")
+    result_cache_dir: str = Field("./data/cache/results", env="RESULT_CACHE_DIR")
+    result_cache_max_mb: int = Field(1024, env="RESULT_CACHE_MAX_MB")
+    archive_cache_max_mb: int = Field(2048, env="ARCHIVE_CACHE_MAX_MB", description="0 streams every download instead")
+    archive_prebuild: bool = Field(True, env="ARCHIVE_PREBUILD", description="Build the ZIP when generation finishes")
+    export_ttl_hours: float = Field(24.0, env="EXPORT_TTL_HOURS", description="Exports older than this are deleted; 0 keeps them")
+    export_max_count: int = Field(20, env="EXPORT_MAX_COUNT", description="Exports kept at most; 0 for no limit")
+    batch_max_wait_ms: int = Field(50, env="BATCH_MAX_WAIT_MS")
+    job_concurrency: int = Field(2, env="JOB_CONCURRENCY")
+    stats_cache_ttl: float = Field(5.0, env="STATS_CACHE_TTL", description="Seconds a /stats response is reused")
 
     model_config = SettingsConfigDict(
         env_file=".env",
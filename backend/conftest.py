@@ -0,0 +1,134 @@
+"""Shared pytest fixtures.
+
+The API is imported against a throwaway SQLite database inside a temporary
+working directory, so tests never touch ``./data`` or a configured database.
+No diffusion model is loaded: tests create generation rows and image files
+directly, or stub the inference step.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+from PIL import Image
+
+# Make backend modules importable as top-level packages, as the server does
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Manual scripts that need a running server or a downloaded model
+collect_ignore = ["test_api.py", "test_generator.py"]
+
+# Settings and engines are created on first import, which for test modules
+# importing models happens during collection; configure them before that
+TEST_ROOT = tempfile.mkdtemp(prefix="synthetic-data-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(TEST_ROOT, 'test.db')}",
+    PRELOAD_MODEL="false",
+    STATS_CACHE_TTL="0",
+    ARCHIVE_PREBUILD="false",
+)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def main_module():
+    """The ``main`` module, run from the temporary directory.
+
+    Dataset and cache directories are relative to the working directory, so
+    they end up in ``TEST_ROOT`` too.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(TEST_ROOT)
+        import main
+        yield main
+
+
+@pytest.fixture(scope="session")
+def client(main_module):
+    """Test client sharing one application lifespan across the session.
+
+    The inference worker cannot be restarted once shut down, so the app is
+    started only once.
+    """
+    from fastapi.testclient import TestClient
+
+    with TestClient(main_module.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def add_generation(main_module, client):
+    """Insert a finished generation row, optionally with image files on disk.
+
+    Returns a function taking ``Generation`` column values plus ``images``
+    (number of image files to write) and returning the new row's id.
+    """
+    from config.database import SessionLocal
+    from models.generation_db import STATUS_COMPLETED, STATUS_FAILED
+
+    def add(class_label: str = "cat", images: int = 0, **fields) -> str:
+        generation_id = str(uuid.uuid4())
+        output_directory = os.path.join(main_module.OUTPUT_BASE_DIR, generation_id)
+        os.makedirs(output_directory, exist_ok=True)
+        for i in range(images):
+            Image.new("RGB", (16, 16), (i * 40 % 256, 0, 0)).save(
+                os.path.join(output_directory, f"{class_label}_{i + 1:03d}.png")
+            )
+        status = fields.pop("status", STATUS_COMPLETED)
+        values = dict(
+            id=generation_id,
+            class_label=class_label,
+            noise_level=0.1,
+            output_size=max(images, 1),
+            output_directory=output_directory,
+            file_count=images,
+            generation_time=0.0,
+            device_used="cpu",
+            status=status,
+            is_successful=status == STATUS_COMPLETED,
+            error_message="failed" if status == STATUS_FAILED else None,
+        )
+        values.update(fields)
+        db = SessionLocal()
+        try:
+            db.add(main_module.Generation(**values))
+            db.commit()
+        finally:
+            db.close()
+        return generation_id
+
+    return add
+
+
+@pytest.fixture
+def fake_inference(main_module, monkeypatch):
+    """Make the batch scheduler return blank images without loading a model.
+
+    Setting ``error`` on the returned dictionary fails every image instead.
+    """
+    handle = main_module.model_registry.handle()
+    monkeypatch.setattr(handle, "cache_params", lambda: {"device": "test"})
+    outcome = {"error": None}
+
+    def submit(prompts, seeds, **params):
+        loop = asyncio.get_running_loop()
+        results = []
+        for seed in seeds:
+            result = loop.create_future()
+            if outcome["error"] is not None:
+                result.set_exception(outcome["error"])
+            else:
+                # Pixels vary with the seed, as real images do
+                result.set_result((Image.new("RGB", (8, 8), (seed % 256, 0, 0)), {"device": "test"}))
+            results.append(result)
+        return results
+
+    monkeypatch.setattr(main_module.batch_scheduler, "submit", submit)
+    return outcome
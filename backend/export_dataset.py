@@ -0,0 +1,76 @@
+"""Export generated datasets in a training-ready format.
+
+Packs the images of one or more completed generations, with their class
+labels, noise levels and generation metadata, into WebDataset tar shards or
+Parquet files that data loaders can read sequentially.
+
+Run with: python export_dataset.py <generation id> [...] --format webdataset --output exports/cats
+      or: python export_dataset.py --class-label cat --format parquet --output exports/cats
+"""
+
+import argparse
+import os
+import sys
+
+# Add backend to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import SessionLocal
+from models.generation_db import Generation, STATUS_COMPLETED
+from utils.dataset_export import EXPORT_FORMATS, export_datasets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("generation_ids", nargs="*", help="Generations to export")
+    parser.add_argument("--class-label", action="append", default=[],
+                        help="Also export every completed generation with this label (repeatable)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="webdataset")
+    parser.add_argument("--shard-size", type=int, default=1000, help="Maximum images per shard")
+    parser.add_argument("--output", required=True, help="Directory for the shards")
+    args = parser.parse_args()
+
+    if not args.generation_ids and not args.class_label:
+        parser.error("give generation IDs or --class-label")
+
+    db = SessionLocal()
+    try:
+        completed = db.query(Generation).filter(
+            Generation.status == STATUS_COMPLETED,
+            Generation.is_successful.is_(True)
+        )
+        generations = []
+        if args.generation_ids:
+            found = {g.id: g for g in completed.filter(Generation.id.in_(args.generation_ids))}
+            missing = [generation_id for generation_id in args.generation_ids if generation_id not in found]
+            if missing:
+                print(f"❌ Not found or not completed: {', '.join(missing)}")
+                sys.exit(1)
+            generations.extend(found[generation_id] for generation_id in dict.fromkeys(args.generation_ids))
+        if args.class_label:
+            seen = {g.id for g in generations}
+            generations.extend(
+                g for g in completed.filter(Generation.class_label.in_(args.class_label))
+                .order_by(Generation.created_at)
+                if g.id not in seen
+            )
+
+        if not generations:
+            print("❌ No completed generations to export")
+            sys.exit(1)
+
+        try:
+            index = export_datasets(generations, args.output, args.format, args.shard_size)
+        except (ValueError, RuntimeError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"✅ Exported {index['sample_count']} images from {len(generations)} dataset(s) "
+          f"to {len(index['shards'])} {args.format} shard(s) in {args.output}")
+    print(f"   Classes: {', '.join(index['classes'])}")
+
+
+if __name__ == "__main__":
+    main()
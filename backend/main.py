@@ -9,37 +9,220 @@ os.environ["HF_HOME"] = r"D:\Academics\.cache\huggingface"
 os.environ["HUGGINGFACE_HUB_CACHE"] = r"D:\Academics\.cache\huggingface\hub"
 os.environ["TRANSFORMERS_CACHE"] = r"D:\Academics\.cache\huggingface\transformers"
 os.environ["HF_DATASETS_CACHE"] = r"D:\Academics\.cache\huggingface\datasets"
+import asyncio
+import functools
+import json
+import logging
+import mimetypes
+import secrets
+import shutil
 import uuid
-import tempfile
 import time
-from datetime import datetime
-from typing import List
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import List, Optional
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from config.database import Base, engine, get_db
-from models.generator import SyntheticDataGenerator
-from models.generation_db import Generation
+from config.database import AsyncSessionLocal, Base, async_engine, get_db
+from config.settings import get_settings
+from models.batch_scheduler import BatchScheduler
+from models.generated_image import GeneratedImage
+from models.inference_worker import InferenceWorker
+from models.label_counters import LabelCounter, increment_label_counters, rebuild_label_counters
+from models.model_registry import ModelRegistry
+from models.process_pool import GeneratorProcessPool
+from models.prompt_cache import PromptEmbeddingCache
+from models.schema_upgrade import upgrade_schema
+from models.speed_profiles import resolve_speed_profile
+from models.generation_db import (
+    Generation,
+    STATUS_QUEUED,
+    STATUS_RUNNING,
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    PENDING_STATUSES
+)
 from schemas.generation import (
+    MAX_SEED,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
     GenerationRequest, 
     GenerationResponse, 
     DatasetListResponse,
-    PreviewResponse
+    PreviewResponse,
+    JobStatusResponse,
+    ExportRequest,
+    ExportResponse
 )
+from utils.archive_cache import ArchiveCache
+from utils.dataset_export import export_datasets, read_metadata, shard_path, sweep_exports, write_metadata
+from utils.image_writer import ImageWriter
+from utils.job_queue import JobQueue
+from utils.label_index import LabelIndex
+from utils.manifest import ManifestStore
+from utils.result_cache import ResultCache
+from utils.sample_feed import SampleFeed
+from utils.thumbnail_store import ThumbnailStore
 from utils.utils import (
-    get_preview_images,
+    IMAGE_EXTENSIONS,
+    file_sha256,
+    parse_byte_range,
     ensure_directory_exists,
-    count_files_in_directory,
-    create_zip_archive
+    decode_cursor,
+    encode_cursor,
+    stream_zip_archive
+)
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+OUTPUT_BASE_DIR = "data/generations"
+EXPORT_BASE_DIR = "data/exports"
+STREAM_KEEPALIVE_SECONDS = 15.0  # Idle time before an event stream sends a keep-alive
+STREAM_QUEUED_POLL_SECONDS = 0.5  # How often a stream re-checks a job that has not started
+SAMPLE_FEED_SIZE = 10  # Generations shown by /samples
+# Saved images never change, so clients and CDNs may cache them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Label suggestions change slowly; let clients reuse them across keystrokes
+SUGGEST_CACHE_CONTROL = "public, max-age=60"
+COMMON_LABELS = [
+    "cat", "dog", "bird", "car", "house", "tree", "flower", "person", 
+    "bicycle", "airplane", "boat", "train", "truck", "motorcycle",
+    "chair", "table", "laptop", "phone", "book", "cup", "bottle",
+    "apple", "banana", "pizza", "cake", "sandwich", "coffee",
+    "mountain", "beach", "forest", "city", "sunset", "landscape"
+]
+
+# Every pipeline call runs on this thread so handlers never block the event loop
+inference_worker = InferenceWorker()
+
+# Text-encoder outputs reused across requests for repeated class labels
+prompt_cache = PromptEmbeddingCache(max_entries=settings.prompt_cache_size)
+
+# Finished images keyed by every parameter that determines them (incl. seed)
+result_cache = ResultCache(
+    settings.result_cache_dir,
+    max_bytes=settings.result_cache_max_mb * 1024 ** 2
+)
+
+# Pipelines are loaded on first use (or by the startup preload), not at import,
+# and evicted least-recently-used beyond the memory budget
+model_options = dict(
+    default_model_id=settings.model_name,
+    allowed_models=ModelRegistry.parse_model_list(settings.available_models),
+    memory_budget_mb=settings.model_memory_budget_mb,
+    shared_components=ModelRegistry.parse_model_list(settings.shared_components),
+    max_batch_size=settings.max_batch_size,
+    cpu_threads=settings.cpu_threads,
+    cpu_interop_threads=settings.cpu_interop_threads,
+    cpu_dtype=settings.cpu_dtype,
+    quantize_int8=settings.cpu_quantize_int8,
+    compile_unet=settings.torch_compile
 )
+model_registry = ModelRegistry(prompt_cache=prompt_cache, **model_options)
+
+# With WORKER_PROCESSES > 0, batches are sharded over generator processes
+# pinned to core slices instead of running on the in-process worker thread
+generator_pool = GeneratorProcessPool(
+    settings.worker_processes,
+    registry_kwargs=model_options,
+    prompt_cache_size=settings.prompt_cache_size,
+    preload=settings.preload_model
+) if settings.worker_processes > 0 else None
+
+# Merges images from concurrent requests into shared pipeline calls
+batch_scheduler = BatchScheduler(
+    inference_worker,
+    registry=model_registry,
+    max_batch_size=settings.max_batch_size,
+    max_wait_ms=settings.batch_max_wait_ms,
+    pool=generator_pool
+)
+
+# Small WebP thumbnails written next to each dataset, hot ones kept in memory
+thumbnail_store = ThumbnailStore(
+    size=settings.thumbnail_size,
+    max_cache_entries=settings.thumbnail_cache_entries
+)
+
+# Encodes and saves images off the request path while the next batch denoises
+image_writer = ImageWriter(
+    thumbnails=thumbnail_store,
+    image_format=settings.image_format,
+    png_compress_level=settings.png_compress_level,
+    quality=settings.image_quality,
+    max_workers=settings.image_writer_threads,
+    max_pending=settings.image_writer_queue
+)
+
+# File lists, sizes and hashes of finished datasets, so serving never scans directories
+manifest_store = ManifestStore(max_entries=settings.manifest_cache_entries)
+
+# Dataset ZIPs built once and reused across downloads, LRU-capped by total size
+archive_cache = ArchiveCache(OUTPUT_BASE_DIR, max_bytes=settings.archive_cache_max_mb * 1024 ** 2)
+
+# Keeps fire-and-forget tasks (e.g. archive prebuilds) referenced until done
+background_tasks: set = set()
+
+# Latest completed generations for the live gallery
+sample_feed = SampleFeed(max_entries=SAMPLE_FEED_SIZE)
+
+# Class label autocomplete; seeded with common labels so it is never empty
+label_index = LabelIndex()
+
+# In-process queue for generations submitted with run_async
+job_queue = JobQueue(concurrency=settings.job_concurrency)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks."""
+    if generator_pool is not None:
+        generator_pool.start()
+    await batch_scheduler.start()
+    await job_queue.start()
+    await _create_tables()
+    await _backfill_label_counters()
+    await _load_label_index()
+    await _load_sample_feed()
+    await _requeue_pending_jobs()
+    await _sweep_exports()
+    # Pool workers preload their own models
+    preload_task = None
+    if settings.preload_model and generator_pool is None:
+        preload_task = asyncio.create_task(_preload_generator())
+    yield
+    if preload_task is not None:
+        preload_task.cancel()
+    await job_queue.stop()
+    await batch_scheduler.stop()
+    if generator_pool is not None:
+        generator_pool.stop()
+    inference_worker.shutdown(wait=False)
+    image_writer.shutdown(wait=True)
+
+
+async def _preload_generator() -> None:
+    """Load the default model on the inference worker in the background after startup."""
+    try:
+        await inference_worker.submit(model_registry.get)
+    except Exception as e:
+        logger.warning(f"Background model load failed: {e}")
+
 
 app = FastAPI(
     title="Synthetic Data Generator",
     version="0.3.0",
-    description="Phase 3: Backend API Endpoints for Synthetic Data Generation"
+    description="Phase 3: Backend API Endpoints for Synthetic Data Generation",
+    lifespan=lifespan
 )
 
 # Add CORS middleware to allow frontend connections
@@ -49,41 +232,524 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the pagination cursor and cache validators
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
-# Initialize the synthetic data generator (without database dependency)
-try:
-    # Try to create database tables
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
-except Exception as e:
-    print(f"⚠️ Database setup warning: {e}")
-    print("The API will still work but without persistent storage")
-
-# Initialize the synthetic data generator
-try:
-    generator = SyntheticDataGenerator()
-    print(f"✅ Generator initialized on device: {generator.device}")
-except Exception as e:
-    print(f"⚠️ Generator initialization warning: {e}")
-    generator = None
-
-
 @app.get("/health", tags=["Meta"])
 async def health() -> dict[str, str]:
     """Health-check endpoint used by deployments and CI."""
     return {"status": "OK"}
 
 
+@app.get("/ready", tags=["Meta"])
+async def ready() -> JSONResponse:
+    """Readiness probe: 200 once the default model is loaded, 503 while idle/loading/failed."""
+    status = model_registry.status()
+    if generator_pool is not None:
+        status["worker_processes"] = generator_pool.status()
+        is_ready = generator_pool.is_ready()
+    else:
+        is_ready = model_registry.is_ready()
+    return JSONResponse(status_code=200 if is_ready else 503, content=status)
+
+
+@app.get("/metrics", tags=["Meta"])
+async def metrics() -> dict:
+    """Runtime counters for the inference path (queues, batching, caches)."""
+    return {
+        "inference_pending": generator_pool.pending if generator_pool is not None else inference_worker.pending,
+        "jobs_waiting": job_queue.size,
+        "batch_scheduler": {
+            "pending_images": batch_scheduler.pending,
+            "batches_run": batch_scheduler.batches_run,
+            "images_run": batch_scheduler.images_run,
+        },
+        "prompt_cache": prompt_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "thumbnails": thumbnail_store.stats(),
+        "archive_cache": archive_cache.stats(),
+        "manifests": manifest_store.stats(),
+    }
+
+
+async def _image_paths(db: AsyncSession, generation: Generation, limit: Optional[int] = None) -> List[str]:
+    """Paths of a dataset's images in generation order.
+    
+    Read from the dataset's ``generated_images`` rows; finished datasets
+    generated before images were recorded fall back to their manifest.
+    
+    Args:
+        db: Database session
+        generation: Generation row
+        limit: Maximum number of paths
+        
+    Returns:
+        Image file paths
+    """
+    query = select(GeneratedImage.file_path).where(
+        GeneratedImage.generation_id == generation.id
+    ).order_by(GeneratedImage.image_index)
+    if limit is not None:
+        query = query.limit(limit)
+    paths = list((await db.execute(query)).scalars())
+    if not paths and generation.status not in PENDING_STATUSES:
+        directory = generation.output_directory
+        files = await asyncio.to_thread(manifest_store.files, directory)
+        paths = [os.path.join(directory, entry["name"]) for entry in files[:limit]]
+    return paths
+
+
+def _preview_urls(generation_id: str, image_paths: List[str]) -> List[str]:
+    """Thumbnail URLs of the given images of a dataset."""
+    return [
+        f"/datasets/{generation_id}/thumbnails/{quote(os.path.basename(path))}"
+        for path in image_paths
+    ]
+
+
+async def _add_sample(generation: Generation, image_path: str) -> None:
+    """Add a completed generation, with its first image's thumbnail, to the sample feed."""
+    preview = await asyncio.to_thread(thumbnail_store.get_base64, image_path)
+    if preview is None:
+        return
+    sample_feed.add({
+        "id": generation.id,
+        "class_label": generation.class_label,
+        "preview": preview,
+        "preview_url": _preview_urls(generation.id, [image_path])[0],
+        "created_at": generation.created_at.isoformat(),
+        "file_count": generation.file_count
+    })
+
+
+def _build_prompts(class_label: str, output_size: int) -> List[str]:
+    """Create one prompt per image based on the class label, with some variation."""
+    prompts = []
+    for i in range(output_size):
+        prompt = f"{class_label}, high quality, detailed"
+        if i > 0:
+            prompt += f", variation {i+1}"
+        prompts.append(prompt)
+    return prompts
+
+
+async def _run_generation(generation_id: str, requeue_if_cancelled: bool = True) -> None:
+    """Generate, save and record all images for a submitted generation.
+    
+    Job state (status, images done, timings, errors) is persisted on the
+    generation row after every image, so progress survives restarts. Images
+    already in the result cache are linked in without running the pipeline.
+    
+    Args:
+        generation_id: ID of a generation row in queued state
+        requeue_if_cancelled: If the task is cancelled, put the job back in
+            the queue (for the next server start) instead of failing it
+        
+    Raises:
+        RuntimeError: If the generator is unavailable or generation fails
+    """
+    try:
+        # The row stays loaded for the whole job, but every database step
+        # uses its own short session, so no pooled connection is held while
+        # images are being denoised
+        async with AsyncSessionLocal() as db:
+            generation = await db.get(Generation, generation_id)
+            if generation is None:
+                logger.warning(f"Job {generation_id} has no generation row; skipping")
+                return
+            
+            generation.status = STATUS_RUNNING
+            generation.images_done = 0
+            generation.started_at = datetime.now(timezone.utc)
+            if generation.seed is None:
+                generation.seed = secrets.randbelow(MAX_SEED + 1)
+            await db.commit()
+        
+        start_time = time.time()
+        
+        try:
+            model_id = model_registry.resolve(generation.model_id)
+            generation.model_id = model_id
+            
+            # Scheduler, step count and guidance scale follow the speed profile
+            profile = resolve_speed_profile(
+                model_id, generation.speed_profile or settings.default_speed_profile
+            )
+            progress = job_queue.track(
+                generation_id, generation.output_size, profile["num_inference_steps"]
+            )
+            
+            ensure_directory_exists(generation.output_directory)
+            prompts = _build_prompts(generation.class_label, generation.output_size)
+            seeds = [(generation.seed + i) % (MAX_SEED + 1) for i in range(len(prompts))]
+            params = dict(
+                negative_prompt=None,
+                num_inference_steps=profile["num_inference_steps"],
+                guidance_scale=profile["guidance_scale"],
+                scheduler=profile["scheduler"],
+                width=512,
+                height=512
+            )
+            file_paths = [
+                os.path.join(generation.output_directory, f"{generation.class_label}_{i+1:03d}{image_writer.extension}")
+                for i in range(len(prompts))
+            ]
+            numerics = await asyncio.to_thread(model_registry.handle(model_id).cache_params)
+            cache_keys = [
+                result_cache.make_key(
+                    model_id=model_id, prompt=prompt, seed=seed,
+                    **params, **numerics, **image_writer.cache_params()
+                )
+                for prompt, seed in zip(prompts, seeds)
+            ]
+            
+            # Per-image labels and generation metadata for the metadata.jsonl sidecar;
+            # images kept from an earlier run keep the record written back then
+            records = read_metadata(generation.output_directory)
+            for i, (prompt, seed) in enumerate(zip(prompts, seeds)):
+                filename = os.path.basename(file_paths[i])
+                records[filename] = {
+                    **dict(
+                        filename=filename,
+                        generation_id=generation_id,
+                        class_label=generation.class_label,
+                        noise_level=generation.noise_level,
+                        prompt=prompt,
+                        seed=seed,
+                        model_id=model_id,
+                        speed_profile=generation.speed_profile,
+                        **params
+                    ),
+                    **records.get(filename, {})
+                }
+            
+            # generated_images rows, inserted in bulk; images recorded by an
+            # earlier run of this job are not inserted again
+            async with AsyncSessionLocal() as db:
+                recorded = set((await db.execute(
+                    select(GeneratedImage.image_index).where(GeneratedImage.generation_id == generation_id)
+                )).scalars())
+            image_rows = []
+            
+            def add_image_row(i: int) -> None:
+                if i in recorded:
+                    return
+                record = records[os.path.basename(file_paths[i])]
+                image_rows.append(dict(
+                    generation_id=generation_id,
+                    image_index=i,
+                    prompt=record["prompt"],
+                    negative_prompt=record.get("negative_prompt"),
+                    model_id=record["model_id"],
+                    width=record["width"],
+                    height=record["height"],
+                    num_inference_steps=record["num_inference_steps"],
+                    guidance_scale=record["guidance_scale"],
+                    seed=record["seed"],
+                    # Images served from the result cache took no generation time here
+                    generation_time=record.get("generation_time", 0.0),
+                    device=record.get("device", "cache"),
+                    file_path=file_paths[i],
+                    file_size=os.path.getsize(file_paths[i]),
+                    is_successful=True
+                ))
+            
+            async def flush_image_rows() -> None:
+                # One multi-row INSERT and commit for all images saved since the last flush
+                if not image_rows:
+                    return
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(GeneratedImage), image_rows)
+                    image_rows.clear()
+                    generation.images_done = images_done
+                    db.add(generation)
+                    await db.commit()
+            
+            # Serve identical (prompt, seed, params) images from the result cache
+            images_done = 0
+            missing = []
+            for i, (key, file_path) in enumerate(zip(cache_keys, file_paths)):
+                if os.path.exists(file_path) or await asyncio.to_thread(result_cache.fetch, key, file_path):
+                    images_done += 1
+                    progress.add_image(os.path.basename(file_path))
+                    add_image_row(i)
+                else:
+                    missing.append(i)
+            await flush_image_rows()
+            progress.update(images_done, 0, progress.total_steps)
+            
+            # Remaining images are batched with other requests' images by the scheduler
+            results = batch_scheduler.submit(
+                [prompts[i] for i in missing],
+                seeds=[seeds[i] for i in missing],
+                model_id=model_id,
+                on_step=lambda step, total: progress.update(progress.images_done, step, total),
+                **params
+            )
+            
+            writes = deque()
+            
+            async def record_finished_writes() -> None:
+                # Record finished writes in order; images saved together share one INSERT
+                nonlocal images_done
+                while writes and writes[0][1].done():
+                    saved, write = writes.popleft()
+                    write.result()
+                    await asyncio.to_thread(result_cache.store, cache_keys[saved], file_paths[saved])
+                    images_done += 1
+                    progress.add_image(os.path.basename(file_paths[saved]))
+                    progress.update(images_done, progress.current_step, progress.total_steps)
+                    add_image_row(saved)
+                await flush_image_rows()
+            
+            device_used = model_registry.handle(model_id).device
+            try:
+                for i, result in zip(missing, results):
+                    image, metadata = await result
+                    # Report the device images ran on, also when a worker process made them
+                    device_used = metadata.get("device", device_used)
+                    records[os.path.basename(file_paths[i])].update(metadata)
+                    
+                    # Encoding and saving overlap with the next images' denoising;
+                    # submit only waits when the writer queue is full
+                    writes.append((i, await image_writer.submit(image, file_paths[i])))
+                    await record_finished_writes()
+                
+                while writes:
+                    await writes[0][1]
+                    await record_finished_writes()
+            finally:
+                # Withdraw images not yet generated if this job is failing or cancelled
+                for result in results:
+                    result.cancel()
+            
+            write_metadata(
+                generation.output_directory,
+                [records[os.path.basename(path)] for path in file_paths]
+            )
+            await asyncio.to_thread(
+                manifest_store.build,
+                generation.output_directory,
+                [os.path.basename(path) for path in file_paths]
+            )
+            generation.images_done = images_done
+            generation.file_count = images_done
+            generation.generation_time = time.time() - start_time
+            generation.device_used = device_used or 'unknown'
+            generation.status = STATUS_COMPLETED
+            generation.is_successful = True
+            generation.completed_at = datetime.now(timezone.utc)
+            async with AsyncSessionLocal() as db:
+                db.add(generation)
+                await increment_label_counters(
+                    db, generation.class_label, successful_generations=1, total_images=generation.file_count
+                )
+                await db.commit()
+            label_index.add(generation.class_label)
+            if file_paths:
+                await _add_sample(generation, file_paths[0])
+            
+            if archive_cache.enabled and settings.archive_prebuild:
+                task = asyncio.create_task(_prebuild_archive(generation_id))
+                background_tasks.add(task)
+                task.add_done_callback(background_tasks.discard)
+            
+        except asyncio.CancelledError:
+            # Not an Exception: the server is stopping, or the client of a
+            # synchronous /generate disconnected. Record it before re-raising.
+            await asyncio.shield(_record_cancellation(generation, requeue_if_cancelled))
+            raise
+        except Exception as e:
+            # Log failed generation attempt to database
+            try:
+                async with AsyncSessionLocal() as db:
+                    # Reload the row, dropping changes the failed step did not commit
+                    db.add(generation)
+                    await db.refresh(generation)
+                    generation.generation_time = time.time() - start_time
+                    generation.status = STATUS_FAILED
+                    generation.is_successful = False
+                    generation.error_message = str(e)
+                    generation.completed_at = datetime.now(timezone.utc)
+                    await increment_label_counters(db, generation.class_label, failed_generations=1)
+                    await db.commit()
+            except Exception:
+                # If database logging also fails, just pass
+                pass
+            raise
+    finally:
+        job_queue.forget(generation_id)
+
+
+async def _record_cancellation(generation: Generation, requeue: bool) -> None:
+    """Persist the state of a generation whose task was cancelled mid-run.
+    
+    Args:
+        generation: Generation row the cancelled job was running
+        requeue: Mark the job queued again, so the next server start runs
+            it, instead of failed
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            # Reload the row, dropping changes the cancelled step did not commit
+            db.add(generation)
+            await db.refresh(generation)
+            if requeue:
+                generation.status = STATUS_QUEUED
+            else:
+                generation.status = STATUS_FAILED
+                generation.is_successful = False
+                generation.error_message = "Cancelled before completion"
+                generation.completed_at = datetime.now(timezone.utc)
+                await increment_label_counters(db, generation.class_label, failed_generations=1)
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Could not record cancellation of {generation.id}: {e}")
+
+
+async def _ensure_archive(generation: Generation, db: AsyncSession) -> str:
+    """Return an up-to-date cached archive for a dataset, (re)building it if needed.
+    
+    The archive is reused while the fingerprint of the dataset's files,
+    taken from their manifest entries, matches the one recorded on the
+    generation row; otherwise it is rebuilt and the new checksum and
+    fingerprint are stored.
+    
+    Args:
+        generation: Completed generation
+        db: Session the generation row belongs to
+        
+    Returns:
+        Path of the archive
+    """
+    directory = generation.output_directory
+    file_paths = await _image_paths(db, generation)
+    filenames = {os.path.basename(path) for path in file_paths}
+    files = await asyncio.to_thread(manifest_store.files, directory)
+    fingerprint = ArchiveCache.fingerprint([entry for entry in files if entry["name"] in filenames])
+    if generation.archive_fingerprint == fingerprint and archive_cache.touch(directory):
+        return archive_cache.archive_path(directory)
+    
+    path, checksum, _ = await asyncio.to_thread(archive_cache.build, directory, file_paths)
+    generation.archive_sha256 = checksum
+    generation.archive_fingerprint = fingerprint
+    await db.commit()
+    return path
+
+
+async def _prebuild_archive(generation_id: str) -> None:
+    """Build a finished dataset's archive in the background so downloads start instantly."""
+    async with AsyncSessionLocal() as db:
+        try:
+            generation = await db.get(Generation, generation_id)
+            if generation is not None and generation.file_count:
+                await _ensure_archive(generation, db)
+        except Exception as e:
+            logger.warning(f"Could not prebuild archive for {generation_id}: {e}")
+
+
+async def _create_tables() -> None:
+    """Create missing database tables and upgrade existing ones in place."""
+    try:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            upgraded = await conn.run_sync(upgrade_schema)
+        print("✅ Database tables created successfully")
+        if upgraded:
+            logger.info(f"Upgraded database schema: {', '.join(upgraded)}")
+    except Exception as e:
+        print(f"⚠️ Database setup warning: {e}")
+        print("The API will still work but without persistent storage")
+
+
+async def _backfill_label_counters() -> None:
+    """Fill the label counters from existing generations if the table is new."""
+    async with AsyncSessionLocal() as db:
+        try:
+            has_counters = (await db.execute(select(LabelCounter.class_label).limit(1))).first() is not None
+            has_generations = (await db.execute(select(Generation.id).limit(1))).first() is not None
+            if not has_counters and has_generations:
+                labels = await rebuild_label_counters(db)
+                await db.commit()
+                logger.info(f"Backfilled label counters for {labels} label(s)")
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Could not backfill label counters: {e}")
+
+
+async def _load_label_index() -> None:
+    """Load labels of successful generations, with their counts, into the suggestion index."""
+    labels = {label: 0 for label in COMMON_LABELS}
+    async with AsyncSessionLocal() as db:
+        try:
+            labels.update((await db.execute(
+                select(LabelCounter.class_label, LabelCounter.successful_generations)
+                .where(LabelCounter.successful_generations > 0)
+            )).all())
+        except Exception as e:
+            logger.warning(f"Could not load label suggestions: {e}")
+    label_index.load(labels.items())
+
+
+async def _load_sample_feed() -> None:
+    """Fill the sample feed with the latest successful generations."""
+    async with AsyncSessionLocal() as db:
+        try:
+            recent_generations = (await db.execute(
+                select(Generation).where(
+                    Generation.status == STATUS_COMPLETED,
+                    Generation.is_successful == True
+                ).order_by(Generation.created_at.desc()).limit(SAMPLE_FEED_SIZE)
+            )).scalars().all()
+            for generation in reversed(recent_generations):
+                image_paths = await _image_paths(db, generation, limit=1)
+                if image_paths:
+                    await _add_sample(generation, image_paths[0])
+        except Exception as e:
+            logger.warning(f"Could not load recent samples: {e}")
+
+
+async def _requeue_pending_jobs() -> None:
+    """Re-enqueue jobs left queued or running by a previous server process."""
+    async with AsyncSessionLocal() as db:
+        try:
+            pending = (await db.execute(
+                select(Generation.id).where(
+                    Generation.status.in_(PENDING_STATUSES)
+                ).order_by(Generation.created_at)
+            )).scalars().all()
+            for generation_id in pending:
+                job_queue.enqueue(generation_id, functools.partial(_run_generation, generation_id))
+            if pending:
+                logger.info(f"Re-queued {len(pending)} unfinished generation job(s)")
+        except Exception as e:
+            logger.warning(f"Could not re-queue pending jobs: {e}")
+
+
+async def _sweep_exports() -> None:
+    """Delete exports past EXPORT_TTL_HOURS or beyond EXPORT_MAX_COUNT."""
+    try:
+        deleted = await asyncio.to_thread(
+            sweep_exports, EXPORT_BASE_DIR, settings.export_ttl_hours * 3600, settings.export_max_count
+        )
+        if deleted:
+            logger.info(f"Deleted {deleted} old export(s)")
+    except Exception as e:
+        logger.warning(f"Could not clean up exports: {e}")
+
+
 @app.post("/generate", response_model=GenerationResponse, tags=["Generation"])
 async def generate_synthetic_data(
     request: GenerationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> GenerationResponse:
     """Generate synthetic data based on the provided request parameters.
     
     Accepts class_label, noise_level, output_size and generates synthetic images.
     Returns response with id, download link, and preview of first 3 samples.
+    With ``run_async`` the job is queued and the response returns immediately
+    with an empty preview and a ``status_url`` to poll.
     
     Args:
         request: Generation parameters
@@ -99,140 +765,341 @@ async def generate_synthetic_data(
     if not request.class_label.strip():
         raise HTTPException(status_code=400, detail="class_label cannot be empty")
     
+    try:
+        model_id = model_registry.resolve(request.model_id)
+        speed_profile = request.speed_profile or settings.default_speed_profile
+        resolve_speed_profile(model_id, speed_profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Generate unique ID for this generation
     generation_id = str(uuid.uuid4())
     
     # Create output directory for this generation
-    output_base_dir = "data/generations"
-    output_dir = os.path.join(output_base_dir, generation_id)
+    output_dir = os.path.join(OUTPUT_BASE_DIR, generation_id)
     ensure_directory_exists(output_dir)
     
-    start_time = time.time()
+    # Explicit seeds make results reproducible and cacheable
+    seed = request.seed if request.seed is not None else secrets.randbelow(MAX_SEED + 1)
     
+    # Persist the job before any work starts
     try:
-        # Generate multiple images based on output_size
-        generated_files = []
-        
-        for i in range(request.output_size):
-            # Create filename for this image
-            filename = f"{request.class_label}_{i+1:03d}.png"
-            file_path = os.path.join(output_dir, filename)
-            
-            # Create prompt based on class label and add some variation
-            prompt = f"{request.class_label}, high quality, detailed"
-            if i > 0:
-                prompt += f", variation {i+1}"
-            
-            # Generate the image using the existing generator
-            image, metadata = generator.generate(
-                prompt=prompt,
-                num_inference_steps=20,  # Fast generation for demo
-                guidance_scale=7.5,
-                width=512,
-                height=512,
-                seed=None  # Random seed for variation
-            )
-            
-            # Save the image
-            image.save(file_path)
-            generated_files.append(file_path)
-        
-        generation_time = time.time() - start_time
-        
-        # Count generated files
-        file_count = count_files_in_directory(output_dir, ['.png', '.jpg', '.jpeg'])
-        
-        # Get preview images (first 3)
-        preview_images = get_preview_images(output_dir, max_count=3)
-        
-        # Create database record
         db_generation = Generation(
             id=generation_id,
             class_label=request.class_label,
             noise_level=request.noise_level,
             output_size=request.output_size,
+            seed=seed,
+            model_id=model_id,
+            speed_profile=speed_profile,
             output_directory=output_dir,
-            file_count=file_count,
-            generation_time=generation_time,
-            device_used=generator.device,
-            is_successful=True
+            file_count=0,
+            generation_time=0.0,
+            device_used=model_registry.handle(model_id).device or 'pending',
+            is_successful=False,
+            status=STATUS_QUEUED
         )
-        
         db.add(db_generation)
-        db.commit()
-        db.refresh(db_generation)
-        
-        # Return response with preview
+        await increment_label_counters(db, request.class_label, generations=1)
+        await db.commit()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create generation job: {str(e)}"
+        )
+    
+    if request.run_async:
+        job_queue.enqueue(generation_id, functools.partial(_run_generation, generation_id))
         return GenerationResponse(
             id=generation_id,
             class_label=request.class_label,
             noise_level=request.noise_level,
             output_size=request.output_size,
-            preview=preview_images,
-            download_link=f"/download/{generation_id}"
+            seed=seed,
+            model_id=model_id,
+            speed_profile=speed_profile,
+            preview=[],
+            download_link=f"/download/{generation_id}",
+            status=STATUS_QUEUED,
+            status_url=f"/jobs/{generation_id}"
         )
-        
+    
+    try:
+        # A disconnecting client cancels this request; the job is then failed
+        await _run_generation(generation_id, requeue_if_cancelled=False)
     except Exception as e:
-        # Log failed generation attempt to database
-        try:
-            failed_generation = Generation(
-                id=generation_id,
-                class_label=request.class_label,
-                noise_level=request.noise_level,
-                output_size=request.output_size,
-                output_directory=output_dir,
-                file_count=0,
-                generation_time=time.time() - start_time,
-                device_used=getattr(generator, 'device', 'unknown'),
-                is_successful=False,
-                error_message=str(e)
-            )
-            db.add(failed_generation)
-            db.commit()
-        except Exception:
-            # If database logging also fails, just pass
-            pass
-            
         raise HTTPException(
             status_code=500,
             detail=f"Image generation failed: {str(e)}"
         )
+    
+    # The job ran in its own session; pick up its final state
+    await db.refresh(db_generation)
+    
+    # Previews are the precomputed thumbnails of the first 3 images
+    preview_paths = await _image_paths(db, db_generation, limit=3)
+    preview_images = await asyncio.to_thread(thumbnail_store.previews, preview_paths)
+    
+    # Return response with preview
+    return GenerationResponse(
+        id=generation_id,
+        class_label=request.class_label,
+        noise_level=request.noise_level,
+        output_size=request.output_size,
+        seed=seed,
+        model_id=model_id,
+        speed_profile=speed_profile,
+        preview=preview_images,
+        preview_urls=_preview_urls(generation_id, preview_paths),
+        download_link=f"/download/{generation_id}",
+        status=STATUS_COMPLETED,
+        status_url=f"/jobs/{generation_id}"
+    )
+
+
+@app.get("/jobs/{id}", response_model=JobStatusResponse, tags=["Generation"])
+async def get_job_status(id: str, db: AsyncSession = Depends(get_db)) -> JobStatusResponse:
+    """Return status and progress of a generation job.
+    
+    Progress combines the persisted image count with live denoising-step
+    progress reported by the diffusion callback while the job is running.
+    
+    Args:
+        id: Generation ID
+        db: Database session dependency
+        
+    Returns:
+        JobStatusResponse with images done / total and step progress
+        
+    Raises:
+        HTTPException: If generation not found (404)
+    """
+    generation = await db.get(Generation, id)
+    
+    if not generation:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    images_done = generation.images_done or 0
+    current_step = 0
+    total_steps = 0
+    progress_fraction = 1.0 if generation.status == STATUS_COMPLETED else 0.0
+    
+    progress = job_queue.get_progress(id)
+    if progress is not None:
+        images_done = max(images_done, progress.images_done)
+        current_step = progress.current_step
+        total_steps = progress.total_steps
+        progress_fraction = progress.fraction
+    elif generation.output_size:
+        progress_fraction = max(progress_fraction, images_done / generation.output_size)
+    
+    return JobStatusResponse(
+        id=generation.id,
+        status=generation.status,
+        images_done=images_done,
+        images_total=generation.output_size,
+        current_step=current_step,
+        total_steps=total_steps,
+        progress=progress_fraction,
+        error_message=generation.error_message,
+        created_at=generation.created_at,
+        started_at=generation.started_at,
+        completed_at=generation.completed_at,
+        download_link=f"/download/{generation.id}" if generation.status == STATUS_COMPLETED else None
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.get("/generate/{id}/stream", tags=["Generation"])
+async def stream_generation(id: str, db: AsyncSession = Depends(get_db)) -> StreamingResponse:
+    """Stream a generation's progress and images as Server-Sent Events.
+    
+    Events:
+        ``status``: job status changes (queued/running)
+        ``progress``: images done and denoising step, on every step
+        ``image``: one per saved image, with its file name, URL and thumbnail (base64 and URL)
+        ``done``: final status, error message and download link; the stream then ends
+    
+    Works for jobs in any state: finished jobs replay their images and end
+    immediately. Submit with ``run_async`` and open this stream to render
+    results progressively.
+    
+    Args:
+        id: Generation ID
+        db: Database session dependency
+        
+    Returns:
+        ``text/event-stream`` response
+        
+    Raises:
+        HTTPException: If generation not found (404)
+    """
+    generation = await db.get(Generation, id)
+    if not generation:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    output_dir = generation.output_directory
+    images_total = generation.output_size
+    
+    # Short-lived sessions, so a long stream holds no connection between polls
+    async def load_generation():
+        async with AsyncSessionLocal() as session:
+            return await session.get(Generation, id)
+    
+    async def load_image_filenames(generation: Generation) -> List[str]:
+        async with AsyncSessionLocal() as session:
+            return [os.path.basename(path) for path in await _image_paths(session, generation)]
+    
+    async def image_event(filename: str) -> str:
+        thumbnail = await asyncio.to_thread(thumbnail_store.get_base64, os.path.join(output_dir, filename))
+        return _sse_event("image", {
+            "filename": filename,
+            "thumbnail": thumbnail,
+            "thumbnail_url": f"/datasets/{id}/thumbnails/{quote(filename)}",
+            "url": f"/datasets/{id}/images/{quote(filename)}",
+        })
+    
+    async def events():
+        sent = set()
+        last_status = None
+        last_progress = None
+        while True:
+            progress = job_queue.get_progress(id)
+            if progress is not None and not progress.closed:
+                version = progress.version
+                if last_status != STATUS_RUNNING:
+                    last_status = STATUS_RUNNING
+                    yield _sse_event("status", {"status": STATUS_RUNNING})
+                
+                for filename in progress.saved_images:
+                    if filename not in sent:
+                        sent.add(filename)
+                        yield await image_event(filename)
+                
+                snapshot = (progress.images_done, progress.current_step, progress.total_steps)
+                if snapshot != last_progress:
+                    last_progress = snapshot
+                    yield _sse_event("progress", {
+                        "images_done": progress.images_done,
+                        "images_total": images_total,
+                        "current_step": progress.current_step,
+                        "total_steps": progress.total_steps,
+                        "progress": progress.fraction,
+                    })
+                
+                if not await progress.wait_for_change(version, STREAM_KEEPALIVE_SECONDS):
+                    yield ": keep-alive\n\n"
+                continue
+            
+            generation = await load_generation()
+            if generation is None:
+                yield _sse_event("done", {"status": STATUS_FAILED, "error_message": "Generation was deleted"})
+                return
+            
+            if generation.status in PENDING_STATUSES:
+                # Queued, or about to start running on a job consumer
+                if generation.status != last_status:
+                    last_status = generation.status
+                    yield _sse_event("status", {"status": generation.status})
+                await asyncio.sleep(STREAM_QUEUED_POLL_SECONDS)
+                continue
+            
+            # Finished: replay any images this stream has not sent yet
+            for filename in await load_image_filenames(generation):
+                if filename not in sent:
+                    sent.add(filename)
+                    yield await image_event(filename)
+            
+            yield _sse_event("done", {
+                "status": generation.status,
+                "images_done": generation.images_done,
+                "images_total": images_total,
+                "error_message": generation.error_message,
+                "download_link": f"/download/{id}" if generation.status == STATUS_COMPLETED else None,
+            })
+            return
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Columns needed for DatasetListResponse; listing never loads whole rows
+DATASET_LIST_COLUMNS = (
+    Generation.id,
+    Generation.class_label,
+    Generation.noise_level,
+    Generation.output_size,
+    Generation.created_at,
+    Generation.file_count,
+)
 
 
 @app.get("/datasets", response_model=List[DatasetListResponse], tags=["Datasets"])
-async def list_datasets(db: Session = Depends(get_db)) -> List[DatasetListResponse]:
-    """List all generations from database.
+async def list_datasets(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum datasets to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    class_label: Optional[str] = Query(None, description="Only datasets with this class label"),
+    successful: Optional[bool] = Query(None, description="Only completed (true) or failed (false) datasets"),
+    db: AsyncSession = Depends(get_db)
+) -> List[dict]:
+    """List generations from database, newest first, one page at a time.
     
-    Returns list of all generations with metadata including id, class_label,
-    noise_level, output_size, created_at, and file_count.
+    Pages use keyset pagination on ``(created_at, id)``, so each page costs
+    the same however deep it is and rows created meanwhile never shift it.
+    When more datasets follow, the cursor for the next page is returned in
+    the ``X-Next-Cursor`` header; the body stays a plain list.
     
     Args:
+        response: Response whose headers receive the next cursor
+        limit: Maximum datasets to return
+        cursor: Position after which to continue
+        class_label: Optional class label filter
+        successful: Optional filter on finished datasets: completed (true) or
+            failed (false); queued and running ones match neither
         db: Database session dependency
         
     Returns:
-        List of DatasetListResponse objects
+        List of datasets with id, class_label, noise_level, output_size,
+        created_at and file_count
         
     Raises:
-        HTTPException: If database query fails (500)
+        HTTPException: If the cursor is invalid (400) or database query fails (500)
     """
     try:
-        # Query all generations from database
-        generations = db.query(Generation).order_by(Generation.created_at.desc()).all()
-        
-        # Convert to response format
-        response = []
-        for gen in generations:
-            response.append(DatasetListResponse(
-                id=gen.id,
-                class_label=gen.class_label,
-                noise_level=gen.noise_level,
-                output_size=gen.output_size,
-                created_at=gen.created_at,
-                file_count=gen.file_count
-            ))
-        
-        return response
+        query = select(*DATASET_LIST_COLUMNS)
+        if class_label is not None:
+            query = query.where(Generation.class_label == class_label)
+        if successful is not None:
+            query = query.where(Generation.status == (STATUS_COMPLETED if successful else STATUS_FAILED))
+        if cursor:
+            try:
+                after_created_at, after_id = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            query = query.where(
+                tuple_(Generation.created_at, Generation.id) < tuple_(after_created_at, after_id)
+            )
+        
+        # One extra row tells whether another page follows
+        rows = (await db.execute(query.order_by(
+            Generation.created_at.desc(), Generation.id.desc()
+        ).limit(limit + 1))).all()
         
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+        
+        return [row._asdict() for row in rows]
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -241,10 +1108,11 @@ async def list_datasets(db: Session = Depends(get_db)) -> List[DatasetListRespon
 
 
 @app.get("/preview/{id}", response_model=PreviewResponse, tags=["Preview"])
-async def preview_dataset(id: str, db: Session = Depends(get_db)) -> PreviewResponse:
+async def preview_dataset(id: str, db: AsyncSession = Depends(get_db)) -> PreviewResponse:
     """Return preview of first 3 samples from a generation.
     
-    Returns decoded preview from saved files as base64 encoded PNGs.
+    Returns the precomputed thumbnails as base64 encoded WebP images, plus
+    their cacheable URLs.
     
     Args:
         id: Generation ID
@@ -258,18 +1126,20 @@ async def preview_dataset(id: str, db: Session = Depends(get_db)) -> PreviewResp
     """
     try:
         # Find generation in database
-        generation = db.query(Generation).filter(Generation.id == id).first()
+        generation = await db.get(Generation, id)
         
         if not generation:
             raise HTTPException(status_code=404, detail="Generation not found")
         
-        # Get preview images from the output directory
-        preview_images = get_preview_images(generation.output_directory, max_count=3)
+        # Thumbnails of the first 3 images of the dataset
+        preview_paths = await _image_paths(db, generation, limit=3)
+        preview_images = await asyncio.to_thread(thumbnail_store.previews, preview_paths)
         
         return PreviewResponse(
             id=generation.id,
             class_label=generation.class_label,
-            preview=preview_images
+            preview=preview_images,
+            preview_urls=_preview_urls(generation.id, preview_paths)
         )
         
     except HTTPException:
@@ -281,30 +1151,183 @@ async def preview_dataset(id: str, db: Session = Depends(get_db)) -> PreviewResp
         )
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's ``If-None-Match`` header matches an ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (if_none_match.strip() == "*" or etag in [
+        tag.strip() for tag in if_none_match.split(",")
+    ])
+
+
+def _manifest_entry(generation: Generation, filename: str) -> Optional[dict]:
+    """Manifest entry (name, size, sha256, ...) of one image of a dataset.
+    
+    Finished datasets are looked up in their manifest. Running jobs have no
+    manifest yet, so the image file itself is checked and hashed.
+    
+    Args:
+        generation: Generation row
+        filename: Image file name
+        
+    Returns:
+        The entry, or None if the dataset has no such image
+    """
+    if os.path.basename(filename) != filename or not filename.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+    if generation.status not in PENDING_STATUSES:
+        return manifest_store.entry(generation.output_directory, filename)
+    
+    path = os.path.join(generation.output_directory, filename)
+    try:
+        return {"name": filename, "size": os.path.getsize(path), "sha256": file_sha256(path)}
+    except OSError:
+        return None
+
+
+def _read_file_range(path: str, start: int, length: int) -> bytes:
+    """Read ``length`` bytes of a file starting at ``start``."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(length)
+
+
+@app.get("/datasets/{id}/images/{filename}", tags=["Datasets"])
+async def get_dataset_image(
+    id: str,
+    filename: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """Serve one generated image with HTTP caching and range support.
+    
+    Responses carry a strong ETag (the file's SHA-256 from the dataset
+    manifest) and an immutable Cache-Control header. ``If-None-Match`` is answered with
+    304 Not Modified, and a single ``Range`` (optionally guarded by
+    ``If-Range``) with 206 Partial Content.
+    
+    Args:
+        id: Generation ID
+        filename: Image file name inside the dataset
+        request: Incoming request, for conditional and range headers
+        db: Database session dependency
+        
+    Returns:
+        The image (200), a byte range of it (206) or 304 Not Modified
+        
+    Raises:
+        HTTPException: If the generation or image is not found (404), or the
+            range cannot be satisfied (416)
+    """
+    generation = await db.get(Generation, id)
+    if not generation:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    entry = await asyncio.to_thread(_manifest_entry, generation, filename)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = os.path.join(generation.output_directory, filename)
+    etag = f'"{entry["sha256"]}"'
+    size = entry["size"]
+    
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except ValueError:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"}
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            content = await asyncio.to_thread(_read_file_range, path, start, end - start + 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return Response(content=content, status_code=206, media_type=media_type, headers=headers)
+    
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+@app.get("/datasets/{id}/thumbnails/{filename}", tags=["Preview"])
+async def get_thumbnail(id: str, filename: str, db: AsyncSession = Depends(get_db)) -> Response:
+    """Return the WebP thumbnail of one dataset image.
+    
+    Images never change once saved, so thumbnails are served as immutable
+    and can be cached by browsers and proxies indefinitely.
+    
+    Args:
+        id: Generation ID
+        filename: File name of the full-size image
+        db: Database session dependency
+        
+    Returns:
+        ``image/webp`` response
+        
+    Raises:
+        HTTPException: If the generation or image is not found (404)
+    """
+    generation = await db.get(Generation, id)
+    if not generation:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    entry = await asyncio.to_thread(_manifest_entry, generation, filename)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    data = await asyncio.to_thread(
+        thumbnail_store.get, os.path.join(generation.output_directory, filename)
+    )
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    return Response(
+        content=data,
+        media_type="image/webp",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+
 @app.get("/download/{id}", tags=["Download"])
-async def download_dataset(id: str, db: Session = Depends(get_db)) -> FileResponse:
+async def download_dataset(id: str, db: AsyncSession = Depends(get_db)) -> Response:
     """Return ZIP of generated files for a specific generation.
     
-    Creates a ZIP archive containing all generated files for the specified
-    generation and returns it for download.
+    Serves the dataset's cached archive, built when generation finished or
+    on the first download and rebuilt whenever the dataset's files change.
+    With the archive cache disabled, the ZIP is streamed chunk by chunk as it
+    is built, without a temporary file. Images are stored uncompressed since
+    they are already compressed.
     
     Args:
         id: Generation ID
         db: Database session dependency
         
     Returns:
-        FileResponse with ZIP file
+        FileResponse with the cached ZIP, or a StreamingResponse
         
     Raises:
-        HTTPException: If generation not found (404) or file creation fails (500)
+        HTTPException: If generation not found (404) or download fails (500)
     """
     try:
         # Find generation in database
-        generation = db.query(Generation).filter(Generation.id == id).first()
+        generation = await db.get(Generation, id)
         
         if not generation:
             raise HTTPException(status_code=404, detail="Generation not found")
         
+        if generation.status in PENDING_STATUSES:
+            raise HTTPException(status_code=409, detail="Generation is still in progress")
+        
         if not generation.is_successful:
             raise HTTPException(status_code=404, detail="Generation was not successful")
         
@@ -313,33 +1336,26 @@ async def download_dataset(id: str, db: Session = Depends(get_db)) -> FileRespon
             raise HTTPException(status_code=404, detail="Generated files not found")
         
         # Collect all image files
-        image_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
-        file_paths = []
-        
-        for filename in os.listdir(generation.output_directory):
-            if filename.lower().endswith(image_extensions):
-                file_path = os.path.join(generation.output_directory, filename)
-                if os.path.exists(file_path):
-                    file_paths.append(file_path)
+        file_paths = await _image_paths(db, generation)
         
         if not file_paths:
             raise HTTPException(status_code=404, detail="No image files found")
         
-        # Create temporary ZIP file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_zip:
-            zip_path = temp_zip.name
-        
-        # Create ZIP archive
-        success = create_zip_archive(file_paths, zip_path)
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to create ZIP archive")
+        if archive_cache.enabled:
+            archive_path = await _ensure_archive(generation, db)
+            return FileResponse(
+                path=archive_path,
+                media_type='application/zip',
+                filename=f"{generation.class_label}_{generation.id}.zip",
+                headers={"ETag": f'"{generation.archive_sha256}"'}
+            )
         
-        # Return ZIP file as download
-        return FileResponse(
-            path=zip_path,
+        # Sync iterators are run on Starlette's threadpool, off the event loop
+        filename = quote(f"{generation.class_label}_{generation.id}.zip")
+        return StreamingResponse(
+            stream_zip_archive(file_paths),
             media_type='application/zip',
-            filename=f"{generation.class_label}_{generation.id}.zip"
+            headers={"Content-Disposition": f"attachment; filename*=utf-8''{filename}"}
         )
         
     except HTTPException:
@@ -351,67 +1367,164 @@ async def download_dataset(id: str, db: Session = Depends(get_db)) -> FileRespon
         )
 
 
-@app.get("/samples", tags=["Samples"])
-async def get_samples(db: Session = Depends(get_db)):
-    """Get recent generation samples for display."""
+@app.post("/exports", response_model=ExportResponse, tags=["Download"])
+async def export_training_data(request: ExportRequest, db: AsyncSession = Depends(get_db)) -> ExportResponse:
+    """Export one or more datasets as WebDataset tar shards or Parquet files.
+    
+    Shards hold the image bytes as saved together with their class label,
+    noise level and generation metadata, so data loaders can read them
+    sequentially instead of opening one file per image. Exports are kept
+    for ``EXPORT_TTL_HOURS``, and only the newest ``EXPORT_MAX_COUNT`` of them.
+    
+    Args:
+        request: Generations to export, format and shard size
+        db: Database session dependency
+        
+    Returns:
+        ExportResponse listing the shards and their download links
+        
+    Raises:
+        HTTPException: If a generation is not found (404), still in progress
+            (409), the format is unavailable (400) or the export fails (500)
+    """
+    generation_ids = list(dict.fromkeys(request.generation_ids))
+    generations = (await db.execute(
+        select(Generation).where(Generation.id.in_(generation_ids))
+    )).scalars().all()
+    by_id = {generation.id: generation for generation in generations}
+    for generation_id in generation_ids:
+        generation = by_id.get(generation_id)
+        if generation is None:
+            raise HTTPException(status_code=404, detail=f"Generation {generation_id} not found")
+        if generation.status in PENDING_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Generation {generation_id} is still in progress")
+        if not generation.is_successful:
+            raise HTTPException(status_code=404, detail=f"Generation {generation_id} was not successful")
+    
+    export_id = str(uuid.uuid4())
+    output_directory = os.path.join(EXPORT_BASE_DIR, export_id)
     try:
-        # Get recent successful generations
-        recent_generations = db.query(Generation).filter(
-            Generation.is_successful == True
-        ).order_by(Generation.created_at.desc()).limit(10).all()
-        
-        samples = []
-        for gen in recent_generations:
-            # Get preview images for each generation
-            preview_images = get_preview_images(gen.output_directory, max_count=1)
-            if preview_images:
-                samples.append({
-                    "id": gen.id,
-                    "class_label": gen.class_label,
-                    "preview": preview_images[0],  # Just first image
-                    "created_at": gen.created_at.isoformat(),
-                    "file_count": gen.file_count
-                })
-        
-        return {"samples": samples}
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to get samples: {str(e)}"
+        index = await asyncio.to_thread(
+            export_datasets,
+            [by_id[generation_id] for generation_id in generation_ids],
+            output_directory,
+            request.format,
+            request.shard_size
         )
+    except RuntimeError as e:
+        await asyncio.to_thread(shutil.rmtree, output_directory, True)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await asyncio.to_thread(shutil.rmtree, output_directory, True)
+        raise HTTPException(status_code=500, detail=f"Failed to export datasets: {str(e)}")
+    await _sweep_exports()
+    
+    return ExportResponse(
+        id=export_id,
+        format=index["format"],
+        classes=index["classes"],
+        sample_count=index["sample_count"],
+        shards=[
+            {**shard, "url": f"/exports/{export_id}/{shard['filename']}"}
+            for shard in index["shards"]
+        ],
+        index_url=f"/exports/{export_id}/index.json"
+    )
+
+
+@app.get("/exports/{id}/{filename}", tags=["Download"])
+async def download_export_file(id: str, filename: str) -> FileResponse:
+    """Download a shard or the index.json of an export.
+    
+    Args:
+        id: Export ID
+        filename: Shard or index file name
+        
+    Returns:
+        FileResponse with the file
+        
+    Raises:
+        HTTPException: If the export or file does not exist (404)
+    """
+    try:
+        uuid.UUID(id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    path = shard_path(os.path.join(EXPORT_BASE_DIR, id), filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Export file not found")
+    
+    media_type = {
+        ".tar": "application/x-tar",
+        ".parquet": "application/vnd.apache.parquet",
+    }.get(os.path.splitext(filename)[1], "application/json")
+    return FileResponse(path=path, media_type=media_type, filename=filename)
+
+
+@app.get("/samples", tags=["Samples"])
+async def get_samples(
+    request: Request,
+    since: Optional[int] = Query(None, description="cursor from a previous response; only newer samples are returned")
+) -> Response:
+    """Get recent generation samples for display.
+    
+    Served from the in-memory sample feed, filled as generations complete,
+    without touching the database or disk. Each response carries a
+    ``cursor``: pass it back as ``since`` to receive only newer samples.
+    The ETag changes only when a sample is added, so ``If-None-Match``
+    polls are answered with 304 Not Modified.
+    """
+    headers = {"ETag": sample_feed.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, sample_feed.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(
+        {"samples": sample_feed.since(since), "cursor": sample_feed.cursor},
+        headers=headers
+    )
+
+
+# (expiry time, response) of the last /stats computation
+_stats_cache: Optional[tuple] = None
 
 
 @app.get("/stats", tags=["Statistics"])
-async def get_stats(db: Session = Depends(get_db)):
-    """Get generation statistics."""
+async def get_stats(db: AsyncSession = Depends(get_db)):
+    """Get generation statistics.
+    
+    Totals are read from the per-label counters, which are updated together
+    with each generation, so the cost depends on the number of labels, not
+    generations. Responses are reused for ``STATS_CACHE_TTL`` seconds.
+    """
+    global _stats_cache
+    now = time.monotonic()
+    if _stats_cache is not None and _stats_cache[0] > now:
+        return _stats_cache[1]
+    
     try:
-        total_generations = db.query(Generation).count()
-        successful_generations = db.query(Generation).filter(
-            Generation.is_successful == True
-        ).count()
-        failed_generations = total_generations - successful_generations
-        
-        # Get total images generated
-        total_images = db.query(Generation).filter(
-            Generation.is_successful == True
-        ).with_entities(Generation.file_count).all()
-        total_images_count = sum(count[0] or 0 for count in total_images)
+        totals = (await db.execute(select(
+            func.coalesce(func.sum(LabelCounter.generations), 0),
+            func.coalesce(func.sum(LabelCounter.successful_generations), 0),
+            func.coalesce(func.sum(LabelCounter.failed_generations), 0),
+            func.coalesce(func.sum(LabelCounter.total_images), 0)
+        ))).one()
+        total_generations, successful_generations, failed_generations, total_images = totals
         
         # Get most popular labels
-        popular_labels = db.query(
-            Generation.class_label,
-            db.func.count(Generation.class_label).label('count')
-        ).filter(
-            Generation.is_successful == True
-        ).group_by(Generation.class_label).order_by(
-            db.func.count(Generation.class_label).desc()
-        ).limit(5).all()
-        
-        return {
+        popular_labels = (await db.execute(select(
+            LabelCounter.class_label, LabelCounter.successful_generations
+        ).where(
+            LabelCounter.successful_generations > 0
+        ).order_by(
+            LabelCounter.successful_generations.desc(), LabelCounter.class_label
+        ).limit(5))).all()
+        
+        stats = {
             "total_generations": total_generations,
             "successful_generations": successful_generations,
             "failed_generations": failed_generations,
-            "total_images": total_images_count,
+            "pending_generations": total_generations - successful_generations - failed_generations,
+            "total_images": total_images,
             "popular_labels": [{
                 "label": label,
                 "count": count
@@ -422,43 +1535,26 @@ async def get_stats(db: Session = Depends(get_db)):
             status_code=500,
             detail=f"Failed to get stats: {str(e)}"
         )
+    
+    if settings.stats_cache_ttl > 0:
+        _stats_cache = (now + settings.stats_cache_ttl, stats)
+    return stats
 
 
 @app.get("/suggest/labels", tags=["Suggestions"])
-async def suggest_labels(q: str = "", db: Session = Depends(get_db)):
-    """Suggest class labels based on query."""
-    try:
-        # Common image class suggestions
-        common_labels = [
-            "cat", "dog", "bird", "car", "house", "tree", "flower", "person", 
-            "bicycle", "airplane", "boat", "train", "truck", "motorcycle",
-            "chair", "table", "laptop", "phone", "book", "cup", "bottle",
-            "apple", "banana", "pizza", "cake", "sandwich", "coffee",
-            "mountain", "beach", "forest", "city", "sunset", "landscape"
-        ]
-        
-        # If query provided, filter suggestions
-        if q.strip():
-            q_lower = q.lower().strip()
-            suggestions = [label for label in common_labels if q_lower in label.lower()]
-        else:
-            suggestions = common_labels[:10]  # Return top 10 if no query
-            
-        # Also get previously used labels from database
-        if q.strip():
-            db_labels = db.query(Generation.class_label).filter(
-                Generation.class_label.ilike(f"%{q}%"),
-                Generation.is_successful == True
-            ).distinct().limit(5).all()
-            db_suggestions = [label[0] for label in db_labels]
-            suggestions.extend(db_suggestions)
-        
-        # Remove duplicates and limit
-        unique_suggestions = list(dict.fromkeys(suggestions))[:10]
-        
-        return {"suggestions": unique_suggestions}
-    except Exception as e:
-        return {"suggestions": []}
+async def suggest_labels(
+    response: Response,
+    q: str = "",
+    limit: int = Query(10, ge=1, le=50, description="Maximum suggestions")
+):
+    """Suggest class labels completing the query.
+    
+    Served from the in-memory label index (no database query), ranked by how
+    often each label was generated successfully. Responses may be cached
+    briefly so repeated keystrokes are answered by the client.
+    """
+    response.headers["Cache-Control"] = SUGGEST_CACHE_CONTROL
+    return {"suggestions": label_index.suggest(q, limit)}
 
 
 @app.get("/suggest/noise", tags=["Suggestions"])
@@ -0,0 +1,325 @@
+"""Cross-request dynamic batching in front of the diffusion generator.
+
+Concurrent ``/generate`` requests with small ``output_size`` would otherwise
+each run alone on the pipeline. The scheduler collects individual images from
+all callers, groups those with compatible generation parameters, and runs each
+group as one batched pipeline call on the inference worker. Results are routed
+back to the caller that submitted each image.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .inference_worker import InferenceWorker
+from .model_registry import ModelRegistry
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from .process_pool import GeneratorProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Parameters that must match for images to share one pipeline call
+BatchKey = Tuple[Any, ...]
+
+
+class _PendingImage:
+    """One image waiting to be scheduled into a batch."""
+
+    __slots__ = ("prompt", "seed", "future", "on_step", "enqueued_at")
+
+    def __init__(
+        self,
+        prompt: str,
+        seed: Optional[int],
+        future: asyncio.Future,
+        on_step: Optional[Callable[[int, int], None]]
+    ) -> None:
+        self.prompt = prompt
+        self.seed = seed
+        self.future = future
+        self.on_step = on_step
+        self.enqueued_at = time.monotonic()
+
+
+class BatchScheduler:
+    """Merge images from concurrent requests into batched pipeline calls.
+
+    Images are grouped by model, scheduler, resolution, step count, guidance
+    scale and negative prompt. A group is dispatched once it reaches the batch size limit or its
+    oldest image has waited ``max_wait_ms``. Only one batch runs at a time
+    (one per worker process with a pool), so new requests keep accumulating
+    while the workers are busy.
+    """
+
+    def __init__(
+        self,
+        worker: InferenceWorker,
+        registry: ModelRegistry,
+        max_batch_size: int = 8,
+        max_wait_ms: int = 50,
+        pool: Optional["GeneratorProcessPool"] = None
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            worker: Inference worker that executes pipeline calls.
+            registry: Registry providing the generator for each model. Models
+                are loaded on the worker thread by their first batch if needed.
+            max_batch_size: Upper bound on images merged into one call. The
+                generator's memory-based limit still applies.
+            max_wait_ms: How long the oldest image in a group may wait for
+                more compatible images before the group is dispatched anyway.
+            pool: Worker processes to run batches on instead of ``worker``.
+                Batches are sharded across the pool's processes.
+        """
+        self.worker = worker
+        self.registry = registry
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self.pool = pool
+        self._groups: "OrderedDict[BatchKey, Deque[_PendingImage]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: Set[asyncio.Task] = set()
+        self.batches_run = 0
+        self.images_run = 0
+
+    async def start(self) -> None:
+        """Start the dispatcher task on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.pool.num_workers if self.pool is not None else 1)
+        self._dispatcher = asyncio.create_task(self._dispatch_loop(), name="batch-scheduler")
+
+    async def stop(self) -> None:
+        """Stop dispatching and fail any images still waiting."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        for items in self._groups.values():
+            for item in items:
+                if not item.future.done():
+                    item.future.cancel()
+        self._groups.clear()
+
+    @property
+    def pending(self) -> int:
+        """Number of images waiting to be dispatched."""
+        return sum(len(items) for items in self._groups.values())
+
+    def submit(
+        self,
+        prompts: List[str],
+        seeds: Optional[List[Optional[int]]] = None,
+        model_id: Optional[str] = None,
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: int = 50,
+        guidance_scale: float = 7.5,
+        width: int = 512,
+        height: int = 512,
+        scheduler: Optional[str] = None,
+        on_step: Optional[Callable[[int, int], None]] = None
+    ) -> List["asyncio.Future[Tuple[Image.Image, Dict[str, Any]]]"]:
+        """Queue images for batched generation.
+
+        Args:
+            prompts: One prompt per image.
+            seeds: Per-image seeds; None entries are drawn at random.
+            model_id: Model to generate with, or None for the default.
+            negative_prompt: Text description of what to avoid in the images.
+            num_inference_steps: Number of denoising steps.
+            guidance_scale: How closely to follow the prompt.
+            width: Width of the generated images.
+            height: Height of the generated images.
+            scheduler: Scheduler name, or None for the model's default.
+            on_step: Called as ``(step, total_steps)`` while a batch holding
+                any of these images is denoising.
+
+        Returns:
+            One future per prompt, resolving to ``(image, metadata)``.
+
+        Raises:
+            RuntimeError: If the scheduler has not been started.
+            ValueError: If the model is not served by the registry.
+        """
+        if self._wakeup is None:
+            raise RuntimeError("Batch scheduler is not running")
+        if seeds is None:
+            seeds = [None] * len(prompts)
+        if len(seeds) != len(prompts):
+            raise ValueError("prompts and seeds must have the same length")
+
+        key = (
+            self.registry.resolve(model_id), negative_prompt,
+            num_inference_steps, guidance_scale, width, height, scheduler
+        )
+        loop = asyncio.get_running_loop()
+        group = self._groups.setdefault(key, deque())
+        futures = []
+        for prompt, seed in zip(prompts, seeds):
+            future = loop.create_future()
+            group.append(_PendingImage(prompt, seed, future, on_step))
+            futures.append(future)
+
+        self._wakeup.set()
+        return futures
+
+    async def generate(self, prompts: List[str], **kwargs: Any) -> Tuple[List["Image.Image"], List[Dict[str, Any]]]:
+        """Submit images and wait for all of them, preserving input order.
+
+        Args:
+            prompts: One prompt per image.
+            **kwargs: Same generation parameters as ``submit``.
+
+        Returns:
+            A tuple of images and their metadata dictionaries.
+        """
+        results = await asyncio.gather(*self.submit(prompts, **kwargs))
+        return [image for image, _ in results], [metadata for _, metadata in results]
+
+    def _batch_limit(self, key: BatchKey) -> int:
+        """Largest batch allowed for a group, bounded by free memory once loaded."""
+        generator = self.registry.peek(key[0])
+        width, height = key[4], key[5]
+        if generator is None:
+            return self.max_batch_size
+        return max(1, min(self.max_batch_size, generator.auto_batch_size(width, height)))
+
+    def _next_ready_group(self) -> Tuple[Optional[BatchKey], float]:
+        """Find a group to dispatch now, or how long to wait for one.
+
+        Returns:
+            ``(key, 0.0)`` for a group that is ready, otherwise ``(None, delay)``
+            until the oldest waiting image reaches ``max_wait``.
+        """
+        now = time.monotonic()
+        earliest_deadline = None
+        oldest_key = None
+
+        for key, items in list(self._groups.items()):
+            # Drop images whose caller has gone away
+            while items and items[0].future.done():
+                items.popleft()
+            if not items:
+                del self._groups[key]
+                continue
+            if len(items) >= self._batch_limit(key):
+                return key, 0.0
+            deadline = items[0].enqueued_at + self.max_wait
+            if earliest_deadline is None or deadline < earliest_deadline:
+                earliest_deadline = deadline
+                oldest_key = key
+
+        if oldest_key is None:
+            return None, -1.0
+        if earliest_deadline <= now:
+            return oldest_key, 0.0
+        return None, earliest_deadline - now
+
+    async def _dispatch_loop(self) -> None:
+        """Dispatcher: wait for a ready group, run it, repeat."""
+        while True:
+            key, delay = self._next_ready_group()
+            if key is None:
+                self._wakeup.clear()
+                try:
+                    if delay < 0:
+                        await self._wakeup.wait()
+                    else:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Wait for a free slot before taking, so the group keeps filling meanwhile
+            await self._slots.acquire()
+            items = self._take(key)
+            if not items:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run_batch(key, items))
+            self._running.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task) -> None:
+        """Free the dispatch slot of a finished batch."""
+        self._running.discard(task)
+        self._slots.release()
+
+    def _take(self, key: BatchKey) -> List[_PendingImage]:
+        """Pop up to one batch of live images from a group."""
+        group = self._groups.get(key)
+        limit = self._batch_limit(key)
+        items: List[_PendingImage] = []
+        while group and len(items) < limit:
+            item = group.popleft()
+            if not item.future.done():
+                items.append(item)
+        if group is not None and not group:
+            del self._groups[key]
+        return items
+
+    async def _run_batch(self, key: BatchKey, items: List[_PendingImage]) -> None:
+        """Run one batched pipeline call and route results to each caller."""
+        model_id, negative_prompt, num_inference_steps, guidance_scale, width, height, scheduler = key
+        callbacks = {item.on_step for item in items if item.on_step is not None}
+
+        def progress_callback(images_done: int, step: int, total_steps: int) -> None:
+            for on_step in callbacks:
+                on_step(step, total_steps)
+
+        def run_batch():
+            # Runs on the worker thread, which also owns (lazy) model loading
+            return self.registry.get(model_id).generate_batch(
+                prompts=[item.prompt for item in items],
+                seeds=[item.seed for item in items],
+                negative_prompt=negative_prompt,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                width=width,
+                height=height,
+                scheduler=scheduler,
+                progress_callback=progress_callback if callbacks else None
+            )
+
+        try:
+            if self.pool is not None:
+                images, metadata = await self.pool.generate_batch(
+                    model_id,
+                    prompts=[item.prompt for item in items],
+                    seeds=[item.seed for item in items],
+                    negative_prompt=negative_prompt,
+                    num_inference_steps=num_inference_steps,
+                    guidance_scale=guidance_scale,
+                    width=width,
+                    height=height,
+                    scheduler=scheduler,
+                    progress_callback=progress_callback if callbacks else None
+                )
+            else:
+                images, metadata = await self.worker.submit(run_batch)
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.images_run += len(items)
+        logger.info(
+            f"Dispatched batch of {len(items)} image(s) from "
+            f"{len(callbacks) or 1} caller(s)"
+        )
+
+        for item, image, image_metadata in zip(items, images, metadata):
+            if not item.future.done():
+                item.future.set_result((image, image_metadata))
@@ -5,7 +5,7 @@ and their associated metadata.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
@@ -20,10 +20,21 @@ class GeneratedImage(Base):
     """
     
     __tablename__ = "generated_images"
+    __table_args__ = (
+        # One row per image position; also serves listing a dataset in order
+        UniqueConstraint("generation_id", "image_index", name="uq_generated_images_generation_id_image_index"),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
     
+    # Parent dataset
+    generation_id = Column(
+        String(36), ForeignKey("generations.id", ondelete="CASCADE"), nullable=True,
+        comment="Generation the image belongs to"
+    )
+    image_index = Column(Integer, nullable=True, comment="Position of the image in its generation")
+    
     # Generation parameters
     prompt = Column(Text, nullable=False, comment="Text prompt used for generation")
     negative_prompt = Column(Text, nullable=True, comment="Negative prompt to avoid unwanted features")
@@ -66,6 +77,8 @@ class GeneratedImage(Base):
         """
         return {
             "id": self.id,
+            "generation_id": self.generation_id,
+            "image_index": self.image_index,
             "prompt": self.prompt,
             "negative_prompt": self.negative_prompt,
             "model_id": self.model_id,
@@ -4,12 +4,24 @@ This module defines the database schema for tracking synthetic data generations
 and their associated metadata.
 """
 
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 
 from config.database import Base
 
+# Job lifecycle states stored in ``Generation.status``
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+PENDING_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+def _utcnow() -> datetime:
+    """Current UTC time, with microseconds."""
+    return datetime.now(timezone.utc)
+
 
 class Generation(Base):
     """Database model for storing generation metadata.
@@ -19,6 +31,12 @@ class Generation(Base):
     """
     
     __tablename__ = "generations"
+    __table_args__ = (
+        # Keyset pagination of /datasets: newest first, optionally filtered
+        Index("ix_generations_created_at_id", "created_at", "id"),
+        Index("ix_generations_class_label_created_at_id", "class_label", "created_at", "id"),
+        Index("ix_generations_status_created_at_id", "status", "created_at", "id"),
+    )
     
     # Primary key
     id = Column(String(36), primary_key=True, index=True)
@@ -27,10 +45,15 @@ class Generation(Base):
     class_label = Column(String(255), nullable=False, comment="Class label for the synthetic data")
     noise_level = Column(Float, nullable=False, comment="Noise level applied during generation")
     output_size = Column(Integer, nullable=False, comment="Number of images generated")
+    seed = Column(Integer, nullable=True, comment="Base seed; image i uses seed + i")
+    model_id = Column(String(255), nullable=True, comment="HuggingFace model identifier")
+    speed_profile = Column(String(20), nullable=True, comment="Speed profile (quality/balanced/turbo)")
     
     # File information
     output_directory = Column(String(500), nullable=False, comment="Directory containing generated files")
     file_count = Column(Integer, nullable=False, default=0, comment="Number of files generated")
+    archive_sha256 = Column(String(64), nullable=True, comment="SHA-256 of the cached dataset archive")
+    archive_fingerprint = Column(String(64), nullable=True, comment="Fingerprint of the files the archive was built from")
     
     # Generation metadata
     generation_time = Column(Float, nullable=False, comment="Time taken to generate dataset in seconds")
@@ -40,8 +63,16 @@ class Generation(Base):
     is_successful = Column(Boolean, default=True, nullable=False, comment="Whether generation was successful")
     error_message = Column(Text, nullable=True, comment="Error message if generation failed")
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Job tracking
+    status = Column(String(20), nullable=False, default=STATUS_COMPLETED, index=True, comment="Job status (queued/running/completed/failed)")
+    images_done = Column(Integer, nullable=False, default=0, comment="Images finished so far")
+    started_at = Column(DateTime(timezone=True), nullable=True, comment="When the job started running")
+    completed_at = Column(DateTime(timezone=True), nullable=True, comment="When the job finished or failed")
+    
+    # Timestamps. created_at is set here rather than by the server default so
+    # every row has microseconds: SQLite compares these values as text, and
+    # keyset pagination breaks on a mix of "12:00:00" and "12:00:00.000000".
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     def __repr__(self) -> str:
@@ -59,12 +90,20 @@ class Generation(Base):
             "class_label": self.class_label,
             "noise_level": self.noise_level,
             "output_size": self.output_size,
+            "seed": self.seed,
+            "model_id": self.model_id,
+            "speed_profile": self.speed_profile,
             "output_directory": self.output_directory,
             "file_count": self.file_count,
             "generation_time": self.generation_time,
             "device_used": self.device_used,
             "is_successful": self.is_successful,
             "error_message": self.error_message,
+            "archive_sha256": self.archive_sha256,
+            "status": self.status,
+            "images_done": self.images_done,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
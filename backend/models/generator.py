@@ -6,12 +6,24 @@ Diffusers to generate high-fidelity synthetic images.
 
 import os
 import logging
-from typing import Optional, Dict, Any
+import random
+from contextlib import nullcontext
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable
 from datetime import datetime
 import torch
-from diffusers import StableDiffusionPipeline
+from diffusers import (
+    DiffusionPipeline,
+    DPMSolverMultistepScheduler,
+    EulerAncestralDiscreteScheduler,
+    EulerDiscreteScheduler,
+    LCMScheduler,
+)
 from PIL import Image
 
+from schemas.generation import MAX_SEED
+from .prompt_cache import PromptEmbeddingCache
+from .speed_profiles import resolve_speed_profile
+
 # Set Hugging Face cache directory to D: drive
 os.environ["HF_HOME"] = r"D:\Academics\.cache\huggingface"
 os.environ["HUGGINGFACE_HUB_CACHE"] = r"D:\Academics\.cache\huggingface\hub"
@@ -21,6 +33,58 @@ os.environ["HF_DATASETS_CACHE"] = r"D:\Academics\.cache\huggingface\datasets"
 
 logger = logging.getLogger(__name__)
 
+# Rough activation memory needed per 512x512 image during denoising (with
+# classifier-free guidance). Used to size micro-batches from free memory.
+_BYTES_PER_IMAGE_FP16 = 768 * 1024 ** 2
+_BYTES_PER_IMAGE_FP32 = 1536 * 1024 ** 2
+_MEMORY_HEADROOM = 0.8
+
+# Pipeline keyword arguments matching the tuple returned by ``encode_prompt``
+# (SD returns the first two, SDXL all four)
+_EMBEDDING_KWARGS = (
+    "prompt_embeds",
+    "negative_prompt_embeds",
+    "pooled_prompt_embeds",
+    "negative_pooled_prompt_embeds",
+)
+
+# Weight dtypes accepted for the CPU backend
+_CPU_DTYPES = {"float32": torch.float32, "bfloat16": torch.bfloat16}
+
+# Schedulers selectable per call; "default" keeps the model's own scheduler
+_SCHEDULERS = {
+    "dpmpp": (DPMSolverMultistepScheduler, {"algorithm_type": "dpmsolver++", "use_karras_sigmas": True}),
+    "euler": (EulerDiscreteScheduler, {}),
+    "euler_a": (EulerAncestralDiscreteScheduler, {}),
+    "lcm": (LCMScheduler, {}),
+}
+
+
+def resolve_numerics(
+    device: Optional[str] = None,
+    cpu_dtype: str = "float32",
+    quantize_int8: bool = False
+) -> Tuple[str, "torch.dtype", bool]:
+    """Resolve the device, weight dtype and int8 quantization a generator runs with.
+    
+    Args:
+        device: Requested device, or None to auto-detect.
+        cpu_dtype: Weight dtype on CPU, ``float32`` or ``bfloat16``.
+        quantize_int8: Whether int8 quantization was requested.
+        
+    Returns:
+        Device, weight dtype and whether int8 quantization applies.
+        
+    Raises:
+        ValueError: If ``cpu_dtype`` is not supported.
+    """
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    if cpu_dtype not in _CPU_DTYPES:
+        raise ValueError(f"Unsupported cpu_dtype '{cpu_dtype}'. Choose one of: {', '.join(_CPU_DTYPES)}")
+    dtype = torch.float16 if device == "cuda" else _CPU_DTYPES[cpu_dtype]
+    return device, dtype, quantize_int8 and device == "cpu"
+
 
 class SyntheticDataGenerator:
     """Generator class for creating synthetic images using diffusion models.
@@ -33,7 +97,15 @@ class SyntheticDataGenerator:
         self,
         model_id: str = "runwayml/stable-diffusion-v1-5",
         device: Optional[str] = None,
-        hf_token: Optional[str] = None
+        hf_token: Optional[str] = None,
+        max_batch_size: int = 8,
+        prompt_cache: Optional[PromptEmbeddingCache] = None,
+        components: Optional[Dict[str, Any]] = None,
+        cpu_threads: int = 0,
+        cpu_interop_threads: int = 0,
+        cpu_dtype: str = "float32",
+        quantize_int8: bool = False,
+        compile_unet: bool = False
     ) -> None:
         """Initialize the synthetic data generator.
         
@@ -41,19 +113,38 @@ class SyntheticDataGenerator:
             model_id: HuggingFace model identifier for the diffusion model.
             device: Device to run the model on ('cuda' or 'cpu'). Auto-detects if None.
             hf_token: HuggingFace authentication token for accessing private models.
+            max_batch_size: Upper bound on images denoised in one pipeline call.
+            prompt_cache: Cache of text-encoder outputs. A private cache is
+                created if None; pass one in to share it between generators.
+            components: Already-loaded pipeline components (e.g. ``vae``) to
+                reuse instead of loading this model's own copies.
+            cpu_threads: Intra-op thread count on CPU. 0 keeps torch's default.
+            cpu_interop_threads: Inter-op thread count on CPU. 0 keeps torch's
+                default.
+            cpu_dtype: Weight dtype on CPU, ``float32`` or ``bfloat16``.
+            quantize_int8: Apply dynamic int8 quantization to the UNet and
+                text encoder linear layers on CPU (float32 weights only).
+            compile_unet: Wrap the UNet in ``torch.compile`` when available.
+
+        Raises:
+            ValueError: If ``cpu_dtype`` is not supported.
         """
         self.model_id = model_id
         self.hf_token = hf_token or os.getenv("HF_TOKEN")
+        self.max_batch_size = max(1, max_batch_size)
+        self.prompt_cache = prompt_cache if prompt_cache is not None else PromptEmbeddingCache()
         
-        # Auto-detect device if not specified
-        if device is None:
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        else:
-            self.device = device
+        # Auto-detects the device if not specified
+        self.device, self.dtype, self.quantize_int8 = resolve_numerics(device, cpu_dtype, quantize_int8)
+        self.compile_unet = compile_unet
+        if self.device == "cpu":
+            self._configure_cpu_threads(cpu_threads, cpu_interop_threads)
             
-        logger.info(f"Initializing generator with model {model_id} on {self.device}")
+        logger.info(f"Initializing generator with model {model_id} on {self.device} ({self.dtype})")
         
-        self.pipeline: Optional[StableDiffusionPipeline] = None
+        self.components = components or {}
+        self.pipeline: Optional[DiffusionPipeline] = None
+        self._schedulers: Dict[str, Any] = {}
         self._load_model()
     
     def _load_model(self) -> None:
@@ -65,25 +156,37 @@ class SyntheticDataGenerator:
         try:
             logger.info(f"Loading model {self.model_id}...")
             
-            # Load the pipeline with authentication if token is provided
+            if self.components:
+                logger.info(f"Reusing shared components: {', '.join(sorted(self.components))}")
+            
+            # Load the pipeline with authentication if token is provided.
+            # DiffusionPipeline resolves the concrete class (SD, SDXL, ...) from the model.
             if self.hf_token:
-                self.pipeline = StableDiffusionPipeline.from_pretrained(
+                self.pipeline = DiffusionPipeline.from_pretrained(
                     self.model_id,
-                    torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                    use_auth_token=self.hf_token
+                    torch_dtype=self.dtype,
+                    use_auth_token=self.hf_token,
+                    **self.components
                 )
             else:
-                self.pipeline = StableDiffusionPipeline.from_pretrained(
+                self.pipeline = DiffusionPipeline.from_pretrained(
                     self.model_id,
-                    torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
+                    torch_dtype=self.dtype,
+                    **self.components
                 )
             
             # Move model to specified device
             self.pipeline = self.pipeline.to(self.device)
+            self._schedulers = {"default": self.pipeline.scheduler}
             
             # Enable memory efficient attention if using CUDA
             if self.device == "cuda":
                 self.pipeline.enable_attention_slicing()
+            else:
+                self._optimize_for_cpu()
+            
+            if self.compile_unet and hasattr(torch, "compile"):
+                self.pipeline.unet = torch.compile(self.pipeline.unet)
                 
             logger.info("Model loaded successfully")
             
@@ -96,22 +199,31 @@ class SyntheticDataGenerator:
         self,
         prompt: str,
         negative_prompt: Optional[str] = None,
-        num_inference_steps: int = 50,
-        guidance_scale: float = 7.5,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
         width: int = 512,
         height: int = 512,
-        seed: Optional[int] = None
+        seed: Optional[int] = None,
+        scheduler: Optional[str] = None,
+        speed_profile: Optional[str] = None
     ) -> tuple[Image.Image, Dict[str, Any]]:
         """Generate a synthetic image from a text prompt.
         
         Args:
             prompt: Text description of the desired image.
             negative_prompt: Text description of what to avoid in the image.
-            num_inference_steps: Number of denoising steps.
-            guidance_scale: How closely to follow the prompt (higher = more strict).
+            num_inference_steps: Number of denoising steps. 50, or the speed
+                profile's, if None.
+            guidance_scale: How closely to follow the prompt (higher = more
+                strict). 7.5, or the speed profile's, if None.
             width: Width of the generated image.
             height: Height of the generated image.
             seed: Random seed for reproducible generation.
+            scheduler: Scheduler name (``default``, ``dpmpp``, ``euler``,
+                ``euler_a`` or ``lcm``). The model's own scheduler if None.
+            speed_profile: ``quality``, ``balanced`` or ``turbo``. Picks the
+                scheduler, step count and guidance scale not given explicitly,
+                with values suited to this model.
             
         Returns:
             A tuple containing:
@@ -121,57 +233,355 @@ class SyntheticDataGenerator:
         Raises:
             RuntimeError: If generation fails or model is not loaded.
         """
+        images, metadata = self.generate_batch(
+            prompts=[prompt],
+            seeds=[seed] if seed is not None else None,
+            negative_prompt=negative_prompt,
+            num_inference_steps=num_inference_steps,
+            guidance_scale=guidance_scale,
+            width=width,
+            height=height,
+            scheduler=scheduler,
+            speed_profile=speed_profile
+        )
+        return images[0], metadata[0]
+    
+    def generate_batch(
+        self,
+        prompts: Union[str, List[str]],
+        seeds: Optional[List[Optional[int]]] = None,
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
+        width: int = 512,
+        height: int = 512,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        scheduler: Optional[str] = None,
+        speed_profile: Optional[str] = None
+    ) -> tuple[List[Image.Image], List[Dict[str, Any]]]:
+        """Generate several synthetic images in as few pipeline calls as possible.
+        
+        Images are denoised together in micro-batches, so text encoding,
+        scheduler setup and UNet launches are shared across each batch.
+        
+        Args:
+            prompts: A list of prompts, or a single prompt repeated once per seed.
+            seeds: Per-image random seeds. Missing seeds are drawn at random so
+                every image stays reproducible from its metadata.
+            negative_prompt: Text description of what to avoid in the images.
+            num_inference_steps: Number of denoising steps. 50, or the speed
+                profile's, if None.
+            guidance_scale: How closely to follow the prompt (higher = more
+                strict). 7.5, or the speed profile's, if None.
+            width: Width of the generated images.
+            height: Height of the generated images.
+            batch_size: Micro-batch size. Derived from free memory if None.
+            progress_callback: Called as ``(images_done, step, total_steps)``
+                after every denoising step and after every finished batch.
+            scheduler: Scheduler name (``default``, ``dpmpp``, ``euler``,
+                ``euler_a`` or ``lcm``). The model's own scheduler if None.
+            speed_profile: ``quality``, ``balanced`` or ``turbo``. Picks the
+                scheduler, step count and guidance scale not given explicitly,
+                with values suited to this model.
+            
+        Returns:
+            A tuple containing:
+                - The generated PIL Images, in input order
+                - One metadata dictionary per image
+                
+        Raises:
+            ValueError: If prompts and seeds have mismatched lengths, or the
+                scheduler or speed profile is unknown.
+            RuntimeError: If generation fails or model is not loaded.
+        """
         if self.pipeline is None:
             raise RuntimeError("Model not loaded. Call _load_model() first.")
         
+        if speed_profile is not None:
+            profile = resolve_speed_profile(
+                self.model_id, speed_profile, scheduler=scheduler,
+                num_inference_steps=num_inference_steps, guidance_scale=guidance_scale
+            )
+            scheduler = profile["scheduler"]
+            num_inference_steps = profile["num_inference_steps"]
+            guidance_scale = profile["guidance_scale"]
+        if num_inference_steps is None:
+            num_inference_steps = 50
+        if guidance_scale is None:
+            guidance_scale = 7.5
+        self._use_scheduler(scheduler or "default")
+        scheduler_name = type(self.pipeline.scheduler).__name__
+        
+        if isinstance(prompts, str):
+            prompts = [prompts] * (len(seeds) if seeds else 1)
+        if seeds is None:
+            seeds = [None] * len(prompts)
+        if len(seeds) != len(prompts):
+            raise ValueError("prompts and seeds must have the same length")
+        seeds = [seed if seed is not None else random.randint(0, MAX_SEED) for seed in seeds]
+        
+        if batch_size is None:
+            batch_size = self.auto_batch_size(width, height)
+        batch_size = max(1, batch_size)
+        
+        images: List[Image.Image] = []
+        metadata: List[Dict[str, Any]] = []
+        
         try:
-            logger.info(f"Generating image with prompt: '{prompt[:50]}...'")
+            for offset in range(0, len(prompts), batch_size):
+                batch_prompts = prompts[offset:offset + batch_size]
+                batch_seeds = seeds[offset:offset + batch_size]
+                
+                logger.info(
+                    f"Generating batch of {len(batch_prompts)} images "
+                    f"with prompt: '{batch_prompts[0][:50]}...'"
+                )
+                
+                # One generator per image keeps results independent of batching
+                generators = [
+                    torch.Generator(device=self.device).manual_seed(seed)
+                    for seed in batch_seeds
+                ]
+                
+                step_callback = None
+                if progress_callback is not None:
+                    step_callback = self._make_step_callback(
+                        progress_callback, len(images), num_inference_steps
+                    )
+                
+                start_time = datetime.now()
+                
+                # CPU runs in the dtype the weights were loaded in; autocast there
+                # would only add casts (or silently switch fp32 weights to bf16)
+                autocast = torch.autocast("cuda") if self.device == "cuda" else nullcontext()
+                with autocast:
+                    prompt_kwargs = self._prompt_kwargs(batch_prompts, negative_prompt)
+                    result = self.pipeline(
+                        **prompt_kwargs,
+                        num_inference_steps=num_inference_steps,
+                        guidance_scale=guidance_scale,
+                        width=width,
+                        height=height,
+                        generator=generators,
+                        callback_on_step_end=step_callback
+                    )
+                
+                end_time = datetime.now()
+                batch_time = (end_time - start_time).total_seconds()
+                
+                for prompt, seed in zip(batch_prompts, batch_seeds):
+                    metadata.append({
+                        "prompt": prompt,
+                        "negative_prompt": negative_prompt,
+                        "num_inference_steps": num_inference_steps,
+                        "guidance_scale": guidance_scale,
+                        "scheduler": scheduler_name,
+                        "width": width,
+                        "height": height,
+                        "seed": seed,
+                        "model_id": self.model_id,
+                        "device": self.device,
+                        "generation_time": batch_time / len(batch_prompts),
+                        "batch_size": len(batch_prompts),
+                        "timestamp": end_time.isoformat()
+                    })
+                images.extend(result.images)
+                
+                if progress_callback is not None:
+                    progress_callback(len(images), num_inference_steps, num_inference_steps)
+                
+                logger.info(f"Batch of {len(batch_prompts)} images generated in {batch_time:.2f}s")
             
-            # Set random seed if provided
-            generator = None
-            if seed is not None:
-                generator = torch.Generator(device=self.device).manual_seed(seed)
+            return images, metadata
             
-            # Generate the image
-            start_time = datetime.now()
+        except Exception as e:
+            error_msg = f"Failed to generate images: {str(e)}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg) from e
+    
+    @staticmethod
+    def _configure_cpu_threads(intra_op: int, inter_op: int) -> None:
+        """Set torch's CPU thread pools. Thread counts are process-wide.
+        
+        Args:
+            intra_op: Threads used inside one operator (e.g. a convolution).
+            inter_op: Threads used to run independent operators in parallel.
+        """
+        if intra_op > 0:
+            torch.set_num_threads(intra_op)
+        if inter_op > 0 and torch.get_num_interop_threads() != inter_op:
+            try:
+                torch.set_num_interop_threads(inter_op)
+            except RuntimeError as e:
+                # Only settable before the first parallel operation in the process
+                logger.warning(f"Could not set inter-op threads to {inter_op}: {e}")
+        logger.info(
+            f"CPU threads: intra-op={torch.get_num_threads()}, "
+            f"inter-op={torch.get_num_interop_threads()}"
+        )
+    
+    def _optimize_for_cpu(self) -> None:
+        """Apply CPU-specific optimizations to the loaded pipeline.
+        
+        Convolution-heavy modules (UNet, VAE) switch to channels-last memory
+        format, which oneDNN kernels run faster. With ``quantize_int8``, the
+        linear layers of this model's own UNet and text encoder are dynamically
+        quantized; shared components are left to the model that loaded them.
+        """
+        for name in ("unet", "vae"):
+            module = getattr(self.pipeline, name, None)
+            if module is not None and name not in self.components:
+                module.to(memory_format=torch.channels_last)
+        
+        if not self.quantize_int8:
+            return
+        if self.dtype != torch.float32:
+            logger.warning("int8 quantization requires float32 weights; skipping")
+            return
+        
+        for name in ("unet", "text_encoder", "text_encoder_2"):
+            module = getattr(self.pipeline, name, None)
+            if module is None or name in self.components:
+                continue
+            quantized = torch.ao.quantization.quantize_dynamic(
+                module, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            setattr(self.pipeline, name, quantized)
+            logger.info(f"Quantized {name} linear layers to int8")
+    
+    def _use_scheduler(self, name: str) -> None:
+        """Switch the pipeline to a named scheduler.
+        
+        Scheduler instances are built once from the model's original
+        scheduler config and reused on later switches.
+        
+        Args:
+            name: ``default`` or a key of ``_SCHEDULERS``.
             
-            with torch.autocast(self.device):
-                result = self.pipeline(
-                    prompt=prompt,
-                    negative_prompt=negative_prompt,
-                    num_inference_steps=num_inference_steps,
-                    guidance_scale=guidance_scale,
-                    width=width,
-                    height=height,
-                    generator=generator
+        Raises:
+            ValueError: If the scheduler name is unknown.
+        """
+        scheduler = self._schedulers.get(name)
+        if scheduler is None:
+            if name not in _SCHEDULERS:
+                raise ValueError(
+                    f"Unknown scheduler '{name}'. Choose one of: default, {', '.join(_SCHEDULERS)}"
                 )
+            scheduler_class, options = _SCHEDULERS[name]
+            scheduler = scheduler_class.from_config(self._schedulers["default"].config, **options)
+            self._schedulers[name] = scheduler
+        self.pipeline.scheduler = scheduler
+    
+    def _prompt_kwargs(self, prompts: List[str], negative_prompt: Optional[str]) -> Dict[str, Any]:
+        """Build prompt arguments for a pipeline call, reusing cached embeddings.
+        
+        Embeddings are looked up per prompt in the prompt cache and encoded
+        only on a miss, always including the negative/unconditional branch so
+        one entry serves any guidance scale.
+        
+        Args:
+            prompts: Prompts in the batch.
+            negative_prompt: Shared negative prompt, if any.
             
-            end_time = datetime.now()
-            generation_time = (end_time - start_time).total_seconds()
-            
-            # Prepare metadata
-            metadata = {
-                "prompt": prompt,
-                "negative_prompt": negative_prompt,
-                "num_inference_steps": num_inference_steps,
-                "guidance_scale": guidance_scale,
-                "width": width,
-                "height": height,
-                "seed": seed,
-                "model_id": self.model_id,
-                "device": self.device,
-                "generation_time": generation_time,
-                "timestamp": end_time.isoformat()
+        Returns:
+            Keyword arguments (``prompt_embeds`` etc., or raw prompts if the
+            pipeline cannot encode separately).
+        """
+        if not hasattr(self.pipeline, "encode_prompt"):
+            return {
+                "prompt": prompts,
+                "negative_prompt": [negative_prompt] * len(prompts) if negative_prompt else None,
             }
+        
+        per_prompt = []
+        with torch.no_grad():
+            for prompt in prompts:
+                key = (self.model_id, prompt, negative_prompt)
+                embeddings = self.prompt_cache.get(key)
+                if embeddings is None:
+                    embeddings = tuple(self.pipeline.encode_prompt(
+                        prompt=prompt,
+                        device=self.device,
+                        num_images_per_prompt=1,
+                        do_classifier_free_guidance=True,
+                        negative_prompt=negative_prompt
+                    ))
+                    self.prompt_cache.put(key, embeddings)
+                per_prompt.append(embeddings)
+        
+        return {
+            name: torch.cat([embeddings[index] for embeddings in per_prompt])
+            for index, name in enumerate(_EMBEDDING_KWARGS[:len(per_prompt[0])])
+        }
+    
+    @staticmethod
+    def _make_step_callback(
+        progress_callback: Callable[[int, int, int], None],
+        images_done: int,
+        total_steps: int
+    ) -> Callable[..., Dict[str, Any]]:
+        """Adapt a progress callback to the diffusers ``callback_on_step_end`` hook."""
+        def step_callback(pipeline, step, timestep, callback_kwargs):
+            progress_callback(images_done, step + 1, total_steps)
+            return callback_kwargs
+        return step_callback
+    
+    def auto_batch_size(self, width: int = 512, height: int = 512) -> int:
+        """Pick a micro-batch size that fits in the currently free memory.
+        
+        Args:
+            width: Width of the images to generate.
+            height: Height of the images to generate.
             
-            logger.info(f"Image generated successfully in {generation_time:.2f}s")
-            
-            return result.images[0], metadata
-            
-        except Exception as e:
-            error_msg = f"Failed to generate image: {str(e)}"
-            logger.error(error_msg)
-            raise RuntimeError(error_msg) from e
+        Returns:
+            Number of images to denoise per pipeline call, between 1 and
+            ``max_batch_size``.
+        """
+        pixel_scale = (width * height) / (512 * 512)
+        
+        try:
+            if self.device == "cuda":
+                free_bytes, _ = torch.cuda.mem_get_info()
+                per_image = _BYTES_PER_IMAGE_FP16 * pixel_scale
+            else:
+                free_bytes = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+                per_image = (
+                    _BYTES_PER_IMAGE_FP32 if self.dtype == torch.float32 else _BYTES_PER_IMAGE_FP16
+                ) * pixel_scale
+        except (AttributeError, ValueError, OSError, RuntimeError):
+            # Memory introspection is unavailable (e.g. Windows CPU); stay conservative
+            return min(self.max_batch_size, 2)
+        
+        fits = int(free_bytes * _MEMORY_HEADROOM // per_image)
+        return max(1, min(self.max_batch_size, fits))
+    
+    def component_memory(self) -> Dict[int, int]:
+        """Parameter memory of each pipeline component, keyed by object id.
+        
+        Keying by id lets callers count components shared between several
+        pipelines only once.
+        
+        Returns:
+            Mapping of ``id(component)`` to its parameter size in bytes.
+        """
+        if self.pipeline is None:
+            return {}
+        sizes = {}
+        for component in self.pipeline.components.values():
+            if hasattr(component, "parameters"):
+                sizes[id(component)] = sum(
+                    param.numel() * param.element_size() for param in component.parameters()
+                )
+        return sizes
+    
+    def release(self) -> None:
+        """Drop the pipeline so its memory can be reclaimed."""
+        self.pipeline = None
+        self.components = {}
+        self._schedulers = {}
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
     
     def is_ready(self) -> bool:
         """Check if the generator is ready to generate images.
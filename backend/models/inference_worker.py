@@ -0,0 +1,76 @@
+"""Dedicated inference executor for blocking diffusion work.
+
+Diffusion calls are synchronous and can run for minutes. Running them inline
+inside ``async def`` handlers freezes the event loop, so every pipeline call
+is funnelled through a single worker thread instead. FastAPI handlers await
+the result while the HTTP layer keeps serving other requests.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class InferenceWorker:
+    """Single-threaded executor that owns all access to the diffusion pipeline.
+
+    Diffusers pipelines are not safe to call concurrently, so work is
+    serialized on one thread. Submitted calls run in FIFO order.
+    """
+
+    def __init__(self, name: str = "inference-worker") -> None:
+        """Initialize the worker thread.
+
+        Args:
+            name: Thread name prefix, visible in logs and debuggers.
+        """
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted calls that have not finished yet."""
+        return self._pending
+
+    async def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on the worker thread and await its result.
+
+        Args:
+            fn: Blocking callable to execute, typically a generator method.
+            *args: Positional arguments for ``fn``.
+            **kwargs: Keyword arguments for ``fn``.
+
+        Returns:
+            Whatever ``fn`` returns.
+
+        Raises:
+            Any exception raised by ``fn`` is propagated to the awaiting caller.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending += 1
+        try:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and optionally wait for running calls to finish.
+
+        Args:
+            wait: Block until the in-flight call has completed.
+        """
+        logger.info(f"Shutting down {self.name}")
+        self._executor.shutdown(wait=wait, cancel_futures=True)
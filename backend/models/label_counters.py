@@ -0,0 +1,116 @@
+"""SQLAlchemy model for per-label generation counters.
+
+Statistics used to be recomputed from the whole ``generations`` table on
+every request. The counters here are updated in the same transaction as the
+``Generation`` change they count, so ``/stats`` reads a table with one row
+per class label instead.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, case, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.database import Base
+from .generation_db import Generation, STATUS_COMPLETED, STATUS_FAILED
+
+COUNTER_COLUMNS = ("generations", "successful_generations", "failed_generations", "total_images")
+
+
+class LabelCounter(Base):
+    """Running totals of generations and images for one class label."""
+
+    __tablename__ = "label_counters"
+
+    class_label = Column(String(255), primary_key=True, comment="Class label")
+    generations = Column(Integer, nullable=False, default=0, comment="Generations submitted")
+    successful_generations = Column(Integer, nullable=False, default=0, index=True, comment="Generations completed successfully")
+    failed_generations = Column(Integer, nullable=False, default=0, comment="Generations that failed")
+    total_images = Column(Integer, nullable=False, default=0, comment="Images in successful generations")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        """String representation of the LabelCounter instance."""
+        return f"<LabelCounter(class_label='{self.class_label}', generations={self.generations})>"
+
+
+async def increment_label_counters(db: AsyncSession, class_label: str, **increments: int) -> None:
+    """Add to a label's counters within the caller's transaction.
+
+    Uses a single atomic upsert on PostgreSQL and SQLite, so concurrent
+    requests for a new label cannot conflict. The caller commits.
+
+    Args:
+        db: Session whose transaction also holds the counted change
+        class_label: Label to count under
+        **increments: Amounts to add, keyed by counter column name
+
+    Raises:
+        ValueError: If an increment names an unknown counter
+    """
+    unknown = set(increments) - set(COUNTER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown label counters: {', '.join(sorted(unknown))}")
+    values = {column: increments.get(column, 0) for column in COUNTER_COLUMNS}
+
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        table = LabelCounter.__table__
+        statement = insert(table).values(class_label=class_label, **values)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.class_label],
+            set_={
+                **{column: table.c[column] + statement.excluded[column] for column in COUNTER_COLUMNS},
+                "updated_at": func.now(),
+            }
+        ))
+        return
+
+    counter = (await db.execute(
+        select(LabelCounter).where(LabelCounter.class_label == class_label).with_for_update()
+    )).scalar_one_or_none()
+    if counter is None:
+        db.add(LabelCounter(class_label=class_label, **values))
+        await db.flush()
+    else:
+        for column, amount in values.items():
+            setattr(counter, column, getattr(counter, column) + amount)
+
+
+async def rebuild_label_counters(db: AsyncSession) -> int:
+    """Recompute all label counters from ``generations`` in one aggregate query.
+
+    Used to backfill the table for databases that predate it. The caller
+    commits.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of labels counted
+    """
+    succeeded = (Generation.status == STATUS_COMPLETED) & Generation.is_successful.is_(True)
+    rows = (await db.execute(
+        select(
+            Generation.class_label,
+            func.count(),
+            func.sum(case((succeeded, 1), else_=0)),
+            func.sum(case((Generation.status == STATUS_FAILED, 1), else_=0)),
+            func.sum(case((succeeded, Generation.file_count), else_=0)),
+        ).group_by(Generation.class_label)
+    )).all()
+
+    await db.execute(delete(LabelCounter))
+    db.add_all(
+        LabelCounter(
+            class_label=label,
+            generations=generations,
+            successful_generations=successful or 0,
+            failed_generations=failed or 0,
+            total_images=images or 0
+        )
+        for label, generations, successful, failed, images in rows
+    )
+    return len(rows)
@@ -0,0 +1,147 @@
+"""Lazy, on-demand handle for the diffusion generator.
+
+Building ``SyntheticDataGenerator`` downloads and loads a full Stable
+Diffusion pipeline, which used to happen at import time and delayed even
+``/health``. This handle defers construction (and the torch/diffusers
+imports) until the first generation or a background startup task, and
+reports loading state for readiness probes.
+"""
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from .generator import SyntheticDataGenerator
+
+logger = logging.getLogger(__name__)
+
+# Loading states reported by ``LazyGenerator.state``
+STATE_IDLE = "idle"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class LazyGenerator:
+    """Build a ``SyntheticDataGenerator`` the first time it is needed.
+
+    Loading happens at most once at a time; concurrent callers wait for the
+    same load. A failed load is retried on the next call to ``get``.
+    """
+
+    def __init__(self, model_id: str, **generator_kwargs: Any) -> None:
+        """Initialize the handle without loading anything.
+
+        Args:
+            model_id: HuggingFace model identifier for the diffusion model.
+            **generator_kwargs: Extra ``SyntheticDataGenerator`` arguments.
+        """
+        self.model_id = model_id
+        self.generator_kwargs = generator_kwargs
+        self.state = STATE_IDLE
+        self.error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self._generator: Optional["SyntheticDataGenerator"] = None
+        self._lock = threading.Lock()
+
+    def get(self, **load_kwargs: Any) -> "SyntheticDataGenerator":
+        """Return the generator, loading the model first if needed.
+
+        Blocks while the model loads, so call it from the inference worker.
+
+        Args:
+            **load_kwargs: Extra ``SyntheticDataGenerator`` arguments used only
+                if this call performs the load (e.g. shared ``components``).
+
+        Returns:
+            The loaded generator.
+
+        Raises:
+            RuntimeError: If the model fails to load.
+        """
+        generator = self._generator
+        if generator is not None:
+            return generator
+
+        with self._lock:
+            if self._generator is not None:
+                return self._generator
+
+            # Deferred so importing this module does not pull in torch/diffusers
+            from .generator import SyntheticDataGenerator
+
+            self.state = STATE_LOADING
+            self.error = None
+            start_time = time.time()
+            try:
+                self._generator = SyntheticDataGenerator(
+                    model_id=self.model_id, **{**self.generator_kwargs, **load_kwargs}
+                )
+            except Exception as e:
+                self.state = STATE_FAILED
+                self.error = str(e)
+                raise RuntimeError(f"Generator failed to load: {e}") from e
+
+            self.load_time = time.time() - start_time
+            self.state = STATE_READY
+            logger.info(f"Generator for {self.model_id} ready in {self.load_time:.1f}s")
+            return self._generator
+
+    def peek(self) -> Optional["SyntheticDataGenerator"]:
+        """Return the generator if already loaded, without triggering a load."""
+        return self._generator
+
+    def unload(self) -> None:
+        """Release the loaded pipeline so its memory can be reclaimed."""
+        with self._lock:
+            if self._generator is not None:
+                self._generator.release()
+            self._generator = None
+            self.state = STATE_IDLE
+            self.load_time = None
+
+    @property
+    def device(self) -> Optional[str]:
+        """Device of the loaded generator, or None before loading."""
+        generator = self._generator
+        return generator.device if generator is not None else None
+
+    def cache_params(self) -> Dict[str, Any]:
+        """Device, weight dtype and int8 quantization, for result cache keys.
+
+        Images made in bfloat16 or with int8 weights differ from float32
+        ones. Before the model is loaded these are derived from the options,
+        which imports torch; call it off the event loop.
+        """
+        generator = self._generator
+        if generator is not None:
+            device, dtype, quantize_int8 = generator.device, generator.dtype, generator.quantize_int8
+        else:
+            from .generator import resolve_numerics
+            device, dtype, quantize_int8 = resolve_numerics(
+                self.generator_kwargs.get("device"),
+                self.generator_kwargs.get("cpu_dtype", "float32"),
+                self.generator_kwargs.get("quantize_int8", False)
+            )
+        return {"device": device, "dtype": str(dtype), "quantize_int8": quantize_int8}
+
+    def is_ready(self) -> bool:
+        """Check if the generator is loaded and ready to generate images.
+
+        Returns:
+            True if the model is loaded and ready, False otherwise.
+        """
+        generator = self._generator
+        return generator is not None and generator.is_ready()
+
+    def status(self) -> Dict[str, Any]:
+        """Loading state for readiness reporting."""
+        return {
+            "model_id": self.model_id,
+            "state": self.state,
+            "device": self.device,
+            "load_time": self.load_time,
+            "error": self.error,
+        }
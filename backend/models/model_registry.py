@@ -0,0 +1,210 @@
+"""Registry of diffusion pipelines served from one process.
+
+Requests pick a model through ``GenerationRequest.model_id``. Each model gets
+a ``LazyGenerator`` handle that loads on first use; once the loaded pipelines
+exceed the memory budget, the least recently used ones are unloaded.
+Components of compatible models (e.g. the VAE) can be shared so a second
+model does not load its own copy.
+"""
+
+import gc
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from .lazy_generator import LazyGenerator
+
+if TYPE_CHECKING:
+    from .generator import SyntheticDataGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Load generators per model on demand and evict them LRU under a budget.
+
+    All loading and eviction happens through ``get``, which runs on the
+    inference worker thread, so a pipeline is never evicted mid-generation.
+    """
+
+    def __init__(
+        self,
+        default_model_id: str,
+        allowed_models: Iterable[str] = (),
+        memory_budget_mb: int = 0,
+        shared_components: Iterable[str] = ("vae",),
+        **generator_kwargs: Any
+    ) -> None:
+        """Initialize the registry without loading any model.
+
+        Args:
+            default_model_id: Model used when a request does not name one.
+            allowed_models: Additional model IDs requests may select.
+            memory_budget_mb: Total parameter memory for loaded pipelines.
+                0 means unlimited.
+            shared_components: Pipeline components that may be shared between
+                compatible models, e.g. ``("vae", "text_encoder", "tokenizer")``.
+            **generator_kwargs: Extra ``SyntheticDataGenerator`` arguments.
+        """
+        self.default_model_id = default_model_id
+        self.allowed_models = [default_model_id] + [
+            model_id for model_id in allowed_models if model_id and model_id != default_model_id
+        ]
+        self.memory_budget = max(0, memory_budget_mb) * 1024 ** 2
+        self.shared_components = tuple(shared_components)
+        self.generator_kwargs = generator_kwargs
+        self.evictions = 0
+        self._handles: "OrderedDict[str, LazyGenerator]" = OrderedDict(
+            (model_id, LazyGenerator(model_id, **generator_kwargs)) for model_id in self.allowed_models
+        )
+        self._lock = threading.Lock()
+
+    def resolve(self, model_id: Optional[str] = None) -> str:
+        """Map an optional requested model to a served model ID.
+
+        Args:
+            model_id: Requested model, or None for the default.
+
+        Returns:
+            The model ID to use.
+
+        Raises:
+            ValueError: If the model is not served by this registry.
+        """
+        if not model_id:
+            return self.default_model_id
+        if model_id not in self._handles:
+            raise ValueError(
+                f"Model '{model_id}' is not available. Choose one of: {', '.join(self.allowed_models)}"
+            )
+        return model_id
+
+    def handle(self, model_id: Optional[str] = None) -> LazyGenerator:
+        """Return the lazy handle for a model without loading it."""
+        return self._handles[self.resolve(model_id)]
+
+    def peek(self, model_id: Optional[str] = None) -> Optional["SyntheticDataGenerator"]:
+        """Return a model's generator if loaded, without triggering a load."""
+        return self.handle(model_id).peek()
+
+    def get(self, model_id: Optional[str] = None) -> "SyntheticDataGenerator":
+        """Return a loaded generator, loading it and evicting others if needed.
+
+        Blocks while loading, so call it from the inference worker.
+
+        Args:
+            model_id: Model to use, or None for the default.
+
+        Returns:
+            The loaded generator.
+
+        Raises:
+            ValueError: If the model is not served by this registry.
+            RuntimeError: If the model fails to load.
+        """
+        model_id = self.resolve(model_id)
+        with self._lock:
+            handle = self._handles[model_id]
+            self._handles.move_to_end(model_id)
+
+            generator = handle.peek()
+            if generator is None:
+                generator = handle.get(components=self._find_shared_components(model_id))
+                self._evict_over_budget(keep=model_id)
+            return generator
+
+    def is_ready(self, model_id: Optional[str] = None) -> bool:
+        """Whether a model (the default if None) is loaded."""
+        return self.handle(model_id).is_ready()
+
+    def loaded_bytes(self) -> int:
+        """Parameter memory of all loaded pipelines, counting shared components once."""
+        sizes: Dict[int, int] = {}
+        for handle in self._handles.values():
+            generator = handle.peek()
+            if generator is not None:
+                sizes.update(generator.component_memory())
+        return sum(sizes.values())
+
+    def status(self) -> Dict[str, Any]:
+        """Loading state of every model, for readiness reporting."""
+        return {
+            "default_model": self.default_model_id,
+            "models": [handle.status() for handle in self._handles.values()],
+            "loaded_mb": round(self.loaded_bytes() / 1024 ** 2, 1),
+            "memory_budget_mb": self.memory_budget // 1024 ** 2,
+            "evictions": self.evictions,
+        }
+
+    def _find_shared_components(self, model_id: str) -> Dict[str, Any]:
+        """Find already-loaded components that a model can reuse.
+
+        Two models are compatible for a component when they use the same
+        pipeline class and declare the same class for that component in their
+        ``model_index.json``.
+        """
+        if not self.shared_components:
+            return {}
+
+        loaded = [
+            handle.peek() for other_id, handle in self._handles.items()
+            if other_id != model_id and handle.peek() is not None
+        ]
+        if not loaded:
+            return {}
+
+        try:
+            from diffusers import DiffusionPipeline
+
+            config = DiffusionPipeline.load_config(model_id)
+        except Exception as e:
+            logger.warning(f"Could not read pipeline config for {model_id}: {e}")
+            return {}
+
+        for other in loaded:
+            other_config = other.pipeline.config
+            if other_config.get("_class_name") != config.get("_class_name"):
+                continue
+            shared = {
+                name: getattr(other.pipeline, name)
+                for name in self.shared_components
+                if name in config
+                and list(config[name]) == list(other_config.get(name, ()))
+                and getattr(other.pipeline, name, None) is not None
+            }
+            if shared:
+                logger.info(f"{model_id} shares {', '.join(sorted(shared))} with {other.model_id}")
+                return shared
+        return {}
+
+    def _evict_over_budget(self, keep: str) -> None:
+        """Unload least recently used models until loaded memory fits the budget."""
+        if not self.memory_budget:
+            return
+
+        for model_id in list(self._handles):
+            if self.loaded_bytes() <= self.memory_budget:
+                break
+            handle = self._handles[model_id]
+            if model_id == keep or handle.peek() is None:
+                continue
+            logger.info(f"Evicting {model_id} to stay within the model memory budget")
+            self._release(handle)
+
+        if self.loaded_bytes() > self.memory_budget:
+            logger.warning(f"{keep} alone exceeds the model memory budget")
+
+    def _release(self, handle: LazyGenerator) -> None:
+        """Unload one model and drop its cached prompt embeddings."""
+        generator = handle.peek()
+        if generator is not None:
+            generator.prompt_cache.clear(handle.model_id)
+        handle.unload()
+        self.evictions += 1
+        gc.collect()
+
+    @staticmethod
+    def parse_model_list(value: str) -> List[str]:
+        """Split a comma-separated model list from settings."""
+        return [item.strip() for item in value.split(",") if item.strip()]
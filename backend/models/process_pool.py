@@ -0,0 +1,384 @@
+"""Multi-process, data-parallel generation across CPU cores.
+
+One diffusion pipeline in one process leaves most cores of a large CPU box
+idle. The pool starts several worker processes, each pinned to its own slice
+of cores and owning its own ``ModelRegistry``, and shards every batch across
+them. Generated pixels come back through shared memory instead of being
+pickled through the result queue.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# (mode, size, offset, length) of each image inside a shared-memory block
+ImageLayout = List[Tuple[str, Tuple[int, int], int, int]]
+
+
+def _split_cores(cores: List[int], parts: int) -> List[List[int]]:
+    """Split a core list into ``parts`` contiguous, near-equal slices."""
+    if len(cores) < parts:
+        # Fewer cores than workers: let workers share all cores
+        return [list(cores) for _ in range(parts)]
+    size, extra = divmod(len(cores), parts)
+    slices, start = [], 0
+    for index in range(parts):
+        end = start + size + (1 if index < extra else 0)
+        slices.append(cores[start:end])
+        start = end
+    return slices
+
+
+def _write_shared(images: List[Image.Image]) -> Tuple[str, ImageLayout]:
+    """Copy raw image pixels into a new shared-memory block.
+
+    The block is left for the parent to unlink once it has read it.
+    """
+    raw = [image.tobytes() for image in images]
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(len(data) for data in raw)))
+    layout: ImageLayout = []
+    offset = 0
+    for image, data in zip(images, raw):
+        block.buf[offset:offset + len(data)] = data
+        layout.append((image.mode, image.size, offset, len(data)))
+        offset += len(data)
+    block.close()
+    return block.name, layout
+
+
+def _read_shared(name: str, layout: ImageLayout) -> List[Image.Image]:
+    """Rebuild images from a shared-memory block and release the block."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return [
+            Image.frombytes(mode, tuple(size), bytes(block.buf[offset:offset + length]))
+            for mode, size, offset, length in layout
+        ]
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _worker_main(
+    index: int,
+    cores: List[int],
+    registry_kwargs: Dict[str, Any],
+    prompt_cache_size: int,
+    preload: bool,
+    tasks: "multiprocessing.Queue",
+    results: "multiprocessing.Queue"
+) -> None:
+    """Entry point of a worker process: load models and serve batch tasks."""
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    # Imported here so the parent never needs torch/diffusers for the pool
+    from .model_registry import ModelRegistry
+    from .prompt_cache import PromptEmbeddingCache
+
+    options = dict(registry_kwargs)
+    if not options.get("cpu_threads"):
+        options["cpu_threads"] = len(cores)
+    registry = ModelRegistry(prompt_cache=PromptEmbeddingCache(max_entries=prompt_cache_size), **options)
+
+    if preload:
+        try:
+            registry.get()
+            results.put(("loaded", index, registry.default_model_id))
+        except Exception as e:
+            results.put(("load_failed", index, str(e)))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, model_id, prompts, seeds, params = task
+
+        def progress(images_done: int, step: int, total_steps: int) -> None:
+            results.put(("progress", task_id, images_done, step, total_steps))
+
+        try:
+            generator = registry.get(model_id)
+            images, metadata = generator.generate_batch(
+                prompts, seeds=seeds, progress_callback=progress, **params
+            )
+            name, layout = _write_shared(images)
+            results.put(("done", task_id, name, layout, metadata))
+        except Exception as e:
+            results.put(("error", task_id, str(e)))
+
+
+class _ShardTask:
+    """One shard of a batch, in flight on a worker process."""
+
+    __slots__ = ("worker", "loop", "future", "progress_callback")
+
+    def __init__(
+        self,
+        worker: int,
+        loop: asyncio.AbstractEventLoop,
+        future: asyncio.Future,
+        progress_callback: Optional[Callable[[int, int, int], None]]
+    ) -> None:
+        self.worker = worker
+        self.loop = loop
+        self.future = future
+        self.progress_callback = progress_callback
+
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Complete a future from the event loop unless its caller gave up."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class GeneratorProcessPool:
+    """Shard generation batches across worker processes pinned to core slices.
+
+    Each worker loads its own pipelines, so memory use grows with the worker
+    count; set ``MODEL_MEMORY_BUDGET_MB`` per worker accordingly. Workers that
+    die are restarted and their in-flight shards fail.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        registry_kwargs: Dict[str, Any],
+        prompt_cache_size: int = 256,
+        preload: bool = True
+    ) -> None:
+        """Initialize the pool without starting any process.
+
+        Args:
+            num_workers: Number of generator processes.
+            registry_kwargs: ``ModelRegistry`` arguments for every worker. Must
+                be picklable. ``cpu_threads`` defaults to the worker's core count.
+            prompt_cache_size: Prompt-embedding cache entries per worker.
+            preload: Load the default model in every worker at start.
+        """
+        self.num_workers = max(1, num_workers)
+        self.registry_kwargs = registry_kwargs
+        self.prompt_cache_size = prompt_cache_size
+        self.preload = preload
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * self.num_workers
+        self._task_queues: List[Optional["multiprocessing.Queue"]] = [None] * self.num_workers
+        self._results: Optional["multiprocessing.Queue"] = None
+        self._cores: List[List[int]] = []
+        self._tasks: Dict[int, _ShardTask] = {}
+        self._next_task_id = 0
+        self._worker_state: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """Spawn the worker processes and the result reader thread."""
+        if hasattr(os, "sched_getaffinity"):
+            cores = sorted(os.sched_getaffinity(0))
+        else:
+            cores = list(range(os.cpu_count() or 1))
+        self._cores = _split_cores(cores, self.num_workers)
+        self._results = self._context.Queue()
+        self._stopping = False
+        for index in range(self.num_workers):
+            self._spawn(index)
+        self._reader = threading.Thread(target=self._read_results, name="generator-pool-reader", daemon=True)
+        self._reader.start()
+        logger.info(
+            f"Started {self.num_workers} generator process(es) on cores "
+            f"{', '.join(f'{c[0]}-{c[-1]}' for c in self._cores if c)}"
+        )
+
+    def stop(self) -> None:
+        """Stop the workers and fail any shards still in flight."""
+        self._stopping = True
+        for task_queue in self._task_queues:
+            if task_queue is not None:
+                task_queue.put(None)
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        with self._lock:
+            tasks, self._tasks = self._tasks, {}
+        for task in tasks.values():
+            task.loop.call_soon_threadsafe(
+                _resolve, task.future, None, RuntimeError("Generator pool stopped")
+            )
+        if self._reader is not None:
+            self._reader.join(timeout=5)
+            self._reader = None
+
+    @property
+    def pending(self) -> int:
+        """Number of shards queued or running on workers."""
+        return len(self._tasks)
+
+    async def generate_batch(
+        self,
+        model_id: str,
+        prompts: List[str],
+        seeds: List[Optional[int]],
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        **params: Any
+    ) -> Tuple[List[Image.Image], List[Dict[str, Any]]]:
+        """Generate a batch by splitting it evenly over the least busy workers.
+
+        Args:
+            model_id: Model to generate with.
+            prompts: One prompt per image.
+            seeds: Per-image seeds; None entries are drawn at random.
+            progress_callback: Called as ``(images_done, step, total_steps)``
+                with each shard's progress. Runs on the reader thread.
+            **params: Remaining ``SyntheticDataGenerator.generate_batch``
+                arguments (steps, guidance, size, scheduler, ...).
+
+        Returns:
+            A tuple of images and their metadata dictionaries, in input order.
+
+        Raises:
+            RuntimeError: If the pool is not running or a worker fails.
+        """
+        if self._results is None or self._stopping:
+            raise RuntimeError("Generator pool is not running")
+
+        loop = asyncio.get_running_loop()
+        shards = min(len(prompts), self.num_workers)
+        size, extra = divmod(len(prompts), shards)
+        futures = []
+        start = 0
+        with self._lock:
+            busy = {index: 0 for index in range(self.num_workers)}
+            for task in self._tasks.values():
+                busy[task.worker] += 1
+            workers = sorted(busy, key=busy.get)[:shards]
+            for shard, worker in enumerate(workers):
+                end = start + size + (1 if shard < extra else 0)
+                task_id = self._next_task_id
+                self._next_task_id += 1
+                future = loop.create_future()
+                self._tasks[task_id] = _ShardTask(worker, loop, future, progress_callback)
+                self._task_queues[worker].put(
+                    (task_id, model_id, prompts[start:end], seeds[start:end], params)
+                )
+                futures.append(future)
+                start = end
+
+        results = await asyncio.gather(*futures)
+        images = [image for shard_images, _ in results for image in shard_images]
+        metadata = [item for _, shard_metadata in results for item in shard_metadata]
+        return images, metadata
+
+    def is_ready(self) -> bool:
+        """Whether every worker has loaded the default model."""
+        return len(self._worker_state) == self.num_workers and all(
+            state.get("state") == "ready" for state in self._worker_state.values()
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Per-worker loading state and core assignment."""
+        return {
+            "workers": [
+                {
+                    "index": index,
+                    "pid": process.pid if process is not None else None,
+                    "alive": process is not None and process.is_alive(),
+                    "cores": self._cores[index] if index < len(self._cores) else [],
+                    **self._worker_state.get(index, {"state": "loading" if self.preload else "idle"}),
+                }
+                for index, process in enumerate(self._processes)
+            ],
+            "pending_shards": self.pending,
+            "restarts": self.restarts,
+        }
+
+    def _spawn(self, index: int) -> None:
+        """Start (or restart) one worker process."""
+        task_queue = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                index, self._cores[index], self.registry_kwargs,
+                self.prompt_cache_size, self.preload, task_queue, self._results
+            ),
+            name=f"generator-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._task_queues[index] = task_queue
+        self._processes[index] = process
+        self._worker_state.pop(index, None)
+
+    def _read_results(self) -> None:
+        """Reader thread: route worker messages to waiting callers."""
+        while not self._stopping:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+            if kind == "loaded":
+                self._worker_state[message[1]] = {"state": "ready", "model_id": message[2]}
+                continue
+            if kind == "load_failed":
+                self._worker_state[message[1]] = {"state": "failed", "error": message[2]}
+                continue
+
+            task_id = message[1]
+            if kind == "progress":
+                task = self._tasks.get(task_id)
+                if task is not None and task.progress_callback is not None:
+                    task.progress_callback(*message[2:])
+                continue
+
+            with self._lock:
+                task = self._tasks.pop(task_id, None)
+            if kind == "done":
+                # Always read the block so it is unlinked, even if nobody waits
+                try:
+                    result = (_read_shared(message[2], message[3]), message[4])
+                    error = None
+                except Exception as e:
+                    result, error = None, RuntimeError(f"Could not read generated images: {e}")
+            else:
+                result, error = None, RuntimeError(message[2])
+            if task is not None:
+                if error is None and task.worker not in self._worker_state:
+                    # Without preload, a worker counts as ready once it has generated
+                    self._worker_state[task.worker] = {"state": "ready"}
+                task.loop.call_soon_threadsafe(_resolve, task.future, result, error)
+
+    def _check_workers(self) -> None:
+        """Restart dead workers and fail the shards they were running."""
+        for index, process in enumerate(self._processes):
+            if self._stopping or process is None or process.is_alive():
+                continue
+            logger.error(f"Generator worker {index} exited with code {process.exitcode}; restarting")
+            with self._lock:
+                lost = [task_id for task_id, task in self._tasks.items() if task.worker == index]
+                tasks = [self._tasks.pop(task_id) for task_id in lost]
+            error = RuntimeError(f"Generator worker {index} exited with code {process.exitcode}")
+            for task in tasks:
+                task.loop.call_soon_threadsafe(_resolve, task.future, None, error)
+            self.restarts += 1
+            self._spawn(index)
@@ -0,0 +1,89 @@
+"""LRU cache of text-encoder outputs.
+
+Every image of a ``/generate`` call uses nearly the same prompt and popular
+class labels repeat across requests, yet the CLIP text encoder would otherwise
+run again for every image. Cached embeddings are handed to the pipeline as
+``prompt_embeds`` so repeat prompts skip text encoding entirely.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class PromptEmbeddingCache:
+    """Bounded LRU mapping ``(model_id, prompt, negative_prompt)`` to embeddings.
+
+    Values are the tuples returned by the pipeline's ``encode_prompt``; they
+    stay on the generator's device, so a hit costs no transfer.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of prompts kept. 0 disables caching.
+        """
+        self.max_entries = max(0, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, ...]]:
+        """Return cached embeddings for a key, counting the hit or miss.
+
+        Args:
+            key: ``(model_id, prompt, negative_prompt)`` tuple.
+
+        Returns:
+            The cached embedding tuple, or None on a miss.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Tuple[Any, ...]) -> None:
+        """Store embeddings, evicting the least recently used entry if full.
+
+        Args:
+            key: ``(model_id, prompt, negative_prompt)`` tuple.
+            value: Embedding tuple from ``encode_prompt``.
+        """
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, model_id: Optional[str] = None) -> None:
+        """Drop cached embeddings, optionally only those of one model.
+
+        Args:
+            model_id: Model whose entries to drop. Clears everything if None.
+        """
+        with self._lock:
+            if model_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == model_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,117 @@
+"""In-place upgrade of tables created by earlier versions.
+
+``Base.metadata.create_all`` only creates missing tables; it never alters an
+existing one. Columns and indexes added to the models since are added here
+at startup, and old rows are backfilled so they read as finished jobs:
+generations from before the job queue are completed, or failed if they were
+not successful. ``generated_images`` rows from before images were linked to
+their generation keep a NULL ``generation_id``; those datasets are listed
+from their manifests. On SQLite, ``created_at`` values written by the server
+default get the microseconds new rows have, so they compare correctly as
+text. Every step checks the live schema first, so running the upgrade again
+is a no-op.
+"""
+
+from typing import List
+
+from sqlalchemy import Column, UniqueConstraint, inspect, literal, text, update
+from sqlalchemy.engine import Connection
+
+from .generated_image import GeneratedImage
+from .generation_db import Generation, STATUS_FAILED
+
+_generations = Generation.__table__
+
+# Tables upgraded in place, in dependency order
+UPGRADED_TABLES = (_generations, GeneratedImage.__table__)
+
+# Statements run right after the column they fill in has been added.
+# updated_at is kept as is; the rows themselves did not change.
+BACKFILLS = {
+    ("generations", "status"): [
+        update(_generations).where(_generations.c.is_successful.is_(False))
+        .values(status=STATUS_FAILED, updated_at=_generations.c.updated_at)
+    ],
+    ("generations", "images_done"): [
+        update(_generations)
+        .values(images_done=_generations.c.file_count, updated_at=_generations.c.updated_at)
+    ],
+    ("generations", "completed_at"): [
+        update(_generations)
+        .values(completed_at=_generations.c.created_at, updated_at=_generations.c.updated_at)
+    ],
+}
+
+
+def _column_ddl(connection: Connection, column: Column) -> str:
+    """Column definition for ``ALTER TABLE ... ADD COLUMN``.
+
+    NOT NULL is only kept for columns with a scalar default, which fills in
+    existing rows; other new columns are added as nullable.
+    """
+    dialect = connection.dialect
+    ddl = f"{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+    if column.default is not None and column.default.is_scalar:
+        default = literal(column.default.arg, column.type).compile(
+            dialect=dialect, compile_kwargs={"literal_binds": True}
+        )
+        ddl += f" DEFAULT {default}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {target.table.name} ({target.name})"
+        if foreign_key.ondelete:
+            ddl += f" ON DELETE {foreign_key.ondelete}"
+    return ddl
+
+
+def upgrade_schema(connection: Connection) -> List[str]:
+    """Add the columns and indexes existing tables are missing.
+
+    Args:
+        connection: Connection in a transaction, e.g. from ``run_sync``
+
+    Returns:
+        Descriptions of the changes made, e.g. ``added generations.status``
+    """
+    inspector = inspect(connection)
+    changes = []
+    for table in UPGRADED_TABLES:
+        if not inspector.has_table(table.name):
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            connection.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(connection, column)}"
+            ))
+            for statement in BACKFILLS.get((table.name, column.name), ()):
+                connection.execute(statement)
+            changes.append(f"added {table.name}.{column.name}")
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        indexes.update(constraint["name"] for constraint in inspector.get_unique_constraints(table.name))
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+                changes.append(f"added {table.name}.{index.name}")
+        # SQLite cannot add constraints to a table; a unique index enforces the same
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and constraint.name and constraint.name not in indexes:
+                column_names = ", ".join(column.name for column in constraint.columns)
+                connection.execute(text(
+                    f"CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({column_names})"
+                ))
+                changes.append(f"added {table.name}.{constraint.name}")
+
+    if connection.dialect.name == "sqlite" and inspector.has_table(_generations.name):
+        # CURRENT_TIMESTAMP has no fraction; SQLAlchemy always writes six digits
+        normalized = connection.execute(text(
+            "UPDATE generations SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+        )).rowcount
+        if normalized:
+            changes.append(f"normalized {normalized} generations.created_at value(s)")
+    return changes
@@ -33,16 +33,38 @@ def setup_directories():
         os.makedirs(directory, exist_ok=True)
         logger.info(f"Directory ensured: {directory}")
 
-def enable_rls_on_generated_images(engine):
-    """Enable RLS on generated_images table if using PostgreSQL."""
+# generated_images references generations, so both need a policy
+RLS_TABLES = ("generations", "generated_images", "label_counters")
+
+def create_tables(engine):
+    """Create missing tables and upgrade existing ones before policies are attached."""
+    from config.database import Base
+    from models.generated_image import GeneratedImage  # noqa: F401
+    from models.label_counters import LabelCounter  # noqa: F401
+    from models.schema_upgrade import upgrade_schema
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        upgraded = upgrade_schema(conn)
+    if upgraded:
+        logger.info(f"Upgraded database schema: {', '.join(upgraded)}")
+
+def enable_rls(engine):
+    """Enable RLS with an allow_all policy on the API's tables if using PostgreSQL."""
     from sqlalchemy import text
-    with engine.connect() as conn:
+    for table in RLS_TABLES:
         try:
-            conn.execute(text("ALTER TABLE generated_images ENABLE ROW LEVEL SECURITY;"))
-            conn.execute(text("CREATE POLICY IF NOT EXISTS allow_all ON generated_images FOR ALL USING (true);"))
-            logger.info("RLS enabled on generated_images table (allow_all policy)")
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY"))
+                # CREATE POLICY has no IF NOT EXISTS
+                policy = conn.execute(
+                    text("SELECT 1 FROM pg_policies WHERE tablename = :table AND policyname = 'allow_all'"),
+                    {"table": table}
+                ).first()
+                if policy is None:
+                    conn.execute(text(f"CREATE POLICY allow_all ON {table} FOR ALL USING (true)"))
+            logger.info(f"RLS enabled on {table} table (allow_all policy)")
         except Exception as e:
-            logger.warning(f"Could not enable RLS: {e}")
+            logger.warning(f"Could not enable RLS on {table}: {e}")
 
 def main():
     """Main startup function."""
@@ -55,7 +77,8 @@ def main():
     try:
         from config.database import engine
         if engine.url.get_backend_name() == "postgresql":
-            enable_rls_on_generated_images(engine)
+            create_tables(engine)
+            enable_rls(engine)
     except Exception as e:
         logger.warning(f"RLS setup skipped: {e}")
     
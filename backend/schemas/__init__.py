@@ -1,9 +1,16 @@
 """Pydantic schema definitions live here."""
 
 from .generation import (
+    MAX_SEED,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
     GenerationRequest, 
     GenerationResponse, 
     DatasetListResponse,
     PreviewResponse,
+    JobStatusResponse,
+    ExportRequest,
+    ExportShard,
+    ExportResponse,
     ErrorResponse
 )
@@ -1,9 +1,16 @@
 """Pydantic schemas for synthetic data generation endpoints."""
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
+# Seeds are kept within a signed 32-bit range so they fit database columns
+MAX_SEED = 2 ** 31 - 1
+
+# Page sizes for GET /datasets
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 
 class GenerationRequest(BaseModel):
     """Request schema for synthetic data generation.
@@ -12,10 +19,20 @@ class GenerationRequest(BaseModel):
         class_label: The class or category label for the synthetic data
         noise_level: Level of noise to add (0.0 to 1.0)
         output_size: Number of images to generate
+        seed: Base random seed for reproducible output (random if omitted)
+        model_id: Model to generate with (server default if omitted)
+        speed_profile: Speed/quality trade-off (server default if omitted)
+        run_async: Queue the job and return immediately instead of waiting
     """
     class_label: str = Field(..., description="Class or category label for the synthetic data")
     noise_level: float = Field(0.1, ge=0.0, le=1.0, description="Noise level between 0.0 and 1.0")
     output_size: int = Field(1, ge=1, le=10, description="Number of images to generate")
+    seed: Optional[int] = Field(None, ge=0, le=MAX_SEED, description="Base seed; image i uses seed + i")
+    model_id: Optional[str] = Field(None, description="Model to generate with; see /ready for available models")
+    speed_profile: Optional[Literal["quality", "balanced", "turbo"]] = Field(
+        None, description="quality, balanced or turbo; picks scheduler, steps and guidance for the model"
+    )
+    run_async: bool = Field(False, description="Return right away and poll /jobs/{id} for progress")
 
 
 class GenerationResponse(BaseModel):
@@ -26,15 +43,27 @@ class GenerationResponse(BaseModel):
         class_label: The class label used for generation
         noise_level: Noise level applied
         output_size: Number of images generated
-        preview: List of base64 encoded preview images (first 3)
+        seed: Base seed used; image i was generated with seed + i
+        model_id: Model used for generation
+        speed_profile: Speed profile used for generation
+        preview: List of base64 encoded WebP thumbnails (first 3)
+        preview_urls: Cacheable thumbnail URLs for the same images
         download_link: Link to download the full dataset
+        status: Job status (queued/running/completed/failed)
+        status_url: Link to poll job progress
     """
     id: str
     class_label: str
     noise_level: float
     output_size: int
-    preview: List[str] = Field(description="Base64 encoded preview images")
+    seed: Optional[int] = None
+    model_id: Optional[str] = None
+    speed_profile: Optional[str] = None
+    preview: List[str] = Field(description="Base64 encoded WebP thumbnails")
+    preview_urls: List[str] = Field(default_factory=list, description="Cacheable thumbnail URLs")
     download_link: str
+    status: str = "completed"
+    status_url: Optional[str] = None
 
 
 class DatasetListResponse(BaseModel):
@@ -62,11 +91,91 @@ class PreviewResponse(BaseModel):
     Attributes:
         id: Generation ID
         class_label: The class label
-        preview: List of base64 encoded preview images
+        preview: List of base64 encoded WebP thumbnails
+        preview_urls: Cacheable thumbnail URLs for the same images
     """
     id: str
     class_label: str
     preview: List[str]
+    preview_urls: List[str] = Field(default_factory=list)
+
+
+class JobStatusResponse(BaseModel):
+    """Response schema for generation job status.
+    
+    Attributes:
+        id: Generation ID
+        status: Job status (queued/running/completed/failed)
+        images_done: Images finished so far
+        images_total: Images requested
+        current_step: Denoising step reached in the current batch
+        total_steps: Denoising steps per image
+        progress: Overall completion between 0.0 and 1.0
+        error_message: Error message if the job failed
+        created_at: When the job was submitted
+        started_at: When the job started running
+        completed_at: When the job finished
+        download_link: Link to download the dataset once completed
+    """
+    id: str
+    status: str
+    images_done: int
+    images_total: int
+    current_step: int = 0
+    total_steps: int = 0
+    progress: float = Field(0.0, ge=0.0, le=1.0)
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    download_link: Optional[str] = None
+
+
+class ExportRequest(BaseModel):
+    """Request schema for exporting datasets in a training-ready format.
+    
+    Attributes:
+        generation_ids: Completed generations to include
+        format: webdataset (tar shards) or parquet
+        shard_size: Maximum images per shard
+    """
+    generation_ids: List[str] = Field(..., min_length=1, description="Completed generations to export")
+    format: Literal["webdataset", "parquet"] = Field("webdataset", description="webdataset tar shards or parquet files")
+    shard_size: int = Field(1000, ge=1, le=100000, description="Maximum images per shard")
+
+
+class ExportShard(BaseModel):
+    """One file of an export.
+    
+    Attributes:
+        filename: Shard file name
+        url: Link to download the shard
+        samples: Images in the shard
+        size_bytes: Shard size in bytes
+    """
+    filename: str
+    url: str
+    samples: int
+    size_bytes: int
+
+
+class ExportResponse(BaseModel):
+    """Response schema for a dataset export.
+    
+    Attributes:
+        id: Export ID
+        format: webdataset or parquet
+        classes: Class labels; a sample's class index points into this list
+        sample_count: Images exported
+        shards: Shard files in order
+        index_url: Link to the export's index.json
+    """
+    id: str
+    format: str
+    classes: List[str]
+    sample_count: int
+    shards: List[ExportShard]
+    index_url: str
 
 
 class ErrorResponse(BaseModel):
@@ -6,6 +6,7 @@ Tests all API endpoints manually to verify functionality:
 - GET /datasets 
 - GET /preview/{id}
 - GET /download/{id}
+- GET /jobs/{id}
 - GET /health
 """
 
@@ -238,6 +239,46 @@ class APITester:
             logger.error(f"❌ Download endpoint failed with exception: {e}")
             return False
     
+    def test_async_job_endpoint(self) -> bool:
+        """Test queued generation with run_async and poll GET /jobs/{id}."""
+        logger.info("🔍 Testing async POST /generate + GET /jobs/{id}...")
+        
+        try:
+            response = requests.post(
+                f"{self.base_url}/generate",
+                json={"class_label": "red apple", "noise_level": 0.1, "output_size": 2, "run_async": True},
+                timeout=30
+            )
+            
+            if response.status_code != 200:
+                logger.error(f"❌ Async generation failed with status {response.status_code}: {response.text}")
+                return False
+            
+            data = response.json()
+            if data.get("status") != "queued" or not data.get("status_url"):
+                logger.error(f"❌ Async generation was not queued: {data}")
+                return False
+            
+            deadline = time.time() + TIMEOUT
+            while time.time() < deadline:
+                job = requests.get(f"{self.base_url}{data['status_url']}", timeout=10).json()
+                logger.info(f"   {job['status']}: {job['images_done']}/{job['images_total']} ({job['progress']:.0%})")
+                
+                if job["status"] == "completed":
+                    logger.info("✅ Async job completed")
+                    return True
+                if job["status"] == "failed":
+                    logger.error(f"❌ Async job failed: {job.get('error_message')}")
+                    return False
+                time.sleep(2)
+            
+            logger.error("❌ Async job did not finish in time")
+            return False
+            
+        except Exception as e:
+            logger.error(f"❌ Async job test failed with exception: {e}")
+            return False
+    
     def test_error_handling(self) -> bool:
         """Test error handling with invalid requests."""
         logger.info("🔍 Testing error handling...")
@@ -306,7 +347,10 @@ class APITester:
         # Test 5: Download (requires generation_id)
         results["download"] = self.test_download_endpoint(generation_id)
         
-        # Test 6: Error handling
+        # Test 6: Queued generation with job polling
+        results["async_job"] = self.test_async_job_endpoint()
+        
+        # Test 7: Error handling
         results["error_handling"] = self.test_error_handling()
         
         # Summary
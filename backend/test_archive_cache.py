@@ -0,0 +1,91 @@
+"""Tests for prebuilt dataset archives."""
+
+import hashlib
+import os
+import zipfile
+
+from utils.archive_cache import ArchiveCache
+from utils.manifest import build_manifest
+
+
+def _dataset(root, name, images=2, size=200):
+    directory = root / name
+    directory.mkdir()
+    paths = []
+    for i in range(images):
+        path = directory / f"img_{i}.png"
+        path.write_bytes(os.urandom(size))
+        paths.append(str(path))
+    return str(directory), paths
+
+
+def test_fingerprint_follows_content_not_timestamps(tmp_path):
+    directory, paths = _dataset(tmp_path, "dataset")
+    filenames = [os.path.basename(path) for path in paths]
+    before = ArchiveCache.fingerprint(build_manifest(directory, filenames)["files"])
+
+    # Touching a file, e.g. by hard-linking a result cache hit, changes nothing
+    os.utime(paths[0], (0, 0))
+    assert ArchiveCache.fingerprint(build_manifest(directory, filenames)["files"]) == before
+
+    with open(paths[0], "wb") as f:
+        f.write(os.urandom(200))
+    assert ArchiveCache.fingerprint(build_manifest(directory, filenames)["files"]) != before
+
+
+def test_fingerprint_ignores_entry_order():
+    files = [{"name": "a.png", "size": 1, "sha256": "aa"}, {"name": "b.png", "size": 2, "sha256": "bb"}]
+
+    assert ArchiveCache.fingerprint(files) == ArchiveCache.fingerprint(files[::-1])
+
+
+def test_build_writes_the_archive_and_reports_its_checksum(tmp_path):
+    cache = ArchiveCache(str(tmp_path), max_bytes=10_000_000)
+    directory, paths = _dataset(tmp_path, "dataset")
+
+    path, checksum, size = cache.build(directory, paths)
+
+    assert path == os.path.join(directory, "dataset.zip")
+    with open(path, "rb") as f:
+        content = f.read()
+    assert (checksum, size) == (hashlib.sha256(content).hexdigest(), len(content))
+    with zipfile.ZipFile(path) as archive:
+        assert sorted(archive.namelist()) == ["img_0.png", "img_1.png"]
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_touch_reports_whether_the_archive_exists(tmp_path):
+    cache = ArchiveCache(str(tmp_path), max_bytes=10_000_000)
+    directory, paths = _dataset(tmp_path, "dataset")
+
+    assert not cache.touch(directory)
+    cache.build(directory, paths)
+    assert cache.touch(directory)
+    os.remove(cache.archive_path(directory))
+    assert not cache.touch(directory)
+    assert cache.stats()["archives"] == 0
+
+
+def test_least_recently_downloaded_archives_are_evicted(tmp_path):
+    directories = [_dataset(tmp_path, f"dataset{i}", size=1000) for i in range(3)]
+    archive_size = ArchiveCache(str(tmp_path), max_bytes=10_000_000).build(*directories[0])[2]
+    cache = ArchiveCache(str(tmp_path), max_bytes=archive_size * 2)
+    cache.build(*directories[1])
+    # Downloading the first dataset again makes the second the oldest
+    assert cache.touch(directories[0][0])
+
+    cache.build(*directories[2])
+
+    assert os.path.exists(cache.archive_path(directories[0][0]))
+    assert not os.path.exists(cache.archive_path(directories[1][0]))
+    assert os.path.exists(cache.archive_path(directories[2][0]))
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_existing_archives_are_indexed_on_startup(tmp_path):
+    directory, paths = _dataset(tmp_path, "dataset")
+    _, _, size = ArchiveCache(str(tmp_path), max_bytes=10_000_000).build(directory, paths)
+
+    reopened = ArchiveCache(str(tmp_path), max_bytes=10_000_000)
+
+    assert reopened.stats()["archives"] == 1 and reopened.stats()["bytes"] == size
@@ -0,0 +1,193 @@
+"""Tests for merging concurrent requests into batched pipeline calls."""
+
+import asyncio
+import threading
+
+import pytest
+
+from models.batch_scheduler import BatchScheduler
+from models.inference_worker import InferenceWorker
+
+
+class _FakeGenerator:
+    """Records batches and returns the prompt and seed in place of an image."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def auto_batch_size(self, width, height):
+        return 100
+
+    def generate_batch(self, prompts, seeds, progress_callback=None, **params):
+        self.started.set()
+        self.release.wait(timeout=5)
+        if self.fail:
+            raise RuntimeError("pipeline failed")
+        self.batches.append(list(prompts))
+        if progress_callback is not None:
+            progress_callback(0, 1, 1)
+        return list(prompts), [{"seed": seed, **params} for seed in seeds]
+
+
+class _FakeRegistry:
+    """Serves one always-loaded generator as the ``default`` model."""
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def resolve(self, model_id=None):
+        if model_id not in (None, "default"):
+            raise ValueError(f"Unknown model: {model_id}")
+        return "default"
+
+    def peek(self, model_id=None):
+        return self.generator
+
+    def get(self, model_id=None):
+        return self.generator
+
+
+def _scheduler(generator, **options):
+    return BatchScheduler(InferenceWorker(name="test-inference-worker"), _FakeRegistry(generator), **options)
+
+
+def _run(generator, scenario, **options):
+    """Run ``scenario(scheduler)`` against a started scheduler."""
+    async def main():
+        scheduler = _scheduler(generator, **options)
+        await scheduler.start()
+        try:
+            return await asyncio.wait_for(scenario(scheduler), timeout=10)
+        finally:
+            await scheduler.stop()
+            scheduler.worker.shutdown()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_one_batch():
+    generator = _FakeGenerator()
+
+    async def scenario(scheduler):
+        return await asyncio.gather(
+            scheduler.generate(["a1", "a2"], seeds=[1, 2]),
+            scheduler.generate(["b1"], seeds=[3]),
+        )
+
+    (images_a, metadata_a), (images_b, metadata_b) = _run(generator, scenario, max_wait_ms=100)
+
+    assert generator.batches == [["a1", "a2", "b1"]]
+    assert images_a == ["a1", "a2"] and images_b == ["b1"]
+    assert [m["seed"] for m in metadata_a + metadata_b] == [1, 2, 3]
+
+
+def test_incompatible_parameters_run_separately():
+    generator = _FakeGenerator()
+
+    async def scenario(scheduler):
+        return await asyncio.gather(
+            scheduler.generate(["small"], width=256, height=256),
+            scheduler.generate(["large"], width=512, height=512),
+        )
+
+    (small, small_metadata), (large, large_metadata) = _run(generator, scenario, max_wait_ms=50)
+
+    assert sorted(generator.batches) == [["large"], ["small"]]
+    assert small == ["small"] and small_metadata[0]["width"] == 256
+    assert large == ["large"] and large_metadata[0]["width"] == 512
+
+
+def test_full_group_is_split_at_the_batch_size():
+    generator = _FakeGenerator()
+
+    async def scenario(scheduler):
+        images, _ = await scheduler.generate([f"p{i}" for i in range(5)])
+        return images, scheduler.batches_run, scheduler.images_run
+
+    images, batches_run, images_run = _run(generator, scenario, max_batch_size=2, max_wait_ms=10)
+
+    assert images == [f"p{i}" for i in range(5)]
+    assert [len(batch) for batch in generator.batches] == [2, 2, 1]
+    assert (batches_run, images_run) == (3, 5)
+
+
+def test_requests_arriving_during_a_batch_wait_for_the_next_one():
+    generator = _FakeGenerator()
+    generator.release.clear()
+
+    async def scenario(scheduler):
+        first = asyncio.ensure_future(scheduler.generate(["first"]))
+        await asyncio.to_thread(generator.started.wait, 5)
+        later = [asyncio.ensure_future(scheduler.generate([f"later{i}"])) for i in range(2)]
+        await asyncio.sleep(0.05)
+        generator.release.set()
+        return await asyncio.gather(first, *later)
+
+    _run(generator, scenario, max_wait_ms=0)
+
+    assert generator.batches == [["first"], ["later0", "later1"]]
+
+
+def test_step_progress_reaches_every_caller():
+    generator = _FakeGenerator()
+    steps = {"a": [], "b": []}
+
+    async def scenario(scheduler):
+        await asyncio.gather(
+            scheduler.generate(["a"], on_step=lambda step, total: steps["a"].append((step, total))),
+            scheduler.generate(["b"], on_step=lambda step, total: steps["b"].append((step, total))),
+        )
+
+    _run(generator, scenario, max_wait_ms=50)
+
+    assert steps == {"a": [(1, 1)], "b": [(1, 1)]}
+
+
+def test_pipeline_errors_are_raised_to_each_caller():
+    generator = _FakeGenerator(fail=True)
+
+    async def scenario(scheduler):
+        return await asyncio.gather(
+            scheduler.generate(["a"]), scheduler.generate(["b"]), return_exceptions=True
+        )
+
+    results = _run(generator, scenario, max_wait_ms=50)
+
+    assert [str(result) for result in results] == ["pipeline failed", "pipeline failed"]
+
+
+def test_cancelled_callers_are_dropped_before_dispatch():
+    generator = _FakeGenerator()
+
+    async def scenario(scheduler):
+        abandoned = scheduler.submit(["abandoned"])
+        abandoned[0].cancel()
+        return await scheduler.generate(["kept"])
+
+    images, _ = _run(generator, scenario, max_wait_ms=20)
+
+    assert images == ["kept"]
+    assert generator.batches == [["kept"]]
+
+
+def test_submit_validates_its_arguments():
+    async def scenario(scheduler):
+        with pytest.raises(ValueError):
+            scheduler.submit(["a", "b"], seeds=[1])
+        with pytest.raises(ValueError):
+            scheduler.submit(["a"], model_id="unknown")
+
+    _run(_FakeGenerator(), scenario)
+
+
+def test_submit_requires_a_started_scheduler():
+    scheduler = _scheduler(_FakeGenerator())
+    try:
+        with pytest.raises(RuntimeError):
+            scheduler.submit(["a"])
+    finally:
+        scheduler.worker.shutdown()
@@ -0,0 +1,141 @@
+"""Tests for training-ready dataset exports and metadata sidecars."""
+
+import json
+import os
+import sys
+import tarfile
+
+import pytest
+
+import export_dataset
+from config.database import SessionLocal
+from models.generation_db import Generation, STATUS_FAILED
+from utils.dataset_export import (
+    METADATA_FILENAME,
+    export_datasets,
+    read_metadata,
+    sweep_exports,
+    write_metadata,
+)
+
+
+def _generations(*generation_ids):
+    db = SessionLocal()
+    try:
+        by_id = {g.id: g for g in db.query(Generation).filter(Generation.id.in_(generation_ids))}
+        return [by_id[generation_id] for generation_id in generation_ids]
+    finally:
+        db.close()
+
+
+def _members(shard_path):
+    with tarfile.open(shard_path) as tar:
+        return {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+
+
+def test_metadata_sidecar_round_trip(tmp_path):
+    records = [{"filename": "cat_001.png", "seed": 7}, {"filename": "cat_002.png", "prompt": "a cat"}]
+
+    path = write_metadata(str(tmp_path), records)
+
+    assert os.path.basename(path) == METADATA_FILENAME
+    assert read_metadata(str(tmp_path)) == {record["filename"]: record for record in records}
+    # No temporary files are left behind
+    assert os.listdir(tmp_path) == [METADATA_FILENAME]
+    assert read_metadata(str(tmp_path / "missing")) == {}
+
+
+def test_webdataset_shards_hold_each_sample_with_its_labels(add_generation, tmp_path):
+    cats = add_generation("cat", images=3)
+    dogs = add_generation("dog", images=2, noise_level=0.5)
+    cat_directory = _generations(cats)[0].output_directory
+    write_metadata(cat_directory, [{"filename": "cat_001.png", "seed": 42, "prompt": "a cat"}])
+
+    index = export_datasets(_generations(dogs, cats), str(tmp_path), "webdataset", shard_size=2)
+
+    assert index["classes"] == ["cat", "dog"]
+    assert index["sample_count"] == 5
+    assert [shard["filename"] for shard in index["shards"]] == [
+        "shard-000000.tar", "shard-000001.tar", "shard-000002.tar"
+    ]
+    assert [shard["samples"] for shard in index["shards"]] == [2, 2, 1]
+    with open(tmp_path / "index.json") as f:
+        assert json.load(f) == index
+
+    members = {}
+    for shard in index["shards"]:
+        shard_members = _members(tmp_path / shard["filename"])
+        assert shard["size_bytes"] == os.path.getsize(tmp_path / shard["filename"])
+        assert len(shard_members) == 3 * shard["samples"]
+        members.update(shard_members)
+
+    key = f"{cats}_cat_001"
+    assert {f"{key}.png", f"{key}.cls", f"{key}.json"} <= set(members)
+    with open(os.path.join(cat_directory, "cat_001.png"), "rb") as f:
+        assert members[f"{key}.png"] == f.read()
+    assert members[f"{key}.cls"] == b"0"
+    assert members[f"{dogs}_dog_001.cls"] == b"1"
+    # Sidecar metadata is merged over the generation's labels
+    metadata = json.loads(members[f"{key}.json"])
+    assert metadata["seed"] == 42 and metadata["prompt"] == "a cat"
+    assert metadata["class_label"] == "cat" and metadata["generation_id"] == cats
+    assert json.loads(members[f"{dogs}_dog_002.json"])["noise_level"] == 0.5
+
+
+def test_unknown_format_and_shard_size_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_datasets([], str(tmp_path), "tfrecord")
+    with pytest.raises(ValueError):
+        export_datasets([], str(tmp_path), "webdataset", shard_size=0)
+
+
+def test_parquet_rows_hold_image_bytes_and_labels(add_generation, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    generation_id = add_generation("cat", images=2)
+
+    index = export_datasets(_generations(generation_id), str(tmp_path), "parquet")
+
+    rows = pq.read_table(tmp_path / index["shards"][0]["filename"]).to_pylist()
+    assert [row["key"] for row in rows] == [f"{generation_id}_cat_001", f"{generation_id}_cat_002"]
+    assert rows[0]["class_index"] == 0 and rows[0]["image_format"] == "png"
+    assert rows[0]["image"][:8] == b"\x89PNG\r\n\x1a\n"
+
+
+def test_cli_exports_completed_generations_by_label(add_generation, tmp_path, monkeypatch, capsys):
+    add_generation("lynx", images=2)
+    add_generation("lynx", images=1)
+    add_generation("lynx", images=1, status=STATUS_FAILED)
+    output = tmp_path / "lynx"
+    monkeypatch.setattr(
+        sys, "argv", ["export_dataset.py", "--class-label", "lynx", "--shard-size", "2", "--output", str(output)]
+    )
+
+    export_dataset.main()
+
+    assert "Exported 3 images from 2 dataset(s) to 2 webdataset shard(s)" in capsys.readouterr().out
+    assert sorted(os.listdir(output)) == ["index.json", "shard-000000.tar", "shard-000001.tar"]
+
+
+def test_cli_fails_for_unknown_generations(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["export_dataset.py", "unknown", "--output", str(tmp_path / "out")])
+
+    with pytest.raises(SystemExit) as exit_info:
+        export_dataset.main()
+
+    assert exit_info.value.code == 1
+    assert "Not found or not completed: unknown" in capsys.readouterr().out
+    assert not (tmp_path / "out").exists()
+
+
+def test_sweep_deletes_expired_then_oldest_exports(tmp_path):
+    for age, name in enumerate(["newest", "newer", "older", "expired"]):
+        os.makedirs(tmp_path / name)
+        mtime = os.path.getmtime(tmp_path / name) - age * 3600
+        os.utime(tmp_path / name, (mtime, mtime))
+    (tmp_path / "notes.txt").write_text("not an export")
+
+    assert sweep_exports(str(tmp_path), max_age_seconds=2.5 * 3600, max_count=2) == 2
+
+    assert sorted(os.listdir(tmp_path)) == ["newer", "newest", "notes.txt"]
+    assert sweep_exports(str(tmp_path)) == 0
+    assert sweep_exports(str(tmp_path / "missing"), max_count=1) == 0
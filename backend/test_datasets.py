@@ -0,0 +1,70 @@
+"""Tests for /datasets keyset pagination and filters."""
+
+from models.generation_db import STATUS_COMPLETED, STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING
+
+
+def _walk_pages(client, limit, max_pages=20, **params):
+    """Follow X-Next-Cursor until it is absent; return the pages' ids."""
+    pages = []
+    cursor = None
+    while len(pages) < max_pages:
+        query = dict(params, limit=limit)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/datasets", params=query)
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+    raise AssertionError(f"pagination did not end after {max_pages} pages")
+
+
+def test_pages_cover_rows_created_in_the_same_second(client, add_generation):
+    ids = [add_generation("paging") for _ in range(7)]
+
+    pages = _walk_pages(client, limit=2, class_label="paging")
+
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    seen = [generation_id for page in pages for generation_id in page]
+    assert len(set(seen)) == len(seen)
+    # Newest first
+    assert seen == ids[::-1]
+
+
+def test_exact_final_page_has_no_cursor(client, add_generation):
+    for _ in range(4):
+        add_generation("paging-exact")
+
+    pages = _walk_pages(client, limit=2, class_label="paging-exact")
+
+    assert [len(page) for page in pages] == [2, 2]
+
+
+def test_successful_filter_excludes_unfinished_jobs(client, add_generation):
+    completed = add_generation("filtered", status=STATUS_COMPLETED)
+    failed = add_generation("filtered", status=STATUS_FAILED)
+    add_generation("filtered", status=STATUS_QUEUED)
+    add_generation("filtered", status=STATUS_RUNNING)
+
+    successful = client.get("/datasets", params={"class_label": "filtered", "successful": True}).json()
+    unsuccessful = client.get("/datasets", params={"class_label": "filtered", "successful": False}).json()
+
+    assert [row["id"] for row in successful] == [completed]
+    assert [row["id"] for row in unsuccessful] == [failed]
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/datasets", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_cursor_header_is_exposed_to_browsers(client, add_generation):
+    for _ in range(2):
+        add_generation("cors")
+
+    response = client.get(
+        "/datasets", params={"class_label": "cors", "limit": 1}, headers={"Origin": "http://example.com"}
+    )
+
+    exposed = response.headers["access-control-expose-headers"].lower()
+    assert "x-next-cursor" in exposed and "etag" in exposed
@@ -0,0 +1,94 @@
+"""Tests for recording generated images and listing datasets from the rows."""
+
+import asyncio
+import os
+
+from sqlalchemy import event
+
+from config.database import SessionLocal, async_engine
+from models.generated_image import GeneratedImage
+from models.generation_db import Generation, STATUS_QUEUED
+
+
+def _image_rows(generation_id):
+    db = SessionLocal()
+    try:
+        return db.query(GeneratedImage).filter(
+            GeneratedImage.generation_id == generation_id
+        ).order_by(GeneratedImage.image_index).all()
+    finally:
+        db.close()
+
+
+def _generation(generation_id):
+    db = SessionLocal()
+    try:
+        return db.query(Generation).filter(Generation.id == generation_id).first()
+    finally:
+        db.close()
+
+
+class _InsertSpy:
+    """Collects the INSERT statements run against ``generated_images``."""
+
+    def __init__(self):
+        self.inserts = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO generated_images"):
+            self.inserts.append(len(parameters) if executemany else 1)
+
+    def __enter__(self):
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(async_engine.sync_engine, "before_cursor_execute", self)
+
+
+def test_saved_images_are_recorded_in_bulk(main_module, add_generation, fake_inference):
+    generation_id = add_generation("recorded", status=STATUS_QUEUED, output_size=4, seed=1000)
+
+    with _InsertSpy() as spy:
+        asyncio.run(main_module._run_generation(generation_id))
+
+    generation = _generation(generation_id)
+    files = sorted(os.listdir(generation.output_directory))
+    saved = [name for name in files if name.endswith(main_module.image_writer.extension)]
+    rows = _image_rows(generation_id)
+    assert generation.file_count == generation.images_done == len(saved) == len(rows) == 4
+    # Fewer statements than images: images written together share one INSERT
+    assert sum(spy.inserts) == 4 and len(spy.inserts) < 4
+    for i, row in enumerate(rows):
+        assert row.image_index == i
+        assert os.path.basename(row.file_path) == saved[i]
+        assert row.file_size == os.path.getsize(row.file_path)
+        assert row.seed == 1000 + i
+        assert row.prompt and row.model_id == generation.model_id
+        assert (row.width, row.height) == (512, 512)
+        assert row.device == "test" and row.is_successful
+
+
+def test_cache_hits_and_reruns_are_recorded_once(main_module, add_generation, fake_inference):
+    first = add_generation("recorded-cache", status=STATUS_QUEUED, output_size=2, seed=2000)
+    asyncio.run(main_module._run_generation(first))
+    # Same label and seeds: served from the result cache
+    second = add_generation("recorded-cache", status=STATUS_QUEUED, output_size=2, seed=2000)
+    asyncio.run(main_module._run_generation(second))
+    # A requeued job keeps the rows of its earlier run
+    asyncio.run(main_module._run_generation(second))
+
+    rows = _image_rows(second)
+    assert [row.image_index for row in rows] == [0, 1]
+    assert all(row.device == "cache" and row.generation_time == 0.0 for row in rows)
+
+
+def test_previews_follow_image_order(main_module, client, add_generation, fake_inference):
+    generation_id = add_generation("recorded-preview", status=STATUS_QUEUED, output_size=3)
+    asyncio.run(main_module._run_generation(generation_id))
+    paths = [row.file_path for row in _image_rows(generation_id)]
+
+    response = client.get(f"/preview/{generation_id}")
+
+    assert response.status_code == 200
+    assert response.json()["preview_urls"] == main_module._preview_urls(generation_id, paths)
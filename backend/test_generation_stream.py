@@ -0,0 +1,190 @@
+"""Tests for the Server-Sent Events progress stream and cancelled jobs."""
+
+import asyncio
+import json
+
+import pytest
+
+from config.database import AsyncSessionLocal, SessionLocal, async_engine
+from models.generation_db import Generation, STATUS_COMPLETED, STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING
+
+
+def _parse(chunk: str):
+    """Turn one SSE message into ``(event, data)``; comments become ``(":", text)``."""
+    if chunk.startswith(":"):
+        return ":", chunk[1:].strip()
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+class _Stream:
+    """Reads events one at a time from ``stream_generation``."""
+
+    def __init__(self, main_module, generation_id):
+        self.main = main_module
+        self.generation_id = generation_id
+
+    async def __aenter__(self):
+        self.db = AsyncSessionLocal()
+        response = await self.main.stream_generation(self.generation_id, self.db)
+        self.body = response.body_iterator
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.body.aclose()
+        await self.db.close()
+
+    async def next(self):
+        return _parse(await asyncio.wait_for(anext(self.body), timeout=5))
+
+    async def rest(self):
+        return [_parse(chunk) async for chunk in self.body]
+
+
+def _set_status(generation_id, **fields):
+    db = SessionLocal()
+    try:
+        db.query(Generation).filter(Generation.id == generation_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_stream_reports_progress_images_and_completion(main_module, add_generation):
+    generation_id = add_generation(images=2, status=STATUS_RUNNING)
+
+    async def scenario():
+        progress = main_module.job_queue.track(generation_id, 2, 4)
+        async with _Stream(main_module, generation_id) as stream:
+            events = [await stream.next(), await stream.next()]
+            await asyncio.to_thread(progress.update, 0, 3, 4)
+            events.append(await stream.next())
+            progress.add_image("cat_001.png")
+            progress.update(1, 4, 4)
+            events += [await stream.next(), await stream.next()]
+
+            _set_status(generation_id, status=STATUS_COMPLETED, images_done=2)
+            main_module.job_queue.forget(generation_id)
+            return events + await stream.rest()
+
+    events = asyncio.run(scenario())
+
+    assert events[0] == ("status", {"status": STATUS_RUNNING})
+    progress_events = [data for event, data in events if event == "progress"]
+    assert [(p["images_done"], p["current_step"]) for p in progress_events] == [(0, 0), (0, 3), (1, 4)]
+    assert progress_events[-1]["images_total"] == 2
+    # Images saved while running are sent live, the rest replayed at the end
+    images = [data for event, data in events if event == "image"]
+    assert [image["filename"] for image in images] == ["cat_001.png", "cat_002.png"]
+    assert all(image["thumbnail"] for image in images)
+    assert events[-1] == ("done", {
+        "status": STATUS_COMPLETED, "images_done": 2, "images_total": 2,
+        "error_message": None, "download_link": f"/download/{generation_id}",
+    })
+
+
+def test_idle_stream_sends_keep_alive(main_module, add_generation, monkeypatch):
+    monkeypatch.setattr(main_module, "STREAM_KEEPALIVE_SECONDS", 0.05)
+    generation_id = add_generation(images=1, status=STATUS_RUNNING)
+
+    async def scenario():
+        main_module.job_queue.track(generation_id, 1, 4)
+        try:
+            async with _Stream(main_module, generation_id) as stream:
+                return [await stream.next() for _ in range(3)]
+        finally:
+            main_module.job_queue.forget(generation_id)
+
+    events = asyncio.run(scenario())
+
+    assert [event for event, _ in events] == ["status", "progress", ":"]
+    assert events[2] == (":", "keep-alive")
+
+
+@pytest.fixture
+def stalled_inference(main_module, monkeypatch):
+    """Make generation wait forever for images, without loading a model."""
+    handle = main_module.model_registry.handle()
+    monkeypatch.setattr(handle, "cache_params", lambda: {"device": "cpu"})
+
+    def submit(prompts, **params):
+        loop = asyncio.get_running_loop()
+        return [loop.create_future() for _ in prompts]
+
+    monkeypatch.setattr(main_module.batch_scheduler, "submit", submit)
+
+
+async def _start_job(main_module, generation_id, **options):
+    task = asyncio.create_task(main_module._run_generation(generation_id, **options))
+    while main_module.job_queue.get_progress(generation_id) is None:
+        await asyncio.sleep(0.01)
+    return task
+
+
+def test_cancelled_synchronous_job_ends_the_stream_as_failed(main_module, add_generation, stalled_inference):
+    generation_id = add_generation(status=STATUS_QUEUED, output_size=2)
+
+    async def scenario():
+        task = await _start_job(main_module, generation_id, requeue_if_cancelled=False)
+        async with _Stream(main_module, generation_id) as stream:
+            first = await stream.next()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return [first] + await stream.rest()
+
+    events = asyncio.run(scenario())
+
+    assert events[0] == ("status", {"status": STATUS_RUNNING})
+    event, done = events[-1]
+    assert event == "done"
+    assert done["status"] == STATUS_FAILED
+    assert done["error_message"] == "Cancelled before completion"
+    assert done["download_link"] is None
+
+
+def test_waiting_job_holds_no_database_connection(main_module, add_generation, stalled_inference, monkeypatch):
+    generation_id = add_generation(status=STATUS_QUEUED, output_size=2)
+    stalled_submit = main_module.batch_scheduler.submit
+    waiting = []
+
+    def submit(prompts, **params):
+        waiting.append(prompts)
+        return stalled_submit(prompts, **params)
+
+    monkeypatch.setattr(main_module.batch_scheduler, "submit", submit)
+
+    async def scenario():
+        task = asyncio.create_task(main_module._run_generation(generation_id))
+        while not waiting:
+            await asyncio.sleep(0.01)
+        checked_out = async_engine.pool.checkedout()
+        # Other requests can still read while the job waits for its images
+        async with AsyncSessionLocal() as db:
+            generation = await db.get(Generation, generation_id)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return checked_out, generation.status
+
+    assert asyncio.run(scenario()) == (0, STATUS_RUNNING)
+
+
+def test_job_cancelled_by_shutdown_is_queued_again(main_module, add_generation, stalled_inference):
+    generation_id = add_generation(status=STATUS_QUEUED, output_size=2)
+
+    async def scenario():
+        task = await _start_job(main_module, generation_id)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    db = SessionLocal()
+    try:
+        generation = db.query(Generation).filter(Generation.id == generation_id).first()
+        assert generation.status == STATUS_QUEUED
+        assert generation.error_message is None
+    finally:
+        db.close()
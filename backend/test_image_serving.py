@@ -0,0 +1,137 @@
+"""Tests for cached image, archive and sample feed responses."""
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from models.generation_db import STATUS_QUEUED
+
+
+@pytest.fixture
+def image(main_module, add_generation):
+    """(generation id, file name, content) of a finished dataset's first image."""
+    generation_id = add_generation("served", images=2)
+    filename = "served_001.png"
+    with open(os.path.join(main_module.OUTPUT_BASE_DIR, generation_id, filename), "rb") as f:
+        return generation_id, filename, f.read()
+
+
+def test_image_is_served_with_a_content_etag(client, image):
+    generation_id, filename, content = image
+
+    response = client.get(f"/datasets/{generation_id}/images/{filename}")
+
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_matching_if_none_match_returns_304(client, image):
+    generation_id, filename, _ = image
+    url = f"/datasets/{generation_id}/images/{filename}"
+    etag = client.get(url).headers["etag"]
+
+    response = client.get(url, headers={"If-None-Match": f'"other", {etag}'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-9", 0, 9),
+    ("bytes=10-", 10, None),
+    ("bytes=-5", -5, None),
+])
+def test_single_range_returns_partial_content(client, image, header, start, end):
+    generation_id, filename, content = image
+    expected = content[start:end + 1] if end is not None else content[start:]
+    first = start if start >= 0 else len(content) + start
+    last = end if end is not None else len(content) - 1
+
+    response = client.get(f"/datasets/{generation_id}/images/{filename}", headers={"Range": header})
+
+    assert response.status_code == 206
+    assert response.content == expected
+    assert response.headers["content-range"] == f"bytes {first}-{last}/{len(content)}"
+
+
+def test_unsatisfiable_range_returns_416(client, image):
+    generation_id, filename, content = image
+
+    response = client.get(
+        f"/datasets/{generation_id}/images/{filename}", headers={"Range": f"bytes={len(content)}-"}
+    )
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+
+def test_stale_if_range_returns_the_whole_image(client, image):
+    generation_id, filename, content = image
+    url = f"/datasets/{generation_id}/images/{filename}"
+    etag = client.get(url).headers["etag"]
+
+    current = client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert current.status_code == 206 and len(current.content) == 10
+    assert stale.status_code == 200 and stale.content == content
+
+
+@pytest.mark.parametrize("filename", ["missing.png", "manifest.json", "..%2Fother.png"])
+def test_unknown_images_return_404(client, image, filename):
+    generation_id, _, _ = image
+
+    assert client.get(f"/datasets/{generation_id}/images/{filename}").status_code == 404
+
+
+
+def test_archive_is_built_once_and_reused(main_module, client, add_generation):
+    generation_id = add_generation("archived", images=2)
+    builds = main_module.archive_cache.stats()["builds"]
+
+    first = client.get(f"/download/{generation_id}")
+    # A result cache hit in a later job touches hard-linked images
+    os.utime(os.path.join(main_module.OUTPUT_BASE_DIR, generation_id, "archived_001.png"), (0, 0))
+    second = client.get(f"/download/{generation_id}")
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["etag"] == f'"{hashlib.sha256(first.content).hexdigest()}"'
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.content == first.content
+    assert main_module.archive_cache.stats()["builds"] == builds + 1
+
+
+def test_samples_since_cursor_and_revalidation(main_module, client):
+    main_module.sample_feed.add({"id": "first"})
+    response = client.get("/samples")
+    cursor, etag = response.json()["cursor"], response.headers["etag"]
+    assert response.json()["samples"][0]["id"] == "first"
+
+    assert client.get("/samples", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/samples", params={"since": cursor}).json()["samples"] == []
+
+    main_module.sample_feed.add({"id": "second"})
+    assert client.get("/samples", headers={"If-None-Match": etag}).status_code == 200
+    newer = client.get("/samples", params={"since": cursor}).json()
+    assert [sample["id"] for sample in newer["samples"]] == ["second"]
+    assert newer["cursor"] > cursor
+
+
+def test_completed_generation_is_added_to_samples(main_module, client, add_generation, fake_inference):
+    cursor = client.get("/samples").json()["cursor"]
+    generation_id = add_generation("red car #1", status=STATUS_QUEUED, output_size=2)
+
+    asyncio.run(main_module._run_generation(generation_id))
+
+    sample, = client.get("/samples", params={"since": cursor}).json()["samples"]
+    assert (sample["id"], sample["class_label"], sample["file_count"]) == (generation_id, "red car #1", 2)
+    assert sample["preview"]
+    assert sample["preview_url"] == f"/datasets/{generation_id}/thumbnails/red%20car%20%231_001.png"
+    assert client.get(sample["preview_url"]).status_code == 200
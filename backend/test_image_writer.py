@@ -0,0 +1,135 @@
+"""Tests for the background image writer."""
+
+import asyncio
+import threading
+
+import pytest
+from PIL import Image
+
+from utils.image_writer import ImageWriter
+
+
+class _BlockingImage:
+    """Image whose encoding waits until ``release`` is set."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.mode = "RGB"
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def save(self, fp, format=None, **options):
+        self.started.set()
+        self.release.wait(timeout=5)
+        if self.fail:
+            raise OSError("encoder failed")
+        Image.new("RGB", (4, 4)).save(fp, format=format, **options)
+
+
+def _image(color="red"):
+    return Image.new("RGB", (8, 8), color)
+
+
+def test_write_returns_once_the_file_is_in_place(tmp_path):
+    writer = ImageWriter()
+    path = str(tmp_path / "a.png")
+
+    async def scenario():
+        return await writer.write(_image(), path)
+
+    try:
+        assert asyncio.run(scenario()) == path
+    finally:
+        writer.shutdown()
+
+    with Image.open(path) as written:
+        assert written.size == (8, 8)
+    assert writer.images_written == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["a.png"]
+
+
+def test_submit_returns_before_the_image_is_encoded(tmp_path):
+    writer = ImageWriter()
+    image = _BlockingImage()
+    path = tmp_path / "slow.png"
+
+    async def scenario():
+        write = await writer.submit(image, str(path))
+        await asyncio.to_thread(image.started.wait, 5)
+        queued = (write.done(), writer.pending, path.exists())
+        image.release.set()
+        await write
+        return queued
+
+    try:
+        assert asyncio.run(scenario()) == (False, 1, False)
+    finally:
+        writer.shutdown()
+    assert path.exists() and writer.pending == 0
+
+
+def test_submit_waits_while_the_queue_is_full(tmp_path):
+    writer = ImageWriter(max_workers=1, max_pending=1)
+    blocking = _BlockingImage()
+
+    async def scenario():
+        first = await writer.submit(blocking, str(tmp_path / "first.png"))
+        second = asyncio.ensure_future(writer.submit(_image(), str(tmp_path / "second.png")))
+        await asyncio.sleep(0.05)
+        waited = not second.done()
+        blocking.release.set()
+        await first
+        await (await second)
+        return waited
+
+    try:
+        assert asyncio.run(scenario())
+    finally:
+        writer.shutdown()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["first.png", "second.png"]
+
+
+def test_shutdown_finishes_queued_writes(tmp_path):
+    writer = ImageWriter(max_workers=1)
+
+    async def scenario():
+        for i in range(3):
+            await writer.submit(_image(), str(tmp_path / f"{i}.png"))
+
+    asyncio.run(scenario())
+    writer.shutdown(wait=True)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["0.png", "1.png", "2.png"]
+    assert writer.images_written == 3
+
+
+def test_errors_are_raised_when_the_write_is_awaited(tmp_path):
+    writer = ImageWriter(max_pending=1)
+    failing = _BlockingImage(fail=True)
+    failing.release.set()
+
+    async def scenario():
+        write = await writer.submit(failing, str(tmp_path / "broken.png"))
+        with pytest.raises(OSError, match="encoder failed"):
+            await write
+        with pytest.raises(FileNotFoundError):
+            await writer.write(_image(), str(tmp_path / "missing" / "a.png"))
+        # Failed writes free their queue slot
+        return await writer.write(_image(), str(tmp_path / "ok.png"))
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        writer.shutdown()
+
+    # The temporary file of the failed write is removed
+    assert [p.name for p in tmp_path.iterdir()] == ["ok.png"]
+    assert writer.images_written == 1 and writer.pending == 0
+
+
+def test_formats_and_cache_params():
+    assert ImageWriter("webp", quality=80).extension == ".webp"
+    assert ImageWriter("png").cache_params() == {"format": "png"}
+    assert ImageWriter("jpeg", quality=150).cache_params() == {"format": "jpeg", "quality": 100}
+    with pytest.raises(ValueError):
+        ImageWriter("gif")
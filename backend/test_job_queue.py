@@ -0,0 +1,48 @@
+"""Tests for live job progress shared between threads and the event loop."""
+
+import asyncio
+import threading
+
+from utils.job_queue import JobProgress, JobQueue
+
+
+def test_updates_from_another_thread_wake_waiters():
+    async def scenario():
+        progress = JobProgress("job", images_total=2, total_steps=4)
+        # Report the way the step callback does, from a thread off the loop
+        thread = threading.Thread(target=progress.update, args=(1, 2, 4))
+        thread.start()
+        changed = await progress.wait_for_change(0, timeout=5)
+        thread.join()
+        return changed, progress.version, progress.fraction
+
+    changed, version, fraction = asyncio.run(scenario())
+
+    assert changed and version == 1
+    assert fraction == (1 + 2 / 4) / 2
+
+
+def test_waiting_times_out_without_changes():
+    async def scenario():
+        progress = JobProgress("job", images_total=1)
+        progress.add_image("cat_001.png")
+        await asyncio.sleep(0)
+        # Already past version 0, so no wait
+        assert await progress.wait_for_change(0, timeout=5)
+        return await progress.wait_for_change(progress.version, timeout=0.05)
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_forget_closes_the_progress():
+    async def scenario():
+        queue = JobQueue()
+        progress = queue.track("job", images_total=3)
+        queue.forget("job")
+        await asyncio.sleep(0)
+        return progress, queue.get_progress("job")
+
+    progress, tracked = asyncio.run(scenario())
+
+    assert progress.closed and progress.version == 1
+    assert tracked is None
@@ -0,0 +1,103 @@
+"""Tests for the per-label counters behind /stats."""
+
+import asyncio
+import time
+
+import pytest
+
+from config.database import AsyncSessionLocal, SessionLocal, async_engine
+from models.generation_db import STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING
+from models.label_counters import LabelCounter, increment_label_counters, rebuild_label_counters
+
+
+def _counters(class_label):
+    db = SessionLocal()
+    try:
+        counter = db.query(LabelCounter).filter(LabelCounter.class_label == class_label).first()
+        if counter is None:
+            return None
+        return (counter.generations, counter.successful_generations,
+                counter.failed_generations, counter.total_images)
+    finally:
+        db.close()
+
+
+def _increment(class_label, **increments):
+    async def increment():
+        async with AsyncSessionLocal() as db:
+            await increment_label_counters(db, class_label, **increments)
+            await db.commit()
+
+    asyncio.run(increment())
+
+
+def test_upsert_creates_then_adds_to_a_label(client):
+    _increment("upserted", generations=1)
+    _increment("upserted", generations=1, successful_generations=1, total_images=4)
+
+    # The SQLite INSERT ... ON CONFLICT path, as on PostgreSQL
+    assert async_engine.dialect.name == "sqlite"
+    assert _counters("upserted") == (2, 1, 0, 4)
+
+
+def test_unknown_counters_are_rejected(client):
+    with pytest.raises(ValueError, match="Unknown label counters: images"):
+        _increment("unknown-counter", images=1)
+    assert _counters("unknown-counter") is None
+
+
+def test_completed_generation_is_counted(main_module, add_generation, fake_inference):
+    generation_id = add_generation("counted", status=STATUS_QUEUED, output_size=3)
+
+    asyncio.run(main_module._run_generation(generation_id))
+
+    assert _counters("counted") == (0, 1, 0, 3)
+
+
+def test_failed_generation_is_counted(main_module, add_generation, fake_inference):
+    fake_inference["error"] = RuntimeError("out of memory")
+    generation_id = add_generation("counted-failure", status=STATUS_QUEUED, output_size=2)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main_module._run_generation(generation_id))
+
+    assert _counters("counted-failure") == (0, 0, 1, 0)
+
+
+def test_rebuild_counts_only_finished_generations(add_generation):
+    add_generation("rebuilt", images=3)
+    add_generation("rebuilt", images=2)
+    add_generation("rebuilt", status=STATUS_FAILED)
+    add_generation("rebuilt", status=STATUS_RUNNING)
+    _increment("rebuilt", generations=100)
+
+    async def rebuild():
+        async with AsyncSessionLocal() as db:
+            labels = await rebuild_label_counters(db)
+            await db.commit()
+            return labels
+
+    labels = asyncio.run(rebuild())
+
+    assert labels >= 1
+    assert _counters("rebuilt") == (4, 2, 1, 5)
+
+
+def test_stats_are_cached_for_the_ttl(main_module, client, monkeypatch):
+    monkeypatch.setattr(main_module.settings, "stats_cache_ttl", 60)
+    monkeypatch.setattr(main_module, "_stats_cache", None)
+    _increment("cached-stats", generations=1, successful_generations=1, total_images=2)
+
+    first = client.get("/stats").json()
+    _increment("cached-stats", generations=1, successful_generations=1, total_images=2)
+    cached = client.get("/stats").json()
+    # Expire the cached response
+    monkeypatch.setattr(main_module, "_stats_cache", (time.monotonic() - 1, main_module._stats_cache[1]))
+    fresh = client.get("/stats").json()
+
+    assert cached == first
+    assert fresh["total_generations"] == first["total_generations"] + 1
+    assert fresh["total_images"] == first["total_images"] + 2
+    assert fresh["pending_generations"] == (
+        fresh["total_generations"] - fresh["successful_generations"] - fresh["failed_generations"]
+    )
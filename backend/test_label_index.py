@@ -0,0 +1,66 @@
+"""Tests for label autocomplete."""
+
+import asyncio
+
+from models.generation_db import STATUS_QUEUED
+from utils.label_index import LabelIndex
+
+
+def _index(**counts):
+    index = LabelIndex()
+    index.load((label.replace("_", " "), count) for label, count in counts.items())
+    return index
+
+
+def test_any_word_prefix_matches_case_insensitively():
+    index = _index(cat=1, cute_cat=1, caterpillar=1, dog=1, red_Car=1)
+
+    assert sorted(index.suggest("cat")) == ["cat", "caterpillar", "cute cat"]
+    assert index.suggest("CU") == ["cute cat"]
+    assert index.suggest("red  ca") == ["red Car"]
+    assert index.suggest("car") == ["red Car"]
+    assert index.suggest("x") == []
+
+
+def test_most_used_then_shorter_then_alphabetical_first():
+    index = _index(cat=2, cats=5, cute_cat=2, car=2)
+
+    assert index.suggest("ca") == ["cats", "car", "cat", "cute cat"]
+    # An empty query lists the most used labels
+    assert index.suggest("", limit=2) == ["cats", "car"]
+
+
+def test_limit_caps_suggestions():
+    index = _index(**{f"bird{i}": i for i in range(20)})
+
+    assert index.suggest("bird", limit=3) == ["bird19", "bird18", "bird17"]
+    assert len(index.suggest("bird")) == 10
+
+
+def test_additions_invalidate_memoized_results():
+    index = _index(cat=1, car=3)
+    assert index.suggest("ca") == ["car", "cat"]
+
+    index.add("cat", 5)
+    index.add("camel")
+    index.add("  ")
+
+    assert index.suggest("ca") == ["cat", "car", "camel"]
+    assert len(index) == 3
+
+
+def test_completed_generations_are_suggested(main_module, add_generation, fake_inference):
+    assert main_module.label_index.suggest("axolotl") == []
+    generation_id = add_generation("axolotl", status=STATUS_QUEUED, output_size=1)
+
+    asyncio.run(main_module._run_generation(generation_id))
+
+    assert main_module.label_index.suggest("axo") == ["axolotl"]
+
+
+def test_suggestions_are_cacheable(client):
+    response = client.get("/suggest/labels", params={"q": "ca", "limit": 2})
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert len(response.json()["suggestions"]) <= 2
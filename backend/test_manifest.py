@@ -0,0 +1,87 @@
+"""Tests for dataset file manifests."""
+
+import hashlib
+import json
+import os
+
+from PIL import Image
+
+from utils.manifest import MANIFEST_FILENAME, ManifestStore, build_manifest, load_manifest
+
+
+def _dataset(root, name="dataset", names=("cat_001.png", "cat_002.png")):
+    directory = root / name
+    directory.mkdir()
+    for i, filename in enumerate(names):
+        Image.new("RGB", (16 + i, 8), "green").save(directory / filename)
+    return str(directory)
+
+
+def test_manifest_round_trips_through_the_sidecar(tmp_path):
+    directory = _dataset(tmp_path)
+
+    written = build_manifest(directory, ["cat_002.png", "cat_001.png"])
+
+    assert load_manifest(directory) == written
+    first = written["files"][0]
+    with open(os.path.join(directory, "cat_002.png"), "rb") as f:
+        content = f.read()
+    assert first == {
+        "name": "cat_002.png", "size": len(content), "sha256": hashlib.sha256(content).hexdigest(),
+        "width": 17, "height": 8,
+    }
+    # Dataset order is kept, and no temporary files are left behind
+    assert [entry["name"] for entry in written["files"]] == ["cat_002.png", "cat_001.png"]
+    assert sorted(os.listdir(directory)) == ["cat_001.png", "cat_002.png", MANIFEST_FILENAME]
+
+
+def test_missing_or_outdated_manifests_are_rebuilt_from_the_directory(tmp_path):
+    directory = _dataset(tmp_path)
+
+    assert [entry["name"] for entry in load_manifest(directory)["files"]] == ["cat_001.png", "cat_002.png"]
+    with open(os.path.join(directory, MANIFEST_FILENAME), "w") as f:
+        json.dump({"version": 0, "files": []}, f)
+    assert len(load_manifest(directory)["files"]) == 2
+    with open(os.path.join(directory, MANIFEST_FILENAME), "w") as f:
+        f.write("{not json")
+    assert len(load_manifest(directory)["files"]) == 2
+    assert load_manifest(str(tmp_path / "missing")) is None
+
+
+def test_store_serves_repeated_reads_from_memory(tmp_path):
+    directory = _dataset(tmp_path)
+    store = ManifestStore()
+
+    assert [entry["name"] for entry in store.files(directory)] == ["cat_001.png", "cat_002.png"]
+    os.remove(os.path.join(directory, MANIFEST_FILENAME))
+
+    assert store.entry(directory, "cat_002.png")["width"] == 17
+    assert store.entry(directory, "notes.txt") is None
+    assert store.stats()["misses"] == 1 and store.stats()["hits"] == 2
+    # Served from memory: the sidecar was not written again
+    assert not os.path.exists(os.path.join(directory, MANIFEST_FILENAME))
+
+
+def test_building_a_dataset_replaces_its_cached_manifest(tmp_path):
+    directory = _dataset(tmp_path)
+    store = ManifestStore()
+    store.build(directory, ["cat_001.png"])
+    assert store.entry(directory, "cat_002.png") is None
+
+    Image.new("RGB", (4, 4), "red").save(os.path.join(directory, "cat_003.png"))
+    store.build(directory, ["cat_001.png", "cat_002.png", "cat_003.png"])
+
+    assert [entry["name"] for entry in store.files(directory)] == ["cat_001.png", "cat_002.png", "cat_003.png"]
+    assert store.stats()["misses"] == 0
+
+
+def test_least_recently_used_manifests_are_evicted(tmp_path):
+    first, second = _dataset(tmp_path, "first"), _dataset(tmp_path, "second")
+    store = ManifestStore(max_entries=1)
+
+    store.files(first)
+    store.files(second)
+    store.files(first)
+
+    assert store.stats()["entries"] == 1
+    assert store.stats()["misses"] == 3
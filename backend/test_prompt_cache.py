@@ -0,0 +1,61 @@
+"""Tests for the text-encoder output cache."""
+
+from models.prompt_cache import PromptEmbeddingCache
+
+
+def test_hit_returns_the_stored_embeddings():
+    cache = PromptEmbeddingCache(max_entries=4)
+    cache.put(("sd", "a cat", None), ("embeds", "negative"))
+
+    assert cache.get(("sd", "a cat", None)) == ("embeds", "negative")
+    assert cache.get(("sd", "a dog", None)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_models_and_negative_prompts_get_separate_entries():
+    cache = PromptEmbeddingCache(max_entries=4)
+    cache.put(("sd-1.5", "a cat", None), ("sd-1.5",))
+    cache.put(("sd-turbo", "a cat", None), ("sd-turbo",))
+    cache.put(("sd-1.5", "a cat", "blurry"), ("blurry",))
+
+    assert cache.get(("sd-1.5", "a cat", None)) == ("sd-1.5",)
+    assert cache.get(("sd-turbo", "a cat", None)) == ("sd-turbo",)
+    assert cache.get(("sd-1.5", "a cat", "blurry")) == ("blurry",)
+    assert cache.get(("sd-turbo", "a cat", "blurry")) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PromptEmbeddingCache(max_entries=2)
+    cache.put(("sd", "a", None), ("a",))
+    cache.put(("sd", "b", None), ("b",))
+    # Using "a" makes "b" the least recently used
+    assert cache.get(("sd", "a", None)) == ("a",)
+
+    cache.put(("sd", "c", None), ("c",))
+
+    assert cache.get(("sd", "b", None)) is None
+    assert cache.get(("sd", "a", None)) == ("a",)
+    assert cache.get(("sd", "c", None)) == ("c",)
+    assert cache.stats()["entries"] == 2
+
+
+def test_clear_can_drop_a_single_model():
+    cache = PromptEmbeddingCache()
+    cache.put(("sd-1.5", "a cat", None), ("sd-1.5",))
+    cache.put(("sd-turbo", "a cat", None), ("sd-turbo",))
+
+    cache.clear("sd-1.5")
+
+    assert cache.get(("sd-1.5", "a cat", None)) is None
+    assert cache.get(("sd-turbo", "a cat", None)) == ("sd-turbo",)
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_entries_disables_the_cache():
+    cache = PromptEmbeddingCache(max_entries=0)
+    cache.put(("sd", "a cat", None), ("embeds",))
+
+    assert cache.get(("sd", "a cat", None)) is None
+    assert cache.stats()["entries"] == 0
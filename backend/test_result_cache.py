@@ -0,0 +1,100 @@
+"""Tests for the content-addressed result cache."""
+
+import os
+
+from utils.result_cache import ResultCache
+
+
+def _image(path, size):
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+    return str(path)
+
+
+def test_key_depends_on_every_parameter_but_not_their_order():
+    key = ResultCache.make_key(prompt="a cat", seed=1, steps=20, dtype="float32")
+
+    assert key == ResultCache.make_key(dtype="float32", steps=20, seed=1, prompt="a cat")
+    assert key != ResultCache.make_key(prompt="a cat", seed=2, steps=20, dtype="float32")
+    assert key != ResultCache.make_key(prompt="a cat", seed=1, steps=20, dtype="bfloat16")
+
+
+def test_stored_image_is_fetched_with_identical_content(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=10_000)
+    source = _image(tmp_path / "generated.png", 100)
+    key = ResultCache.make_key(seed=1)
+
+    cache.store(key, source)
+    destination = str(tmp_path / "served.png")
+
+    assert cache.fetch(key, destination)
+    with open(source, "rb") as a, open(destination, "rb") as b:
+        assert a.read() == b.read()
+    assert cache.stats()["hits"] == 1
+
+
+def test_misses_on_unknown_keys_and_other_extensions(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=10_000)
+    key = ResultCache.make_key(seed=1)
+    cache.store(key, _image(tmp_path / "generated.png", 100))
+
+    assert not cache.fetch(ResultCache.make_key(seed=2), str(tmp_path / "a.png"))
+    assert not cache.fetch(key, str(tmp_path / "a.webp"))
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=250)
+    keys = [ResultCache.make_key(seed=seed) for seed in range(3)]
+    cache.store(keys[0], _image(tmp_path / "0.png", 100))
+    cache.store(keys[1], _image(tmp_path / "1.png", 100))
+    # Using the first entry makes the second the least recently used
+    assert cache.fetch(keys[0], str(tmp_path / "hit.png"))
+
+    cache.store(keys[2], _image(tmp_path / "2.png", 100))
+
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 200
+    assert not cache.fetch(keys[1], str(tmp_path / "evicted.png"))
+    assert cache.fetch(keys[0], str(tmp_path / "kept.png"))
+    assert cache.fetch(keys[2], str(tmp_path / "new.png"))
+
+
+def test_files_larger_than_the_budget_are_not_cached(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=50)
+    key = ResultCache.make_key(seed=1)
+
+    cache.store(key, _image(tmp_path / "large.png", 100))
+
+    assert cache.stats()["entries"] == 0
+    assert not cache.fetch(key, str(tmp_path / "served.png"))
+
+
+def test_entries_survive_a_restart(tmp_path):
+    directory = str(tmp_path / "cache")
+    key = ResultCache.make_key(seed=1)
+    ResultCache(directory, max_bytes=10_000).store(key, _image(tmp_path / "generated.png", 100))
+
+    reopened = ResultCache(directory, max_bytes=10_000)
+
+    assert reopened.stats()["entries"] == 1
+    assert reopened.fetch(key, str(tmp_path / "served.png"))
+
+
+def test_deleted_entry_counts_as_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=10_000)
+    key = ResultCache.make_key(seed=1)
+    cache.store(key, _image(tmp_path / "generated.png", 100))
+    os.remove(os.path.join(cache.directory, key[:2], key + ".png"))
+
+    assert not cache.fetch(key, str(tmp_path / "served.png"))
+    assert cache.stats()["entries"] == 0 and cache.stats()["hits"] == 0
+
+
+def test_zero_budget_disables_the_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=0)
+    key = ResultCache.make_key(seed=1)
+    cache.store(key, _image(tmp_path / "generated.png", 100))
+
+    assert not cache.enabled
+    assert not cache.fetch(key, str(tmp_path / "served.png"))
+    assert not os.path.exists(cache.directory)
@@ -0,0 +1,58 @@
+"""Tests for the ring-buffer sample feed and its cursor."""
+
+import time
+
+from utils.sample_feed import SampleFeed
+
+
+def test_samples_are_returned_newest_first_with_increasing_seq():
+    feed = SampleFeed(max_entries=5)
+    for i in range(3):
+        feed.add({"id": str(i)})
+
+    samples = feed.since()
+
+    assert [sample["id"] for sample in samples] == ["2", "1", "0"]
+    assert samples[0]["seq"] == feed.cursor
+    assert samples[0]["seq"] > samples[1]["seq"] > samples[2]["seq"]
+
+
+def test_only_the_newest_samples_are_kept():
+    feed = SampleFeed(max_entries=3)
+    for i in range(5):
+        feed.add({"id": str(i)})
+
+    assert [sample["id"] for sample in feed.since()] == ["4", "3", "2"]
+
+
+def test_since_returns_only_newer_samples():
+    feed = SampleFeed()
+    feed.add({"id": "old"})
+    cursor = feed.cursor
+    feed.add({"id": "new"})
+
+    assert [sample["id"] for sample in feed.since(cursor)] == ["new"]
+    assert feed.since(feed.cursor) == []
+
+
+def test_cursor_from_an_earlier_process_returns_every_sample():
+    earlier = SampleFeed()
+    earlier.add({"id": "before restart"})
+    time.sleep(0.01)
+
+    feed = SampleFeed()
+    feed.add({"id": "after restart"})
+
+    assert feed.cursor > earlier.cursor
+    assert [sample["id"] for sample in feed.since(earlier.cursor)] == ["after restart"]
+
+
+def test_etag_changes_only_when_a_sample_is_added():
+    feed = SampleFeed()
+    etag = feed.etag
+
+    assert feed.etag == etag
+    feed.since()
+    assert feed.etag == etag
+    feed.add({"id": "1"})
+    assert feed.etag != etag
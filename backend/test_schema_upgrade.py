@@ -0,0 +1,128 @@
+"""Tests for upgrading tables created by earlier versions in place."""
+
+from sqlalchemy import create_engine, inspect, text
+
+from models.generation_db import STATUS_COMPLETED, STATUS_FAILED
+from models.schema_upgrade import upgrade_schema
+
+# Tables as the first release created them
+LEGACY_SCHEMA = [
+    """CREATE TABLE generations (
+        id VARCHAR(36) PRIMARY KEY,
+        class_label VARCHAR(255) NOT NULL,
+        noise_level FLOAT NOT NULL,
+        output_size INTEGER NOT NULL,
+        output_directory VARCHAR(500) NOT NULL,
+        file_count INTEGER NOT NULL,
+        generation_time FLOAT NOT NULL,
+        device_used VARCHAR(50) NOT NULL,
+        is_successful BOOLEAN NOT NULL,
+        error_message TEXT,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+        updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+    )""",
+    """CREATE TABLE generated_images (
+        id INTEGER PRIMARY KEY,
+        prompt TEXT NOT NULL,
+        negative_prompt TEXT,
+        model_id VARCHAR(255) NOT NULL,
+        width INTEGER NOT NULL,
+        height INTEGER NOT NULL,
+        num_inference_steps INTEGER NOT NULL,
+        guidance_scale FLOAT NOT NULL,
+        seed INTEGER,
+        generation_time FLOAT NOT NULL,
+        device VARCHAR(50) NOT NULL,
+        file_path VARCHAR(500),
+        file_size INTEGER,
+        is_successful BOOLEAN NOT NULL,
+        error_message TEXT,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+        updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+    )""",
+]
+
+
+def _legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        for generation_id, successful, file_count in (("ok", 1, 3), ("broken", 0, 0)):
+            connection.execute(text(
+                "INSERT INTO generations (id, class_label, noise_level, output_size, output_directory,"
+                " file_count, generation_time, device_used, is_successful, created_at, updated_at)"
+                " VALUES (:id, 'cat', 0.1, 3, 'data/x', :file_count, 1.0, 'cpu', :successful,"
+                " '2024-01-01 10:00:00', '2024-01-02 10:00:00')"
+            ), {"id": generation_id, "successful": successful, "file_count": file_count})
+        connection.execute(text(
+            "INSERT INTO generated_images (prompt, model_id, width, height, num_inference_steps,"
+            " guidance_scale, generation_time, device, is_successful)"
+            " VALUES ('a cat', 'model', 512, 512, 20, 7.5, 1.0, 'cpu', 1)"
+        ))
+    return engine
+
+
+def test_missing_columns_and_indexes_are_added(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    with engine.begin() as connection:
+        changes = upgrade_schema(connection)
+
+    inspector = inspect(engine)
+    generation_columns = {column["name"] for column in inspector.get_columns("generations")}
+    assert {"status", "images_done", "started_at", "completed_at"} <= generation_columns
+    image_columns = {column["name"] for column in inspector.get_columns("generated_images")}
+    assert {"generation_id", "image_index"} <= image_columns
+    indexes = {index["name"] for index in inspector.get_indexes("generations")}
+    assert {"ix_generations_status", "ix_generations_status_created_at_id"} <= indexes
+    assert "added generations.status" in changes
+
+
+def test_image_rows_get_their_generation_link(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    with engine.begin() as connection:
+        upgrade_schema(connection)
+        legacy_row = connection.execute(text("SELECT generation_id, image_index FROM generated_images")).one()
+        foreign_key = connection.execute(text("PRAGMA foreign_key_list(generated_images)")).one()
+
+    assert (foreign_key.table, foreign_key._mapping["from"], foreign_key.to) == ("generations", "generation_id", "id")
+    assert foreign_key.on_delete == "CASCADE"
+    unique = {index["name"]: index for index in inspect(engine).get_indexes("generated_images")}
+    assert unique["uq_generated_images_generation_id_image_index"]["unique"]
+    assert tuple(legacy_row) == (None, None)
+
+
+def test_old_rows_read_as_finished_jobs(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    with engine.begin() as connection:
+        upgrade_schema(connection)
+        rows = {row.id: row for row in connection.execute(text(
+            "SELECT id, status, images_done, completed_at, created_at, updated_at FROM generations"
+        ))}
+
+    assert (rows["ok"].status, rows["ok"].images_done) == (STATUS_COMPLETED, 3)
+    assert (rows["broken"].status, rows["broken"].images_done) == (STATUS_FAILED, 0)
+    # Same-second values get the fraction new rows have, so they compare as text
+    assert rows["ok"].created_at == "2024-01-01 10:00:00.000000"
+    assert rows["ok"].completed_at.startswith("2024-01-01 10:00:00")
+    assert rows["ok"].updated_at == "2024-01-02 10:00:00"
+
+
+def test_upgrading_again_changes_nothing(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as connection:
+        upgrade_schema(connection)
+
+    with engine.begin() as connection:
+        assert upgrade_schema(connection) == []
+
+
+def test_missing_tables_are_left_to_create_all(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+
+    with engine.begin() as connection:
+        assert upgrade_schema(connection) == []
+    assert inspect(engine).get_table_names() == []
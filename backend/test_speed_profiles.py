@@ -0,0 +1,42 @@
+"""Tests for resolving speed profiles per model family."""
+
+import pytest
+
+from models.speed_profiles import SPEED_PROFILES, model_family, resolve_speed_profile
+
+
+def test_profile_sets_scheduler_steps_and_guidance():
+    assert resolve_speed_profile("runwayml/stable-diffusion-v1-5", "balanced") == {
+        "scheduler": "dpmpp", "num_inference_steps": 20, "guidance_scale": 7.5
+    }
+    assert resolve_speed_profile("stabilityai/sdxl-turbo", "turbo") == {
+        "scheduler": "default", "num_inference_steps": 1, "guidance_scale": 0.0
+    }
+    assert resolve_speed_profile("SimianLuo/LCM_Dreamshaper_v7", "quality")["scheduler"] == "lcm"
+
+
+def test_faster_profiles_never_take_more_steps():
+    for model_id in ("runwayml/stable-diffusion-v1-5", "stabilityai/sdxl-turbo", "latent-consistency/lcm-sdxl"):
+        steps = [resolve_speed_profile(model_id, profile)["num_inference_steps"] for profile in SPEED_PROFILES]
+        assert steps == sorted(steps, reverse=True)
+
+
+def test_explicit_values_override_the_profile():
+    settings = resolve_speed_profile(
+        "runwayml/stable-diffusion-v1-5", "turbo",
+        num_inference_steps=12, guidance_scale=None, scheduler="euler_a"
+    )
+
+    assert settings == {"scheduler": "euler_a", "num_inference_steps": 12, "guidance_scale": 7.0}
+
+
+def test_model_family_is_detected_from_the_id():
+    assert model_family("stabilityai/sdxl-turbo") == "turbo"
+    assert model_family("ByteDance/SDXL-Lightning") == "turbo"
+    assert model_family("latent-consistency/lcm-lora-sdv1-5") == "lcm"
+    assert model_family("runwayml/stable-diffusion-v1-5") == "standard"
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_speed_profile("stabilityai/sdxl-turbo", "ludicrous")
@@ -0,0 +1,101 @@
+"""Tests for precomputed WebP thumbnails and the thumbnail endpoint."""
+
+import base64
+import io
+import os
+
+from PIL import Image
+
+from utils.thumbnail_store import ThumbnailStore
+
+
+def _save_image(path, size=(64, 32)):
+    image = Image.new("RGB", size, "blue")
+    image.save(path)
+    return image
+
+
+def _decode(data):
+    with Image.open(io.BytesIO(data)) as thumbnail:
+        return thumbnail.format, thumbnail.size
+
+
+def test_create_writes_a_scaled_webp_next_to_the_dataset(tmp_path):
+    store = ThumbnailStore(size=16)
+    image_path = str(tmp_path / "cat_001.png")
+    image = _save_image(image_path)
+
+    data = store.create(image, image_path)
+
+    assert store.thumbnail_path(image_path) == str(tmp_path / "thumbnails" / "cat_001.webp")
+    with open(store.thumbnail_path(image_path), "rb") as f:
+        assert f.read() == data
+    # Aspect ratio is kept within the size bound
+    assert _decode(data) == ("WEBP", (16, 8))
+
+
+def test_missing_thumbnails_are_created_on_first_access(tmp_path):
+    store = ThumbnailStore(size=16)
+    image_path = str(tmp_path / "cat_001.png")
+    _save_image(image_path)
+
+    data = store.get(image_path)
+
+    assert _decode(data) == ("WEBP", (16, 8))
+    assert os.path.exists(store.thumbnail_path(image_path))
+    assert store.get(str(tmp_path / "missing.png")) is None
+
+
+def test_repeated_reads_are_served_from_memory(tmp_path):
+    store = ThumbnailStore(size=16, max_cache_entries=1)
+    first, second = str(tmp_path / "a.png"), str(tmp_path / "b.png")
+    store.create(_save_image(first), first)
+    store.create(_save_image(second), second)
+    # Only the most recent thumbnail fits in memory
+    os.remove(store.thumbnail_path(first))
+
+    assert store.get(second) is not None
+    assert store.stats()["hits"] == 1 and store.stats()["entries"] == 1
+    # Evicted from memory and removed from disk: regenerated from the image
+    assert store.get(first) is not None
+    assert store.stats()["misses"] == 1
+    assert os.path.exists(store.thumbnail_path(first))
+
+
+def test_previews_are_base64_in_the_given_order(tmp_path):
+    store = ThumbnailStore(size=16)
+    paths = [str(tmp_path / name) for name in ("cat_002.png", "missing.png", "cat_001.png")]
+    _save_image(paths[0])
+    _save_image(paths[2])
+
+    previews = store.previews(paths)
+
+    assert len(previews) == 2
+    assert base64.b64decode(previews[0]) == store.get(paths[0])
+    assert base64.b64decode(previews[1]) == store.get(paths[2])
+
+
+def test_thumbnail_endpoint_serves_immutable_webp(client, add_generation):
+    generation_id = add_generation(images=1)
+
+    response = client.get(f"/datasets/{generation_id}/thumbnails/cat_001.png")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert _decode(response.content)[0] == "WEBP"
+
+
+def test_thumbnail_endpoint_rejects_unknown_and_unsafe_names(client, add_generation):
+    generation_id = add_generation(images=1)
+
+    assert client.get(f"/datasets/{generation_id}/thumbnails/cat_009.png").status_code == 404
+    assert client.get(f"/datasets/{generation_id}/thumbnails/..%2Fsecret.png").status_code == 404
+    assert client.get(f"/datasets/{generation_id}/thumbnails/notes.txt").status_code == 404
+    assert client.get("/datasets/unknown/thumbnails/cat_001.png").status_code == 404
+
+
+def test_preview_urls_quote_file_names(main_module, tmp_path):
+    assert main_module._preview_urls("abc", [str(tmp_path / "red car #1_001.png")]) == [
+        "/datasets/abc/thumbnails/red%20car%20%231_001.png"
+    ]
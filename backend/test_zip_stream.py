@@ -0,0 +1,81 @@
+"""Tests for building ZIP downloads as a stream."""
+
+import io
+import os
+import zipfile
+
+from utils.utils import stream_zip_archive
+
+
+def _write(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+
+def _archive(chunks):
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+def test_stream_is_a_valid_zip_of_the_files(tmp_path):
+    files = {"cat_001.png": os.urandom(5000), "metadata.json": b'{"label": "cat"}' * 50}
+    paths = [_write(tmp_path / name, content) for name, content in files.items()]
+
+    archive = _archive(list(stream_zip_archive(paths)))
+
+    assert archive.testzip() is None
+    assert sorted(archive.namelist()) == sorted(files)
+    for name, content in files.items():
+        assert archive.read(name) == content
+
+
+def test_images_are_stored_and_other_files_deflated(tmp_path):
+    paths = [
+        _write(tmp_path / "cat_001.png", os.urandom(1000)),
+        _write(tmp_path / "cat_002.jpg", os.urandom(1000)),
+        _write(tmp_path / "notes.txt", b"text " * 200),
+    ]
+
+    archive = _archive(stream_zip_archive(paths))
+
+    compression = {info.filename: info.compress_type for info in archive.infolist()}
+    assert compression == {
+        "cat_001.png": zipfile.ZIP_STORED,
+        "cat_002.jpg": zipfile.ZIP_STORED,
+        "notes.txt": zipfile.ZIP_DEFLATED,
+    }
+    stored = archive.getinfo("cat_001.png")
+    assert stored.compress_size == stored.file_size
+
+
+def test_first_chunk_is_yielded_before_later_files_are_read(tmp_path):
+    first = _write(tmp_path / "cat_001.png", os.urandom(4096))
+    second = _write(tmp_path / "cat_002.png", b"original")
+
+    chunks = stream_zip_archive([first, second], chunk_size=1024)
+    head = next(chunks)
+    # Changing a file the stream has not reached yet shows up in the archive
+    _write(second, b"rewritten after the first chunk was sent")
+    archive = _archive([head, *chunks])
+
+    assert 0 < len(head) < 4096
+    assert archive.read("cat_002.png") == b"rewritten after the first chunk was sent"
+
+
+def test_memory_is_bounded_by_the_chunk_size(tmp_path):
+    path = _write(tmp_path / "large.png", os.urandom(64 * 1024))
+
+    chunks = list(stream_zip_archive([path], chunk_size=1024))
+
+    assert len(chunks) > 60
+    # A chunk is at most one read plus a local file header
+    assert max(len(chunk) for chunk in chunks) < 1024 + 128
+    assert _archive(chunks).testzip() is None
+
+
+def test_missing_files_are_skipped(tmp_path):
+    path = _write(tmp_path / "cat_001.png", b"image")
+
+    archive = _archive(stream_zip_archive([str(tmp_path / "gone.png"), path]))
+
+    assert archive.namelist() == ["cat_001.png"]
@@ -0,0 +1,197 @@
+"""Prebuilt dataset archives with size-capped LRU eviction.
+
+Popular datasets used to be zipped again for every download. The archive is
+now built once (when generation finishes, or on first download) and stored
+as ``<dataset>/dataset.zip``. A fingerprint of the dataset's files, kept by
+the caller (in the ``generations`` row), tells when the archive is stale.
+Archives across all datasets share one size budget; the least recently
+downloaded ones are deleted first and rebuilt on demand.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils import stream_zip_archive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_NAME = "dataset.zip"
+
+
+class ArchiveCache:
+    """Build, track and evict per-dataset ZIP archives."""
+
+    def __init__(self, root_directory: str, max_bytes: int) -> None:
+        """Initialize the cache and index archives already on disk.
+
+        Args:
+            root_directory: Directory holding one sub-directory per dataset.
+            max_bytes: Total size budget for archives. 0 disables caching.
+        """
+        self.root_directory = root_directory
+        self.max_bytes = max(0, max_bytes)
+        self.hits = 0
+        self.builds = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        if self.enabled:
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether archives are cached at all."""
+        return self.max_bytes > 0
+
+    @staticmethod
+    def archive_path(directory: str) -> str:
+        """Where the archive of a dataset directory is stored."""
+        return os.path.join(directory, ARCHIVE_NAME)
+
+    @staticmethod
+    def fingerprint(files: List[Dict[str, Any]]) -> str:
+        """Fingerprint a dataset's files by name, size and content hash.
+
+        Any added, removed or rewritten file changes the fingerprint, which
+        invalidates the archive built from the old set. Modification times
+        are deliberately left out: images hard-linked from the result cache
+        share an inode, so a cache hit in a later job touches them too.
+
+        Args:
+            files: Manifest entries (``name``, ``size``, ``sha256``) of the
+                files that go into the archive.
+
+        Returns:
+            Hex SHA-256 digest.
+        """
+        digest = hashlib.sha256()
+        for entry in sorted(files, key=lambda entry: entry["name"]):
+            digest.update(f"{entry['name']}:{entry['size']}:{entry['sha256']}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def touch(self, directory: str) -> bool:
+        """Mark a dataset's archive as used, if it still exists.
+
+        Args:
+            directory: Dataset directory.
+
+        Returns:
+            True if the archive is on disk, False if it must be rebuilt.
+        """
+        path = self.archive_path(directory)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._drop(path, delete=False)
+            return False
+        with self._lock:
+            if path not in self._entries:
+                # Built by an earlier process before this index existed
+                self._entries[path] = os.path.getsize(path)
+                self._total_bytes += self._entries[path]
+            self._entries.move_to_end(path)
+            self.hits += 1
+        return True
+
+    def build(self, directory: str, file_paths: List[str]) -> Tuple[str, str, int]:
+        """Build (or rebuild) a dataset's archive, evicting others if needed.
+
+        Blocks while zipping; run it off the event loop. Concurrent builds of
+        the same dataset are serialized.
+
+        Args:
+            directory: Dataset directory.
+            file_paths: Files to include.
+
+        Returns:
+            ``(path, sha256, size)`` of the new archive.
+
+        Raises:
+            OSError: If the archive cannot be written.
+        """
+        path = self.archive_path(directory)
+        with self._lock:
+            build_lock = self._build_locks.setdefault(path, threading.Lock())
+
+        with build_lock:
+            digest = hashlib.sha256()
+            size = 0
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in stream_zip_archive(file_paths):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+        with self._lock:
+            self._drop(path, delete=False)
+            self._entries[path] = size
+            self._total_bytes += size
+            self.builds += 1
+            self._evict(keep=path)
+        logger.info(f"Built archive {path} ({size} bytes)")
+        return path, digest.hexdigest(), size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/build counters."""
+        with self._lock:
+            return {
+                "archives": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "builds": self.builds,
+            }
+
+    def _load_index(self) -> None:
+        """Index existing archives, least recently used first."""
+        if not os.path.isdir(self.root_directory):
+            return
+        found = []
+        for name in os.listdir(self.root_directory):
+            path = self.archive_path(os.path.join(self.root_directory, name))
+            try:
+                stat = os.stat(path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            found.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _drop(self, path: str, delete: bool = True) -> None:
+        """Remove an archive from the index (and disk). Caller holds the lock."""
+        size = self._entries.pop(path, None)
+        if size is None:
+            return
+        self._total_bytes -= size
+        if delete:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Delete least recently used archives until within budget. Caller holds the lock."""
+        for path in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if path != keep:
+                logger.info(f"Evicting archive {path}")
+                self._drop(path)
@@ -0,0 +1,323 @@
+"""Training-ready dataset exports and per-image metadata sidecars.
+
+Per-image files in a ZIP are slow to feed to data loaders: every image is a
+separate random read. Exports pack one or more datasets into sequential-read
+shards instead:
+
+- ``webdataset``: tar shards where each sample is ``<key>.<ext>`` (image
+  bytes as saved), ``<key>.cls`` (integer class index) and ``<key>.json``
+  (labels and generation metadata).
+- ``parquet``: Parquet files with one row per image, holding the image bytes
+  next to ``class_label``, ``noise_level`` and the generation metadata.
+  Requires ``pyarrow``.
+
+Labels and generation metadata come from the ``metadata.jsonl`` sidecar
+written next to each dataset's images. Exports are temporary: ``sweep_exports``
+deletes them once expired or beyond a maximum count.
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .manifest import load_manifest
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILENAME = "metadata.jsonl"
+EXPORT_FORMATS = ("webdataset", "parquet")
+INDEX_FILENAME = "index.json"
+
+
+def write_metadata(directory: str, records: Sequence[Dict[str, Any]]) -> str:
+    """Atomically write a dataset's ``metadata.jsonl`` sidecar.
+
+    Args:
+        directory: Dataset directory.
+        records: One dictionary per image; each must have a ``filename``.
+
+    Returns:
+        Path of the sidecar.
+    """
+    path = os.path.join(directory, METADATA_FILENAME)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def read_metadata(directory: str) -> Dict[str, Dict[str, Any]]:
+    """Read a dataset's ``metadata.jsonl`` sidecar, keyed by file name.
+
+    Args:
+        directory: Dataset directory.
+
+    Returns:
+        Metadata per image file name; empty if the dataset has no sidecar.
+    """
+    path = os.path.join(directory, METADATA_FILENAME)
+    records: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["filename"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def iter_samples(generations: Sequence[Any]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Yield every image of the given datasets with its metadata.
+
+    Images saved before sidecars existed get the labels stored on their
+    generation row.
+
+    Args:
+        generations: ``Generation`` rows (or objects with the same
+            attributes) of completed datasets.
+
+    Yields:
+        ``(key, image path, metadata)`` with a key unique across datasets.
+    """
+    for generation in generations:
+        directory = generation.output_directory
+        sidecar = read_metadata(directory)
+        manifest = load_manifest(directory) or {"files": []}
+        for filename in (entry["name"] for entry in manifest["files"]):
+            metadata = {
+                "filename": filename,
+                "generation_id": generation.id,
+                "class_label": generation.class_label,
+                "noise_level": generation.noise_level,
+                "model_id": generation.model_id,
+            }
+            metadata.update(sidecar.get(filename, {}))
+            # WebDataset splits keys at the first dot, so keys must not contain one
+            key = f"{generation.id}_{os.path.splitext(filename)[0]}".replace(".", "_")
+            yield key, os.path.join(directory, filename), metadata
+
+
+def export_datasets(
+    generations: Sequence[Any],
+    output_directory: str,
+    export_format: str = "webdataset",
+    shard_size: int = 1000
+) -> Dict[str, Any]:
+    """Export datasets as WebDataset tar shards or Parquet files.
+
+    Class indices are assigned in sorted order of the exported class labels.
+    An ``index.json`` listing the classes and shards is written alongside.
+
+    Args:
+        generations: ``Generation`` rows of completed datasets.
+        output_directory: Directory for the shards; created if missing.
+        export_format: ``webdataset`` or ``parquet``.
+        shard_size: Maximum images per shard.
+
+    Returns:
+        The contents of ``index.json``: ``format``, ``classes``,
+        ``sample_count`` and ``shards`` (``filename``, ``samples``,
+        ``size_bytes`` each).
+
+    Raises:
+        ValueError: If the format is unknown or shard_size is below 1.
+        RuntimeError: If Parquet is requested but pyarrow is not installed.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unsupported export format '{export_format}'. Choose one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least 1")
+
+    classes = sorted({generation.class_label for generation in generations})
+    class_index = {label: i for i, label in enumerate(classes)}
+    os.makedirs(output_directory, exist_ok=True)
+
+    write_shard = _write_webdataset_shard if export_format == "webdataset" else _parquet_writer()
+    shards: List[Dict[str, Any]] = []
+    batch: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    def flush() -> None:
+        path = write_shard(output_directory, len(shards), batch, class_index)
+        shards.append({
+            "filename": os.path.basename(path),
+            "samples": len(batch),
+            "size_bytes": os.path.getsize(path),
+        })
+        batch.clear()
+
+    sample_count = 0
+    for sample in iter_samples(generations):
+        batch.append(sample)
+        sample_count += 1
+        if len(batch) >= shard_size:
+            flush()
+    if batch:
+        flush()
+
+    index = {
+        "format": export_format,
+        "classes": classes,
+        "sample_count": sample_count,
+        "shards": shards,
+    }
+    with open(os.path.join(output_directory, INDEX_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    logger.info(f"Exported {sample_count} images to {len(shards)} {export_format} shard(s) in {output_directory}")
+    return index
+
+
+def _write_webdataset_shard(
+    output_directory: str,
+    shard_index: int,
+    samples: List[Tuple[str, str, Dict[str, Any]]],
+    class_index: Dict[str, int]
+) -> str:
+    """Write one tar shard; a sample's files are stored next to each other."""
+    path = os.path.join(output_directory, f"shard-{shard_index:06d}.tar")
+    with tarfile.open(path, "w", format=tarfile.PAX_FORMAT) as tar:
+        for key, image_path, metadata in samples:
+            tar.add(image_path, arcname=key + os.path.splitext(image_path)[1].lower())
+            _add_bytes(tar, f"{key}.cls", str(class_index[metadata["class_label"]]).encode("utf-8"))
+            _add_bytes(tar, f"{key}.json", json.dumps(metadata, default=str).encode("utf-8"))
+    return path
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    """Add an in-memory file to a tar archive."""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _parquet_writer():
+    """Return the Parquet shard writer, importing pyarrow only when needed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ("key", pa.string()),
+        ("image", pa.binary()),
+        ("image_format", pa.string()),
+        ("class_label", pa.string()),
+        ("class_index", pa.int32()),
+        ("noise_level", pa.float64()),
+        ("generation_id", pa.string()),
+        ("filename", pa.string()),
+        ("prompt", pa.string()),
+        ("seed", pa.int64()),
+        ("model_id", pa.string()),
+        ("metadata", pa.string()),
+    ])
+
+    def write(
+        output_directory: str,
+        shard_index: int,
+        samples: List[Tuple[str, str, Dict[str, Any]]],
+        class_index: Dict[str, int]
+    ) -> str:
+        rows = []
+        for key, image_path, metadata in samples:
+            with open(image_path, "rb") as f:
+                image = f.read()
+            rows.append({
+                "key": key,
+                "image": image,
+                "image_format": os.path.splitext(image_path)[1].lstrip(".").lower(),
+                "class_label": metadata["class_label"],
+                "class_index": class_index[metadata["class_label"]],
+                "noise_level": metadata.get("noise_level"),
+                "generation_id": metadata.get("generation_id"),
+                "filename": metadata["filename"],
+                "prompt": metadata.get("prompt"),
+                "seed": metadata.get("seed"),
+                "model_id": metadata.get("model_id"),
+                "metadata": json.dumps(metadata, default=str),
+            })
+        path = os.path.join(output_directory, f"part-{shard_index:06d}.parquet")
+        # Images are already compressed; compressing them again only costs CPU
+        compression = {name: "SNAPPY" for name in schema.names}
+        compression["image"] = "NONE"
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), path, compression=compression)
+        return path
+
+    return write
+
+
+def shard_path(output_directory: str, filename: str) -> Optional[str]:
+    """Resolve a shard or index file of an export, rejecting anything else.
+
+    Args:
+        output_directory: Export directory.
+        filename: Requested file name.
+
+    Returns:
+        The file's path, or None if it is not a file of this export.
+    """
+    if os.path.basename(filename) != filename or not (
+        filename == INDEX_FILENAME or filename.endswith((".tar", ".parquet"))
+    ):
+        return None
+    path = os.path.join(output_directory, filename)
+    return path if os.path.isfile(path) else None
+
+
+def sweep_exports(base_directory: str, max_age_seconds: float = 0, max_count: int = 0) -> int:
+    """Delete expired exports, then all but the newest ``max_count``.
+
+    Args:
+        base_directory: Directory holding one sub-directory per export.
+        max_age_seconds: Age after which an export is deleted; 0 keeps
+            exports regardless of age.
+        max_count: Exports kept at most; 0 for no limit.
+
+    Returns:
+        Number of exports deleted.
+    """
+    try:
+        names = os.listdir(base_directory)
+    except FileNotFoundError:
+        return 0
+
+    exports = []
+    for name in names:
+        path = os.path.join(base_directory, name)
+        try:
+            if os.path.isdir(path):
+                exports.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    exports.sort(reverse=True)
+
+    expired = []
+    if max_age_seconds > 0:
+        cutoff = time.time() - max_age_seconds
+        expired = [path for mtime, path in exports if mtime < cutoff]
+        exports = [(mtime, path) for mtime, path in exports if mtime >= cutoff]
+    if max_count > 0:
+        expired.extend(path for _, path in exports[max_count:])
+
+    for path in expired:
+        shutil.rmtree(path, ignore_errors=True)
+    return len(expired)
@@ -0,0 +1,151 @@
+"""Background image encoding and saving.
+
+PNG compression used to run right after each diffusion call on the request
+path, leaving the pipeline idle while images were encoded and written. The
+writer moves encoding and disk writes to a small thread pool so they overlap
+with denoising of the next batch. A bounded number of pending writes gives
+backpressure: producers wait once the writer falls behind instead of piling
+decoded images up in memory.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from .thumbnail_store import ThumbnailStore
+
+logger = logging.getLogger(__name__)
+
+# Output format -> (PIL format name, file extension)
+IMAGE_FORMATS = {
+    "png": ("PNG", ".png"),
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+
+
+class ImageWriter:
+    """Encode and atomically write images on a thread pool.
+
+    Each file is written to a temporary name in the target directory and
+    renamed into place, so readers never see partially written images.
+    """
+
+    def __init__(
+        self,
+        image_format: str = "png",
+        png_compress_level: int = 6,
+        quality: int = 90,
+        max_workers: int = 2,
+        max_pending: int = 16,
+        thumbnails: Optional[ThumbnailStore] = None
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            image_format: ``png``, ``webp`` or ``jpeg``.
+            png_compress_level: zlib level for PNG, 0 (fastest) to 9 (smallest).
+            quality: Quality for WebP/JPEG, 1 to 100.
+            max_workers: Encoder threads.
+            max_pending: Writes that may be queued or running before
+                ``submit`` waits.
+            thumbnails: Store that gets a thumbnail of every written image,
+                made from the already decoded pixels.
+
+        Raises:
+            ValueError: If the image format is not supported.
+        """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(
+                f"Unsupported image format '{image_format}'. Choose one of: {', '.join(IMAGE_FORMATS)}"
+            )
+        self.image_format = image_format
+        self.png_compress_level = min(9, max(0, png_compress_level))
+        self.quality = min(100, max(1, quality))
+        self.max_pending = max(1, max_pending)
+        self.thumbnails = thumbnails
+        self.images_written = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="image-writer")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+
+    @property
+    def extension(self) -> str:
+        """File extension for the configured format, including the dot."""
+        return IMAGE_FORMATS[self.image_format][1]
+
+    @property
+    def pending(self) -> int:
+        """Number of writes queued or in progress."""
+        return self._pending
+
+    def cache_params(self) -> Dict[str, Any]:
+        """Encoding parameters that change the written bytes, for cache keys."""
+        if self.image_format == "png":
+            return {"format": self.image_format}
+        return {"format": self.image_format, "quality": self.quality}
+
+    async def submit(self, image: Image.Image, path: str) -> "asyncio.Future[str]":
+        """Queue an image for writing, waiting first if the queue is full.
+
+        Args:
+            image: Image to encode.
+            path: Destination path; should end with ``extension``.
+
+        Returns:
+            A future resolving to ``path`` once the file is in place. Encoding
+            or I/O errors are raised when it is awaited.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        await self._slots.acquire()
+        self._pending += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._write, image, path)
+        future.add_done_callback(self._write_done)
+        return future
+
+    async def write(self, image: Image.Image, path: str) -> str:
+        """Write an image and wait until it is on disk."""
+        return await (await self.submit(image, path))
+
+    def _write_done(self, future: "asyncio.Future[str]") -> None:
+        """Free the queue slot of a finished write."""
+        self._pending -= 1
+        self._slots.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the encoder threads, optionally finishing queued writes first."""
+        self._executor.shutdown(wait=wait)
+
+    def _write(self, image: Image.Image, path: str) -> str:
+        """Encode one image to a temporary file and rename it into place."""
+        pil_format = IMAGE_FORMATS[self.image_format][0]
+        if pil_format == "PNG":
+            options = {"compress_level": self.png_compress_level}
+        else:
+            options = {"quality": self.quality}
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=pil_format, **options)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if self.thumbnails is not None:
+            self.thumbnails.create(image, path)
+        self.images_written += 1
+        return path
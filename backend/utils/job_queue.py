@@ -0,0 +1,203 @@
+"""In-process asynchronous job queue for long-running generations.
+
+Jobs are plain coroutine factories executed by a fixed number of consumer
+tasks on the running event loop, so no outside broker is needed. Durable job
+state lives in the ``generations`` table; this module only tracks live
+progress in memory for fast status polling.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobProgress:
+    """Live progress of a single generation job.
+
+    Updated from the inference thread through ``update``; reads from the event
+    loop only ever see whole integer values, so no locking is required. Every
+    change bumps ``version`` on the event loop, so streaming clients can wait
+    for the next change with ``wait_for_change``.
+    """
+
+    def __init__(self, job_id: str, images_total: int, total_steps: int = 0) -> None:
+        """Initialize progress tracking for a job.
+
+        Args:
+            job_id: Generation ID the job belongs to.
+            images_total: Number of images the job will produce.
+            total_steps: Denoising steps per image.
+        """
+        self.job_id = job_id
+        self.images_total = images_total
+        self.images_done = 0
+        self.current_step = 0
+        self.total_steps = total_steps
+        self.saved_images: List[str] = []
+        self.closed = False
+        self.version = 0
+        self._changed = asyncio.Event()
+        try:
+            self._loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def update(self, images_done: int, step: int, total_steps: int) -> None:
+        """Record progress reported by the diffusion step callback.
+
+        Args:
+            images_done: Images fully generated so far.
+            step: Denoising step reached in the current batch.
+            total_steps: Denoising steps per image.
+        """
+        self.images_done = images_done
+        self.current_step = step
+        self.total_steps = total_steps
+        self._notify()
+
+    def add_image(self, filename: str) -> None:
+        """Record an image file that is saved and ready to serve.
+
+        Args:
+            filename: File name inside the generation's output directory.
+        """
+        self.saved_images.append(filename)
+        self._notify()
+
+    def close(self) -> None:
+        """Mark the job as no longer running and wake any waiting streams."""
+        self.closed = True
+        self._notify()
+
+    async def wait_for_change(self, seen_version: int, timeout: float) -> bool:
+        """Wait until progress moves past ``seen_version``.
+
+        Args:
+            seen_version: ``version`` the caller last observed.
+            timeout: Maximum seconds to wait.
+
+        Returns:
+            True if progress changed, False on timeout.
+        """
+        if self.version != seen_version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _notify(self) -> None:
+        """Bump ``version`` and wake waiters, from any thread."""
+        if self._loop is None or self._loop.is_closed():
+            self.version += 1
+            return
+        self._loop.call_soon_threadsafe(self._bump_version)
+
+    def _bump_version(self) -> None:
+        """Runs on the event loop: swap in a fresh event and fire the old one."""
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    @property
+    def fraction(self) -> float:
+        """Overall completion between 0.0 and 1.0, including partial batches."""
+        if self.images_total <= 0:
+            return 0.0
+        partial = 0.0
+        if self.total_steps and self.current_step < self.total_steps:
+            partial = self.current_step / self.total_steps
+        return min(1.0, (self.images_done + partial) / self.images_total)
+
+
+class JobQueue:
+    """FIFO queue of generation jobs processed by background consumer tasks."""
+
+    def __init__(self, concurrency: int = 1) -> None:
+        """Initialize the queue.
+
+        Args:
+            concurrency: Number of jobs processed at the same time. Inference
+                itself is still serialized by the inference worker; extra
+                consumers let jobs interleave their batches.
+        """
+        self.concurrency = max(1, concurrency)
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumers: List[asyncio.Task] = []
+        self._progress: Dict[str, JobProgress] = {}
+
+    async def start(self) -> None:
+        """Start the consumer tasks on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._consumers = [
+            asyncio.create_task(self._consume(), name=f"job-consumer-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Job queue started with {self.concurrency} consumer(s)")
+
+    async def stop(self) -> None:
+        """Cancel consumer tasks. Unfinished jobs stay queued in the database."""
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+    def track(self, job_id: str, images_total: int, total_steps: int = 0) -> JobProgress:
+        """Create (or reset) the live progress record for a job.
+
+        Args:
+            job_id: Generation ID.
+            images_total: Number of images the job will produce.
+            total_steps: Denoising steps per image.
+
+        Returns:
+            The progress object to hand to the generator callback.
+        """
+        progress = JobProgress(job_id, images_total, total_steps)
+        self._progress[job_id] = progress
+        return progress
+
+    def get_progress(self, job_id: str) -> Optional[JobProgress]:
+        """Return live progress for a job, or None if it is not running here."""
+        return self._progress.get(job_id)
+
+    def forget(self, job_id: str) -> None:
+        """Drop live progress for a finished job."""
+        progress = self._progress.pop(job_id, None)
+        if progress is not None:
+            progress.close()
+
+    def enqueue(self, job_id: str, run: Callable[[], Awaitable[None]]) -> None:
+        """Add a job to the queue.
+
+        Args:
+            job_id: Generation ID, used for logging.
+            run: Coroutine factory that performs the job and persists its state.
+
+        Raises:
+            RuntimeError: If the queue has not been started.
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        self._queue.put_nowait((job_id, run))
+        logger.info(f"Job {job_id} queued ({self._queue.qsize()} waiting)")
+
+    @property
+    def size(self) -> int:
+        """Number of jobs waiting to start."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _consume(self) -> None:
+        """Consumer loop: run jobs one at a time until cancelled."""
+        while True:
+            job_id, run = await self._queue.get()
+            try:
+                await run()
+            except Exception as e:
+                # Jobs persist their own failure state; never let one kill the consumer
+                logger.error(f"Job {job_id} failed: {e}")
+            finally:
+                self._queue.task_done()
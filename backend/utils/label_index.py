@@ -0,0 +1,103 @@
+"""In-memory index for class label autocomplete.
+
+Suggestions used to run ``class_label ILIKE '%q%'`` with ``DISTINCT`` over the
+whole ``generations`` table on every keystroke. The index keeps each distinct
+label once, with its usage count, in a sorted array of lowercase search keys.
+A prefix lookup is then two binary searches plus ranking the matches, and
+results per prefix are memoized until a label or count changes.
+
+Every word of a label is a search key, so ``cat`` completes ``cute cat`` too.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+
+class LabelIndex:
+    """Ranked prefix completion over distinct class labels."""
+
+    def __init__(self, max_cached_queries: int = 1024) -> None:
+        """Initialize an empty index.
+
+        Args:
+            max_cached_queries: Completed prefixes remembered between changes.
+        """
+        self.max_cached_queries = max(0, max_cached_queries)
+        self._counts: Dict[str, int] = {}
+        # Sorted (search key, label) pairs; a label appears once per word
+        self._keys: List[Tuple[str, str]] = []
+        self._results: "OrderedDict[Tuple[str, int], List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def load(self, labels: Iterable[Tuple[str, int]]) -> None:
+        """Replace the index contents.
+
+        Args:
+            labels: ``(label, usage count)`` pairs.
+        """
+        counts = {label: count for label, count in labels if label.strip()}
+        keys = sorted(key for label in counts for key in self._search_keys(label))
+        with self._lock:
+            self._counts = counts
+            self._keys = keys
+            self._results.clear()
+
+    def add(self, label: str, count: int = 1) -> None:
+        """Add a label, or raise the usage count of a known one.
+
+        Args:
+            label: Class label.
+            count: Amount to add to its usage count.
+        """
+        if not label.strip():
+            return
+        with self._lock:
+            if label not in self._counts:
+                self._counts[label] = 0
+                for key in self._search_keys(label):
+                    bisect.insort(self._keys, key)
+            self._counts[label] += count
+            self._results.clear()
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        """Return labels with a word starting with the query, most used first.
+
+        Args:
+            query: Typed text; case-insensitive. Empty returns the most used labels.
+            limit: Maximum suggestions.
+
+        Returns:
+            Labels ordered by usage count, then shorter and alphabetical first.
+        """
+        prefix = " ".join(query.lower().split())
+        cache_key = (prefix, limit)
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                return list(cached)
+
+            if prefix:
+                start = bisect.bisect_left(self._keys, (prefix,))
+                end = bisect.bisect_left(self._keys, (prefix + "\uffff",))
+                matches = {label for _, label in self._keys[start:end]}
+            else:
+                matches = self._counts.keys()
+            ranked = sorted(matches, key=lambda label: (-self._counts[label], len(label), label))[:limit]
+
+            if self.max_cached_queries:
+                self._results[cache_key] = ranked
+                while len(self._results) > self.max_cached_queries:
+                    self._results.popitem(last=False)
+        return list(ranked)
+
+    @staticmethod
+    def _search_keys(label: str) -> List[Tuple[str, str]]:
+        """Search keys of a label: the label from each word onwards, lowercased."""
+        words = label.lower().split()
+        return [(" ".join(words[i:]), label) for i in range(len(words))]
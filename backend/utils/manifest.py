@@ -0,0 +1,179 @@
+"""Dataset file manifests.
+
+Readers used to ``os.listdir`` a dataset directory and filter by extension on
+every request. When a generation finishes, a compact ``manifest.json`` is
+now written next to its images. It lists each file's name, size, SHA-256 and
+dimensions, and recently used manifests are kept in memory. Serving a
+dataset's files then needs neither a directory scan nor rehashing for ETags.
+Datasets from before manifests existed get one built from a single scan on
+first access.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+from .utils import file_sha256, list_image_files
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _describe_file(directory: str, filename: str) -> Dict[str, Any]:
+    """Name, size, SHA-256 and dimensions of one image."""
+    path = os.path.join(directory, filename)
+    size = os.path.getsize(path)
+    sha256 = file_sha256(path)
+    try:
+        # Only the header is read to get the dimensions
+        with Image.open(path) as image:
+            width, height = image.size
+    except OSError:
+        width = height = None
+    return {"name": filename, "size": size, "sha256": sha256, "width": width, "height": height}
+
+
+def build_manifest(directory: str, filenames: List[str]) -> Dict[str, Any]:
+    """Describe a dataset's images and atomically write ``manifest.json``.
+
+    Args:
+        directory: Dataset directory.
+        filenames: Image file names, in dataset order.
+
+    Returns:
+        The manifest: ``version`` and ``files`` (``name``, ``size``,
+        ``sha256``, ``width``, ``height`` each).
+
+    Raises:
+        OSError: If an image cannot be read or the manifest cannot be written.
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "files": [_describe_file(directory, filename) for filename in filenames],
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(directory, MANIFEST_FILENAME))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return manifest
+
+
+def load_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    """Read a dataset's manifest, building it from a directory scan if missing.
+
+    Args:
+        directory: Dataset directory.
+
+    Returns:
+        The manifest, or None if the directory does not exist.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except FileNotFoundError:
+        pass
+    except ValueError as e:
+        logger.warning(f"Rebuilding unreadable manifest in {directory}: {e}")
+
+    if not os.path.isdir(directory):
+        return None
+    return build_manifest(directory, list_image_files(directory))
+
+
+class ManifestStore:
+    """Dataset manifests with an in-memory LRU in front of the sidecars."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        """Initialize the store.
+
+        Args:
+            max_entries: Manifests kept in memory, each indexed by file name.
+        """
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, directory: str, filenames: List[str]) -> List[Dict[str, Any]]:
+        """Write a finished dataset's manifest and cache it.
+
+        Args:
+            directory: Dataset directory.
+            filenames: Image file names, in dataset order.
+
+        Returns:
+            The manifest's file entries.
+        """
+        files = build_manifest(directory, filenames)["files"]
+        self._remember(directory, files)
+        return files
+
+    def files(self, directory: str) -> List[Dict[str, Any]]:
+        """File entries of a dataset, in dataset order.
+
+        Blocks on disk for manifests not in memory; call it off the event loop.
+
+        Args:
+            directory: Dataset directory.
+
+        Returns:
+            File entries; empty if the dataset directory does not exist.
+        """
+        return list(self._index(directory).values())
+
+    def entry(self, directory: str, filename: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry of one file, or None if the dataset has no such image."""
+        return self._index(directory).get(filename)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-memory cache size and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _index(self, directory: str) -> Dict[str, Dict[str, Any]]:
+        """File entries by name, from memory or the sidecar."""
+        with self._lock:
+            index = self._cache.get(directory)
+            if index is not None:
+                self._cache.move_to_end(directory)
+                self.hits += 1
+                return index
+            self.misses += 1
+
+        manifest = load_manifest(directory)
+        if manifest is None:
+            return {}
+        return self._remember(directory, manifest["files"])
+
+    def _remember(self, directory: str, files: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Cache a manifest's entries by file name."""
+        index = {entry["name"]: entry for entry in files}
+        with self._lock:
+            self._cache[directory] = index
+            self._cache.move_to_end(directory)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return index
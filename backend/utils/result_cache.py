@@ -0,0 +1,189 @@
+"""Content-addressed on-disk cache of generated images.
+
+With explicit seeds, a diffusion run is fully determined by its parameters,
+so identical requests can be served from disk instead of re-running the
+pipeline. Entries are keyed by a hash of every parameter that affects the
+output and evicted least-recently-used once the total size exceeds a budget.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """LRU image cache on disk, bounded by total byte size.
+
+    Files are stored as ``<directory>/<key[:2]>/<key><ext>``. Access order is
+    kept in memory and mirrored to file modification times, so LRU order
+    survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        """Initialize the cache and index any existing entries.
+
+        Args:
+            directory: Root directory for cached files.
+            max_bytes: Total size budget. 0 disables the cache.
+        """
+        self.directory = directory
+        self.max_bytes = max(0, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[str, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """Hash generation parameters into a cache key.
+
+        Args:
+            **params: Every parameter that determines the output image, e.g.
+                model_id, prompt, negative_prompt, steps, guidance, width,
+                height, seed and device.
+
+        Returns:
+            Hex SHA-256 digest of the canonicalized parameters.
+        """
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def fetch(self, key: str, destination: str) -> bool:
+        """Materialize a cached image at ``destination`` if present.
+
+        A hard link is used when possible so hits cost no copy.
+
+        Args:
+            key: Cache key from ``make_key``.
+            destination: Path to create. Its extension must match the entry.
+
+        Returns:
+            True on a hit, False on a miss.
+        """
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not destination.endswith(os.path.splitext(entry[0])[1]):
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            path = entry[0]
+
+        try:
+            try:
+                os.link(path, destination)
+            except OSError:
+                shutil.copyfile(path, destination)
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            # Removed behind our back; treat as a miss
+            with self._lock:
+                self._drop(key)
+                self.hits -= 1
+                self.misses += 1
+            return False
+
+    def store(self, key: str, source: str) -> None:
+        """Add an image file to the cache, evicting old entries if needed.
+
+        Args:
+            key: Cache key from ``make_key``.
+            source: Path of the generated image to cache.
+        """
+        if not self.enabled:
+            return
+
+        ext = os.path.splitext(source)[1]
+        shard = os.path.join(self.directory, key[:2])
+        path = os.path.join(shard, key + ext)
+
+        try:
+            size = os.path.getsize(source)
+            if size > self.max_bytes:
+                return
+            os.makedirs(shard, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=shard, suffix=".tmp")
+            os.close(fd)
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache result {key}: {e}")
+            return
+
+        with self._lock:
+            previous = self._entries.get(key)
+            self._drop(key, delete=previous is not None and previous[0] != path)
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _load_index(self) -> None:
+        """Index cached files on disk, oldest access first."""
+        found = []
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for filename in os.listdir(shard_dir):
+                path = os.path.join(shard_dir, filename)
+                if filename.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                found.append((stat.st_mtime, os.path.splitext(filename)[0], path, stat.st_size))
+
+        for _, key, path, size in sorted(found):
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+        self._evict()
+        logger.info(f"Result cache: {len(self._entries)} entries, {self._total_bytes} bytes")
+
+    def _drop(self, key: str, delete: bool = True) -> None:
+        """Remove an entry from the index (and disk). Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry[1]
+        if delete:
+            try:
+                os.remove(entry[0])
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until within budget. Caller holds the lock."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
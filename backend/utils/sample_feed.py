@@ -0,0 +1,64 @@
+"""Live gallery feed of recently completed generations.
+
+``/samples`` used to query the latest generations and read a preview image
+for each on every poll. The feed keeps the latest samples, thumbnail
+included, in a fixed-size ring buffer filled as generations complete. Every
+sample gets an increasing sequence number, so pollers can ask only for what
+is new (``since``) or revalidate with an ETag.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+class SampleFeed:
+    """Fixed-size, newest-last buffer of gallery samples with a cursor."""
+
+    def __init__(self, max_entries: int = 10) -> None:
+        """Initialize an empty feed.
+
+        Args:
+            max_entries: Samples kept; older ones drop out.
+        """
+        self._entries: deque = deque(maxlen=max(1, max_entries))
+        # Starting from the clock keeps cursors increasing across restarts,
+        # so a cursor from an earlier process simply returns every sample
+        self._cursor = time.time_ns() // 1_000_000
+        self._lock = threading.Lock()
+
+    @property
+    def cursor(self) -> int:
+        """Sequence number of the newest sample; changes whenever one is added."""
+        return self._cursor
+
+    @property
+    def etag(self) -> str:
+        """Quoted ETag for the current contents."""
+        return f'"{self._cursor}"'
+
+    def add(self, sample: Dict[str, Any]) -> None:
+        """Append a sample, dropping the oldest if the feed is full.
+
+        Args:
+            sample: JSON-serializable sample; a ``seq`` key is added.
+        """
+        with self._lock:
+            self._cursor += 1
+            self._entries.append({**sample, "seq": self._cursor})
+
+    def since(self, cursor: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Samples newer than a cursor, newest first.
+
+        Args:
+            cursor: ``cursor`` of a previous response; None for all samples.
+
+        Returns:
+            Matching samples.
+        """
+        with self._lock:
+            entries = list(self._entries)
+        if cursor is not None:
+            entries = [entry for entry in entries if entry["seq"] > cursor]
+        return entries[::-1]
@@ -0,0 +1,155 @@
+"""Precomputed image thumbnails for previews.
+
+Previews used to read and base64-encode full-size PNGs on every request.
+Thumbnails are now written once, next to the dataset, when an image is saved
+(``<dataset>/thumbnails/<stem>.webp``) and hot ones are kept in memory.
+Images saved before thumbnails existed get theirs on first access.
+"""
+
+import base64
+import io
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIRNAME = "thumbnails"
+
+
+class ThumbnailStore:
+    """Create, persist and serve small WebP thumbnails with an in-memory LRU."""
+
+    def __init__(self, size: int = 128, quality: int = 80, max_cache_entries: int = 512) -> None:
+        """Initialize the store.
+
+        Args:
+            size: Maximum width/height of thumbnails in pixels.
+            quality: WebP quality, 1 to 100.
+            max_cache_entries: Thumbnails kept in memory. 0 disables the cache.
+        """
+        self.size = size
+        self.quality = quality
+        self.max_cache_entries = max(0, max_cache_entries)
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def thumbnail_path(image_path: str) -> str:
+        """Path of the thumbnail belonging to a full-size image."""
+        directory, filename = os.path.split(image_path)
+        return os.path.join(directory, THUMBNAIL_DIRNAME, os.path.splitext(filename)[0] + ".webp")
+
+    def create(self, image: Image.Image, image_path: str) -> Optional[bytes]:
+        """Encode and save the thumbnail for a freshly saved image.
+
+        Failures are logged rather than raised so they never fail the save.
+
+        Args:
+            image: The full-size image, already decoded.
+            image_path: Where the full-size image was saved.
+
+        Returns:
+            The thumbnail bytes, or None if it could not be written.
+        """
+        try:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((self.size, self.size))
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format="WEBP", quality=self.quality)
+            data = buffer.getvalue()
+
+            path = self.thumbnail_path(image_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not create thumbnail for {image_path}: {e}")
+            return None
+
+        self._remember(path, data)
+        return data
+
+    def get(self, image_path: str) -> Optional[bytes]:
+        """Return thumbnail bytes for an image, creating the thumbnail if missing.
+
+        Args:
+            image_path: Path of the full-size image.
+
+        Returns:
+            WebP bytes, or None if neither thumbnail nor image exists.
+        """
+        path = self.thumbnail_path(image_path)
+        with self._lock:
+            data = self._cache.get(path)
+            if data is not None:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            try:
+                with Image.open(image_path) as image:
+                    return self.create(image, image_path)
+            except (FileNotFoundError, OSError):
+                return None
+
+        self._remember(path, data)
+        return data
+
+    def get_base64(self, image_path: str) -> Optional[str]:
+        """Return a thumbnail as a base64 string, or None if unavailable."""
+        data = self.get(image_path)
+        return base64.b64encode(data).decode("utf-8") if data is not None else None
+
+    def previews(self, image_paths: List[str]) -> List[str]:
+        """Base64 thumbnails of the given images.
+
+        Args:
+            image_paths: Full-size images, e.g. the first few of a dataset.
+
+        Returns:
+            Base64 encoded WebP thumbnails in the same order, skipping
+            images that no longer exist.
+        """
+        previews = []
+        for image_path in image_paths:
+            encoded = self.get_base64(image_path)
+            if encoded:
+                previews.append(encoded)
+        return previews
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-memory cache size and hit/miss counters."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "max_entries": self.max_cache_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def _remember(self, path: str, data: bytes) -> None:
+        """Add a thumbnail to the in-memory LRU."""
+        if not self.max_cache_entries:
+            return
+        with self._lock:
+            self._cache[path] = data
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
@@ -1,87 +1,204 @@
 """Utility functions for the synthetic data generator backend."""
 
 import base64
+import functools
+import hashlib
 import io
+import json
 import os
+import re
 import zipfile
-from typing import List, Optional
-from PIL import Image
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 
 
-def base64_encode_image(image_path: str) -> Optional[str]:
-    """Encode an image file to base64 string.
+# Formats that are already compressed; deflating them again only costs CPU
+_PRECOMPRESSED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.zip')
+
+
+class _ZipChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink that collects ZIP output for streaming."""
+    
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last drain."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip_archive(file_paths: List[str], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Build a ZIP archive incrementally, yielding it chunk by chunk.
+    
+    Nothing is written to disk and memory use is bounded by ``chunk_size``
+    regardless of the archive size. Already-compressed images are stored
+    as-is (``ZIP_STORED``); other files are deflated.
     
     Args:
-        image_path: Path to the image file
+        file_paths: Files to include, stored under their base names
+        chunk_size: Bytes read from each source file at a time
         
-    Returns:
-        Base64 encoded string or None if file doesn't exist
+    Yields:
+        Consecutive pieces of the ZIP file
     """
-    try:
-        if not os.path.exists(image_path):
-            return None
+    buffer = _ZipChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w') as zipf:
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                continue
+            # Add file to ZIP with just the filename (not full path)
+            info = zipfile.ZipInfo.from_file(file_path, os.path.basename(file_path))
+            if file_path.lower().endswith(_PRECOMPRESSED_EXTENSIONS):
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
             
-        with open(image_path, "rb") as image_file:
-            image_data = image_file.read()
-            base64_string = base64.b64encode(image_data).decode('utf-8')
-            return base64_string
-    except Exception:
-        return None
+            with open(file_path, 'rb') as source, zipf.open(info, 'w') as dest:
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory, written when the archive is closed
+    data = buffer.drain()
+    if data:
+        yield data
 
 
-def create_zip_archive(file_paths: List[str], zip_path: str) -> bool:
-    """Create a ZIP archive from a list of files.
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+
+
+def list_image_files(directory: str) -> List[str]:
+    """List image file names in a directory, sorted by name.
     
     Args:
-        file_paths: List of file paths to include in the ZIP
-        zip_path: Path where the ZIP file should be created
+        directory: Directory containing images
         
     Returns:
-        True if successful, False otherwise
+        Sorted image file names (not paths); empty if the directory is missing
     """
-    try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in file_paths:
-                if os.path.exists(file_path):
-                    # Add file to ZIP with just the filename (not full path)
-                    zipf.write(file_path, os.path.basename(file_path))
-        return True
-    except Exception:
-        return False
+    if not os.path.exists(directory):
+        return []
+    return sorted(
+        filename for filename in os.listdir(directory)
+        if filename.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
 
+@functools.lru_cache(maxsize=4096)
+def _content_hash(path: str, size: int, mtime_ns: int) -> str:
+    """SHA-256 of a file, memoized per (path, size, mtime)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def get_preview_images(directory: str, max_count: int = 3) -> List[str]:
-    """Get base64 encoded preview images from a directory.
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file's content.
+    
+    Hashes are cached per path, size and modification time, so unchanged
+    files are only read once.
     
     Args:
-        directory: Directory containing images
-        max_count: Maximum number of preview images to return
+        path: File path
         
     Returns:
-        List of base64 encoded image strings
+        Hex digest
+        
+    Raises:
+        OSError: If the file cannot be read
     """
-    previews = []
-    
-    if not os.path.exists(directory):
-        return previews
+    stat = os.stat(path)
+    return _content_hash(path, stat.st_size, stat.st_mtime_ns)
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range HTTP ``Range`` header.
     
-    # Get all image files
-    image_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
-    image_files = []
+    Args:
+        header: Header value, e.g. ``bytes=0-1023``, ``bytes=512-`` or ``bytes=-256``
+        size: Total size of the resource in bytes
+        
+    Returns:
+        Inclusive ``(start, end)`` byte positions, or None if the header is
+        malformed or asks for several ranges (serve the whole file then)
+        
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)-(\d*)\s*", header)
+    if not match or not any(match.groups()):
+        return None
+    start_text, end_text = match.groups()
     
-    for filename in os.listdir(directory):
-        if filename.lower().endswith(image_extensions):
-            image_files.append(os.path.join(directory, filename))
+    if start_text:
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if end_text and end < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(0, size - length), size - 1
     
-    # Sort files and take first max_count
-    image_files.sort()
+    if start >= size:
+        raise ValueError("Range starts beyond the end of the file")
+    return start, min(end, size - 1)
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Encode a keyset pagination position as an opaque URL-safe cursor.
     
-    for image_path in image_files[:max_count]:
-        base64_image = base64_encode_image(image_path)
-        if base64_image:
-            previews.append(base64_image)
+    Args:
+        created_at: Sort timestamp of the last row returned
+        row_id: ID of the last row returned (tie-breaker)
+        
+    Returns:
+        Cursor string
+    """
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor made by ``encode_cursor``.
     
-    return previews
+    Args:
+        cursor: Cursor string from a previous page
+        
+    Returns:
+        ``(created_at, id)`` of the last row of that page
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
 
 
 def ensure_directory_exists(directory: str) -> None:
@@ -93,26 +210,3 @@ def ensure_directory_exists(directory: str) -> None:
     os.makedirs(directory, exist_ok=True)
 
 
-def count_files_in_directory(directory: str, extensions: Optional[List[str]] = None) -> int:
-    """Count files in a directory with optional extension filtering.
-    
-    Args:
-        directory: Directory to count files in
-        extensions: List of file extensions to count (e.g., ['.png', '.jpg'])
-        
-    Returns:
-        Number of files found
-    """
-    if not os.path.exists(directory):
-        return 0
-    
-    count = 0
-    for filename in os.listdir(directory):
-        if extensions:
-            if any(filename.lower().endswith(ext) for ext in extensions):
-                count += 1
-        else:
-            if os.path.isfile(os.path.join(directory, filename)):
-                count += 1
-    
-    return count